@@ -0,0 +1,213 @@
+import json
+from pathlib import Path
+
+import numpy as np
+
+import transforms
+
+# ── Inference Backends ────────────────────────────────────────────────────────
+# Interchangeable ways to run the same booster. Every backend takes a float
+# (n, 8) array and returns float32 predictions in $100K units.
+#
+#   sklearn  – XGBRegressor.predict (DMatrix built per call)
+#   inplace  – Booster.inplace_predict on the raw NumPy array, no DMatrix
+#   flat     – pure NumPy: all trees flattened into contiguous node arrays and
+#              walked level by level for every row × tree at once
+#   auto     – dispatches by batch size to whichever was fastest in
+#              bench_backends.py (stored as backends.json next to the model)
+#   compact  – the flat evaluator over the artifact's model.compact, written
+#              by compress.py (pruned/quantized; needs the version directory)
+# Models trained with derived features (see transforms.py) get their transform
+# applied once per call in front of whichever backend runs the trees.
+AUTO_TABLE_FILE = "backends.json"
+
+
+class SklearnBackend:
+    name = "sklearn"
+
+    def __init__(self, model):
+        self.model = model
+
+    def predict(self, X):
+        return self.model.predict(X)
+
+
+class InplaceBackend:
+    name = "inplace"
+
+    def __init__(self, model):
+        self.booster = model.get_booster() if hasattr(model, "get_booster") else model
+
+    def predict(self, X):
+        return self.booster.inplace_predict(np.asarray(X), validate_features=False)
+
+
+_IDENTITY_OBJECTIVES = {"reg:squarederror", "reg:absoluteerror",
+                        "reg:pseudohubererror", "reg:quantileerror"}
+
+
+def _parse_base_score(raw):
+    return float(str(raw).strip("[]").split(",")[0])
+
+
+class FlatTreeBackend:
+    """Evaluate the booster's trees with NumPy gathers instead of XGBoost.
+
+    Nodes of all trees are concatenated into flat arrays (feature, threshold,
+    left, right, default_left, value). Each step moves every (row, tree)
+    cursor one level down; leaves point back at themselves so cursors that
+    have arrived simply stay put. Comparisons and the leaf sum are done in
+    float32, the same precision XGBoost uses.
+    """
+
+    name = "flat"
+    chunk_rows = 8192
+
+    def __init__(self, model):
+        booster = model.get_booster() if hasattr(model, "get_booster") else model
+        learner = json.loads(booster.save_raw("json"))["learner"]
+        objective = learner["objective"]["name"]
+        if objective not in _IDENTITY_OBJECTIVES:
+            raise ValueError(f"flat backend supports identity-link objectives only, got {objective!r}")
+        self.base_score = _parse_base_score(learner["learner_model_param"]["base_score"])
+
+        trees = learner["gradient_booster"]["model"]["trees"]
+        feature, threshold, left, right, default_left, roots = [], [], [], [], [], []
+        offset, depth = 0, 0
+        for tree in trees:
+            lc = np.asarray(tree["left_children"], dtype=np.int32)
+            rc = np.asarray(tree["right_children"], dtype=np.int32)
+            leaf = lc == -1
+            ids  = np.arange(len(lc), dtype=np.int32) + offset
+            feature.append(np.where(leaf, 0, tree["split_indices"]).astype(np.int32))
+            threshold.append(np.asarray(tree["split_conditions"], dtype=np.float32))
+            left.append(np.where(leaf, ids, lc + offset).astype(np.int32))
+            right.append(np.where(leaf, ids, rc + offset).astype(np.int32))
+            default_left.append(np.asarray(tree["default_left"], dtype=bool))
+            roots.append(offset)
+            depth = max(depth, _tree_depth(lc, rc))
+            offset += len(lc)
+
+        self.feature      = np.concatenate(feature)
+        self.threshold    = np.concatenate(threshold)   # leaf value on leaf nodes
+        self.left         = np.concatenate(left)
+        self.right        = np.concatenate(right)
+        self.default_left = np.concatenate(default_left)
+        self.roots        = np.asarray(roots, dtype=np.int32)
+        self.max_depth    = depth
+
+    def predict(self, X):
+        X = np.asarray(X, dtype=np.float32)
+        out = np.empty(len(X), dtype=np.float32)
+        for start in range(0, len(X), self.chunk_rows):
+            out[start:start + self.chunk_rows] = self._predict_chunk(X[start:start + self.chunk_rows])
+        return out
+
+    def _predict_chunk(self, X):
+        rows = np.arange(len(X))[:, None]
+        node = np.broadcast_to(self.roots, (len(X), len(self.roots))).copy()
+        for _ in range(self.max_depth):
+            x = X[rows, self.feature[node]]
+            go_left = np.where(np.isnan(x), self.default_left[node], x < self.threshold[node])
+            node = np.where(go_left, self.left[node], self.right[node])
+        # XGBoost starts from base_score and adds trees in order in float32;
+        # summing the same way makes the results bit-identical
+        leaves = self.threshold[node]
+        out = np.full(len(X), self.base_score, dtype=np.float32)
+        for t in range(leaves.shape[1]):
+            out += leaves[:, t]
+        return out
+
+
+def _tree_depth(left, right):
+    depth, frontier = 0, [0]
+    while frontier:
+        children = [c for n in frontier for c in (left[n], right[n]) if c != -1]
+        if not children:
+            break
+        depth += 1
+        frontier = children
+    return depth
+
+
+class AutoBackend:
+    """Route each call to the backend that benchmarked fastest for its size.
+
+    ``table`` is a list of ``(max_rows, backend_name)`` in increasing order;
+    the first entry whose ``max_rows`` covers the batch wins.
+    """
+
+    name = "auto"
+    default_table = [(float("inf"), "inplace")]
+
+    def __init__(self, model, table=None):
+        self.table = sorted(table or self.default_table, key=lambda entry: entry[0])
+        self._backends = {name: BACKENDS[name](model) for _, name in self.table}
+
+    def predict(self, X):
+        n = len(X)
+        for max_rows, name in self.table:
+            if n <= max_rows:
+                return self._backends[name].predict(X)
+        return self._backends[self.table[-1][1]].predict(X)
+
+
+def read_auto_table(version_dir):
+    """The ``(max_rows, name)`` table bench_backends.py saved for a model, or None."""
+    path = Path(version_dir) / AUTO_TABLE_FILE
+    if not path.exists():
+        return None
+    table = json.loads(path.read_text())["table"]
+    return [(float("inf") if max_rows is None else max_rows, name) for max_rows, name in table]
+
+
+def _compact_backend(model, version_dir=None):
+    """The artifact's pruned/quantized model.compact (see compress.py)."""
+    if version_dir is None:
+        raise ValueError("the compact backend reads model.compact from an artifact directory")
+    from compress import open_compact              # compress imports this module
+    return open_compact(version_dir)
+
+
+BACKENDS = {
+    "sklearn": SklearnBackend,
+    "inplace": InplaceBackend,
+    "flat":    FlatTreeBackend,
+    "auto":    AutoBackend,
+    "compact": _compact_backend,
+}
+
+
+class TransformedBackend:
+    """Runs the model's feature transform, then the wrapped backend."""
+
+    def __init__(self, backend, transform):
+        self.backend   = backend
+        self.transform = transform
+        self.name      = backend.name
+
+    def predict(self, X):
+        return self.backend.predict(self.transform.transform(X))
+
+
+def _with_transform(backend, model):
+    transform = transforms.for_model(model)
+    return backend if transform is None else TransformedBackend(backend, transform)
+
+
+def make_backend(name, model, **kwargs):
+    try:
+        cls = BACKENDS[name]
+    except KeyError:
+        raise ValueError(f"unknown backend {name!r}; expected one of {sorted(BACKENDS)}") from None
+    return _with_transform(cls(model, **kwargs), model)
+
+
+def load_backend(name, model, version_dir=None):
+    """Build a backend for a loaded artifact; ``auto`` picks up its saved table."""
+    if name == "auto":
+        table = read_auto_table(version_dir) if version_dir is not None else None
+        return _with_transform(AutoBackend(model, table), model)
+    if name == "compact":
+        return make_backend(name, model, version_dir=version_dir)
+    return make_backend(name, model)
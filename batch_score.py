@@ -0,0 +1,179 @@
+import argparse
+import json
+import resource
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+import backends
+import drift
+import model_store
+import pricing
+import schema
+from explain import METHODS as EXPLAIN_METHODS, Explainer, to_columns
+from prediction_cache import PredictionCache
+
+# ── Batch Scoring ─────────────────────────────────────────────────────────────
+#   python batch_score.py blocks.parquet scored.parquet --chunk-size 200000
+#
+# Input is read in bounded-memory chunks (pandas chunked CSV reader or pyarrow
+# Parquet record batches), each chunk is scored with one vectorized predict
+# call and appended to the output, so memory stays flat regardless of file size.
+# Features are copied once into a float32 matrix and checked against the schema
+# bounds in the same pass: out-of-range values are clamped (--out-of-range clip,
+# the default) or their rows dropped from the output (reject).
+# --drift-report writes PSI / KS of the whole file against the model's training
+# reference (see drift.py), updated chunk by chunk.
+DEFAULT_CHUNK = 100_000
+
+
+def read_chunks(path, chunk_size=DEFAULT_CHUNK):
+    path = Path(path)
+    if path.suffix == ".parquet":
+        import pyarrow.parquet as pq
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, chunksize=chunk_size)
+
+
+class ChunkWriter:
+    def __init__(self, path):
+        self.path = Path(path)
+        self._fh = None
+        self._pq_writer = None
+
+    def write(self, frame):
+        if self.path.suffix == ".parquet":
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+            table = pa.Table.from_pandas(frame, preserve_index=False)
+            if self._pq_writer is None:
+                self._pq_writer = pq.ParquetWriter(self.path, table.schema)
+            self._pq_writer.write_table(table)
+        else:
+            header = self._fh is None
+            if header:
+                self._fh = open(self.path, "w", newline="")
+            frame.to_csv(self._fh, header=header, index=False)
+
+    def close(self):
+        if self._pq_writer is not None:
+            self._pq_writer.close()
+        if self._fh is not None:
+            self._fh.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def score_frame(model, frame, tier_edges=pricing.TIER_EDGES, explainer=None,
+                out_of_range="clip", monitor=None):
+    X, ok = schema.validate(schema.from_frame(frame), out_of_range)
+    if out_of_range == "reject" and not ok.all():
+        frame, X = frame[ok], X[ok]
+    predicted = model.predict(X)                       # value in $100K units
+    if monitor is not None:
+        monitor.update(X, predicted)
+    price_usd = predicted.astype(np.float64) * 100_000
+    out = frame.copy()
+    out["predicted"] = predicted
+    out["price_usd"] = price_usd
+    out["tier"]      = pricing.TIERS[pricing.tier_codes(price_usd, tier_edges)]
+    if explainer is not None:                          # one TreeSHAP call per chunk
+        contribs = explainer.contributions(X)
+        for name, column in to_columns(contribs, explainer.feature_names).items():
+            out[name] = column
+    return out
+
+
+def peak_rss_mb():
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS reports bytes
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+
+def score_file(src, dst, model, chunk_size=DEFAULT_CHUNK, tier_edges=pricing.TIER_EDGES,
+               log=print, explainer=None, out_of_range="clip", monitor=None):
+    rows = rejected = 0
+    start = time.perf_counter()
+    with ChunkWriter(dst) as writer:
+        for chunk in read_chunks(src, chunk_size):
+            scored = score_frame(model, chunk, tier_edges, explainer, out_of_range, monitor)
+            writer.write(scored)
+            rows     += len(chunk)
+            rejected += len(chunk) - len(scored)
+            elapsed = time.perf_counter() - start
+            log(f"  {rows:>12,} rows  {rows / elapsed:>12,.0f} rows/s  "
+                f"peak RSS {peak_rss_mb():,.0f} MB")
+    elapsed = time.perf_counter() - start
+    return {"rows": rows, "rejected": rejected, "seconds": elapsed,
+            "rows_per_sec": rows / elapsed if elapsed else 0.0,
+            "peak_rss_mb": peak_rss_mb()}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Score a CSV/Parquet file of census blocks with the saved model.")
+    parser.add_argument("input",  help="input .csv or .parquet with the 8 feature columns")
+    parser.add_argument("output", help="output .csv or .parquet")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK,
+                        help="rows per chunk (default: %(default)s)")
+    parser.add_argument("--tier-edges", type=float, nargs=2, default=pricing.TIER_EDGES,
+                        metavar=("MID", "HIGH"),
+                        help="lower price bounds in $ of the mid and high tiers "
+                             "(default: %(default)s)")
+    parser.add_argument("--backend", choices=sorted(backends.BACKENDS), default="auto",
+                        help="inference backend (default: %(default)s)")
+    parser.add_argument("--cache-size", type=int, default=0,
+                        help="LRU prediction cache entries; repeated blocks are predicted "
+                             "once (default: off)")
+    parser.add_argument("--explain", nargs="?", const="exact", choices=EXPLAIN_METHODS,
+                        help="add contrib_<feature> / contrib_bias columns; 'approx' is "
+                             "much faster than exact TreeSHAP on large files")
+    parser.add_argument("--out-of-range", choices=schema.POLICIES, default="clip",
+                        help="rows outside the feature bounds: clamp to the bounds (clip) "
+                             "or leave them out of the output (reject) (default: %(default)s)")
+    parser.add_argument("--drift-report", default=None, metavar="JSON",
+                        help="write input/prediction drift vs the training reference here")
+    parser.add_argument("--model-dir", default=str(model_store.ARTIFACT_ROOT))
+    parser.add_argument("--model-version", default=None,
+                        help="artifact version to use (default: LATEST)")
+    args = parser.parse_args(argv)
+
+    model, meta = model_store.load_model(args.model_version, args.model_dir)
+    print(f"model {meta['version']}  backend {args.backend}  chunk size {args.chunk_size:,}")
+    predictor = backends.load_backend(args.backend, model, Path(args.model_dir) / meta["version"])
+    if args.cache_size:
+        predictor = PredictionCache(predictor, meta["version"], args.cache_size)
+    explainer = Explainer(model, args.explain) if args.explain else None
+    monitor = None
+    if args.drift_report:
+        monitor = drift.DriftMonitor.load(Path(args.model_dir) / meta["version"], float("inf"))
+        if monitor is None:
+            raise FileNotFoundError(f"no drift reference for {meta['version']} — "
+                                    f"run `drift.py build`")
+    stats = score_file(args.input, args.output, predictor, args.chunk_size, args.tier_edges,
+                       explainer=explainer, out_of_range=args.out_of_range, monitor=monitor)
+    if args.cache_size:
+        stats["cache"] = predictor.stats()
+        print("cache  " + "  ".join(f"{k}={v}" for k, v in stats["cache"].items()))
+    if stats["rejected"]:
+        print(f"rejected {stats['rejected']:,} out-of-range rows")
+    if monitor is not None:
+        stats["drift"] = monitor.report()
+        Path(args.drift_report).write_text(json.dumps(stats["drift"], indent=2))
+        drift.print_report(stats["drift"])
+    print(f"scored {stats['rows']:,} rows in {stats['seconds']:.2f}s  "
+          f"({stats['rows_per_sec']:,.0f} rows/s, peak RSS {stats['peak_rss_mb']:,.0f} MB)")
+    return stats
+
+
+if __name__ == "__main__":
+    main()
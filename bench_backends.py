@@ -0,0 +1,105 @@
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+import backends
+import dataset
+import model_store
+
+# ── Backend Benchmark ─────────────────────────────────────────────────────────
+#   python bench_backends.py            # parity check + timing table
+#   python bench_backends.py --write    # also save the per-size winner table
+#
+# Parity: every backend must match XGBRegressor.predict within --tol on the
+# same rows (with some missing values) or the script exits non-zero. A failing
+# backend never wins a batch size, and --write refuses to save a table then.
+BATCH_SIZES = (1, 8, 64, 512, 4096, 65536)
+CANDIDATES  = ("sklearn", "inplace", "flat")
+
+
+def time_call(fn, X, min_seconds=0.2, max_reps=2000):
+    fn(X)                                           # warm-up
+    times = []
+    deadline = time.perf_counter() + min_seconds
+    while len(times) < 3 or (time.perf_counter() < deadline and len(times) < max_reps):
+        start = time.perf_counter()
+        fn(X)
+        times.append(time.perf_counter() - start)
+    return float(np.median(times))
+
+
+def check_parity(impls, X, tol):
+    """Max |Δ| of every backend vs sklearn, and the names whose max |Δ| exceeds ``tol``."""
+    reference = impls["sklearn"].predict(X)
+    worst = {}
+    for name, impl in impls.items():
+        worst[name] = float(np.max(np.abs(impl.predict(X).astype(np.float64) - reference)))
+    return worst, [name for name, err in worst.items() if not err <= tol]
+
+
+def fastest(timings, exclude=()):
+    return min((name for name in timings if name not in exclude), key=timings.get)
+
+
+def winner_table(results, sizes, exclude=()):
+    """Collapse per-size winners into ``(max_rows, name)`` ranges, skipping ``exclude``."""
+    table = []
+    for i, size in enumerate(sizes):
+        best = fastest(results[size], exclude)
+        upper = None if i == len(sizes) - 1 else (size + sizes[i + 1]) // 2
+        if table and table[-1][1] == best:
+            table[-1] = (upper, best)
+        else:
+            table.append((upper, best))
+    return table
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check parity and time the inference backends.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(BATCH_SIZES))
+    parser.add_argument("--tol", type=float, default=1e-6)
+    parser.add_argument("--write", action="store_true",
+                        help=f"save the winner table as {backends.AUTO_TABLE_FILE} in the artifact")
+    parser.add_argument("--model-dir", default=str(model_store.ARTIFACT_ROOT))
+    parser.add_argument("--model-version", default=None)
+    args = parser.parse_args(argv)
+
+    model, meta = model_store.load_model(args.model_version, args.model_dir)
+    impls = {name: backends.make_backend(name, model) for name in CANDIDATES}
+    X, _ = dataset.synthetic_housing(max(max(args.sizes), 10_000), seed=7)
+
+    parity_rows = X[:10_000].copy()
+    parity_rows[::37, 2] = np.nan
+    worst, failed = check_parity(impls, parity_rows, args.tol)
+    print("parity vs sklearn  " + "  ".join(f"{k}={v:.2e}" for k, v in worst.items()))
+
+    results = {}
+    print(f"\n{'rows':>8}" + "".join(f"{name + ' µs':>14}" for name in CANDIDATES) + "   fastest")
+    for size in args.sizes:
+        batch = np.ascontiguousarray(X[:size])
+        results[size] = {name: time_call(impl.predict, batch) for name, impl in impls.items()}
+        print(f"{size:>8}" + "".join(f"{results[size][n] * 1e6:>14,.1f}" for n in CANDIDATES)
+              + f"   {fastest(results[size], failed)}")
+
+    table = winner_table(results, args.sizes, exclude=failed)
+    print("\nauto table  " + "  ".join(
+        f"≤{'∞' if upper is None else upper}:{name}" for upper, name in table))
+    if args.write and failed:
+        print(f"not writing {backends.AUTO_TABLE_FILE}: parity failed", file=sys.stderr)
+    elif args.write:
+        path = Path(args.model_dir) / meta["version"] / backends.AUTO_TABLE_FILE
+        path.write_text(json.dumps({"model_version": meta["version"], "table": table,
+                                    "seconds_per_call": results}, indent=2))
+        print(f"wrote {path}")
+
+    if failed:
+        print(f"\nPARITY FAILED for {', '.join(failed)} (tol {args.tol:g})", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,217 @@
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+from xgboost import XGBRegressor, __version__ as xgb_version
+
+import dataset
+import model_store
+from explain import METHODS as EXPLAIN_METHODS, Explainer
+
+# ── Benchmark Suite ───────────────────────────────────────────────────────────
+#   python bench_suite.py                              # quick preset
+#   python bench_suite.py --preset full                # 1M-row fit, 1M-row predict
+#   python bench_suite.py --data-path big/ --fit-rows 10000000
+#   python bench_suite.py --save-baseline              # record the current numbers
+#
+# Cases (each result is seconds, lower is better):
+#   fit/<tree_method>/nthread=<t>/rows=<n>   one XGBRegressor.fit
+#   load/<format>                            model_store.load_model of a saved artifact
+#   predict/nthread=<t>/batch=<n>            XGBRegressor.predict on n rows
+#   explain/<method>/nthread=<t>/batch=<n>   pred_contribs on n rows (overhead vs
+#                                            predict is printed alongside)
+#
+# Results go to benchmarks/results/<timestamp>.json. With a baseline present,
+# every case slower than baseline × (1 + --threshold) is flagged and the script
+# exits non-zero, so it can gate an XGBoost upgrade or a parameter change.
+BENCH_DIR = Path(__file__).resolve().parent / "benchmarks"
+BASELINE  = BENCH_DIR / "baseline.json"
+
+PRESETS = {
+    "quick": {"fit_rows": [20_640], "tree_methods": ["hist", "approx", "exact"],
+              "batches": [1, 64, 4096, 100_000], "explain_batches": [1, 64, 1024],
+              "n_estimators": 100},
+    "full":  {"fit_rows": [20_640, 1_000_000], "tree_methods": ["hist", "approx", "exact"],
+              "batches": [1, 64, 4096, 1_000_000], "explain_batches": [1, 64, 4096],
+              "n_estimators": 100},
+}
+
+
+def measure(fn, repeat=5, min_seconds=0.0):
+    """Median wall time of ``fn()`` over ``repeat`` runs (more if under ``min_seconds``)."""
+    times = []
+    start = time.perf_counter()
+    while len(times) < repeat or time.perf_counter() - start < min_seconds:
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    return float(np.median(times))
+
+
+def thread_counts(requested):
+    cores = os.cpu_count() or 1
+    if requested:
+        return requested
+    counts = [1]
+    while counts[-1] * 2 <= cores:
+        counts.append(counts[-1] * 2)
+    if counts[-1] != cores:
+        counts.append(cores)
+    return counts
+
+
+def load_rows(n_rows, data_path):
+    if data_path:
+        X, y = dataset.read_cache(data_path, verify=False)
+        if len(X) < n_rows:
+            raise ValueError(f"{data_path} has {len(X):,} rows, {n_rows:,} requested")
+        return X[:n_rows], y[:n_rows]
+    return dataset.synthetic_housing(n_rows, seed=0)
+
+
+def bench_fit(cfg, threads, data_path, repeat, log):
+    results = {}
+    for n_rows in cfg["fit_rows"]:
+        X, y = load_rows(n_rows, data_path)
+        for method in cfg["tree_methods"]:
+            for t in threads:
+                key = f"fit/{method}/nthread={t}/rows={n_rows}"
+                model = XGBRegressor(n_estimators=cfg["n_estimators"], tree_method=method,
+                                     n_jobs=t, random_state=42, verbosity=0)
+                results[key] = measure(lambda: model.fit(X, y), repeat)
+                log(f"  {key:<44}{results[key]:>12.4f}s")
+    return results
+
+
+def bench_load(model, repeat, log):
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for fmt in ("ubj", "json"):
+            root = Path(tmp) / fmt
+            model_store.save_model(model, {}, root, fmt)
+            key = f"load/{fmt}"
+            results[key] = measure(lambda: model_store.load_model(root=root), repeat)
+            log(f"  {key:<44}{results[key]:>12.4f}s")
+    return results
+
+
+def bench_predict(model, cfg, threads, data_path, log):
+    results = {}
+    X, _ = load_rows(max(cfg["batches"]), data_path)
+    X = np.ascontiguousarray(X)
+    for t in threads:
+        model.set_params(n_jobs=t)
+        for batch in cfg["batches"]:
+            rows = X[:batch]
+            key = f"predict/nthread={t}/batch={batch}"
+            results[key] = measure(lambda: model.predict(rows), repeat=5, min_seconds=0.2)
+            log(f"  {key:<44}{results[key] * 1e3:>12.3f}ms")
+    return results
+
+
+def bench_explain(model, cfg, threads, data_path, log):
+    results = {}
+    X, _ = load_rows(max(cfg["explain_batches"]), data_path)
+    X = np.ascontiguousarray(X)
+    for method in EXPLAIN_METHODS:
+        explainer = Explainer(model, method)
+        for t in threads:
+            explainer.booster.set_param("nthread", t)
+            for batch in cfg["explain_batches"]:
+                rows = X[:batch]
+                key = f"explain/{method}/nthread={t}/batch={batch}"
+                results[key] = measure(lambda: explainer.contributions(rows), repeat=3,
+                                       min_seconds=0.2)
+                model.set_params(n_jobs=t)
+                plain = measure(lambda: model.predict(rows), repeat=5, min_seconds=0.2)
+                log(f"  {key:<44}{results[key] * 1e3:>12.3f}ms  "
+                    f"({results[key] / plain:,.0f}× predict)")
+    return results
+
+
+def compare(results, baseline, threshold):
+    """Cases slower than the baseline by more than ``threshold`` (a fraction)."""
+    regressions = []
+    for key, seconds in results.items():
+        base = baseline.get(key)
+        if base and seconds > base * (1 + threshold):
+            regressions.append((key, base, seconds, seconds / base - 1))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark fit, load and predict.")
+    parser.add_argument("--preset", choices=sorted(PRESETS), default="quick")
+    parser.add_argument("--fit-rows", type=int, nargs="+", help="override preset fit sizes")
+    parser.add_argument("--batches", type=int, nargs="+", help="override preset predict sizes")
+    parser.add_argument("--tree-methods", nargs="+", choices=("hist", "approx", "exact"))
+    parser.add_argument("--threads", type=int, nargs="+",
+                        help="nthread values (default: 1, 2, 4 … cores)")
+    parser.add_argument("--repeat", type=int, default=3, help="fit/load repetitions")
+    parser.add_argument("--data-path", default=None,
+                        help="dataset cache to draw rows from, e.g. one built with "
+                             "`dataset.py build --from synthetic --rows 50000000` "
+                             "(default: in-memory synthetic rows)")
+    parser.add_argument("--baseline", default=str(BASELINE))
+    parser.add_argument("--threshold", type=float, default=0.10,
+                        help="flag cases slower than baseline by this fraction (default: 0.10)")
+    parser.add_argument("--save-baseline", action="store_true",
+                        help="write these results as the new baseline")
+    args = parser.parse_args(argv)
+
+    cfg = dict(PRESETS[args.preset])
+    cfg.update({k: v for k, v in (("fit_rows", args.fit_rows), ("batches", args.batches),
+                                  ("tree_methods", args.tree_methods)) if v})
+    threads = thread_counts(args.threads)
+    log = print
+
+    log(f"xgboost {xgb_version} · {os.cpu_count()} cores · threads {threads}")
+    results = bench_fit(cfg, threads, args.data_path, args.repeat, log)
+
+    X, y = load_rows(20_640, args.data_path)
+    model = XGBRegressor(n_estimators=cfg["n_estimators"], random_state=42, verbosity=0).fit(X, y)
+    results.update(bench_load(model, args.repeat, log))
+    results.update(bench_predict(model, cfg, threads, args.data_path, log))
+    results.update(bench_explain(model, cfg, threads, args.data_path, log))
+
+    report = {
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "environment": {"xgboost": xgb_version, "numpy": np.__version__,
+                        "python": platform.python_version(), "platform": platform.platform(),
+                        "cpu_count": os.cpu_count()},
+        "config": {**cfg, "threads": threads, "data_path": args.data_path},
+        "results": results,
+    }
+    out = BENCH_DIR / "results" / f"{time.strftime('%Y%m%dT%H%M%S')}.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(report, indent=2))
+    log(f"\nwrote {out}")
+
+    baseline_path = Path(args.baseline)
+    if args.save_baseline:
+        baseline_path.write_text(json.dumps(report, indent=2))
+        log(f"saved baseline {baseline_path}")
+        return report
+    if not baseline_path.exists():
+        log("no baseline to compare against (run with --save-baseline)")
+        return report
+
+    regressions = compare(results, json.loads(baseline_path.read_text())["results"],
+                          args.threshold)
+    if regressions:
+        log(f"\n{len(regressions)} regression(s) above {args.threshold:.0%}:")
+        for key, base, now, delta in regressions:
+            log(f"  {key:<44}{base:>10.4f}s → {now:.4f}s  (+{delta:.0%})")
+        sys.exit(1)
+    log(f"no regressions above {args.threshold:.0%}")
+    return report
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,342 @@
+import argparse
+import hashlib
+import json
+import time
+from pathlib import Path
+
+import numpy as np
+
+import backends
+import dataset
+import evaluate
+import model_store
+import transforms
+from backends import (_IDENTITY_OBJECTIVES, FlatTreeBackend, TransformedBackend,
+                      _parse_base_score, _tree_depth)
+
+# ── Model Compression ─────────────────────────────────────────────────────────
+#   python compress.py --tree-tol 1e-3 --leaf-tol 1e-3 --leaf-dtype int16
+#   predictor = load_compact(artifacts / version)     # mmap, no xgboost import
+#
+# Export stage for an artifact's booster, written next to it as model.compact:
+#   prune trees   a tree whose leaves all lie within tree_tol of their
+#                 hessian-weighted mean is dropped; the mean moves to base_score
+#   prune leaves  sibling leaves within leaf_tol of each other are merged into
+#                 their parent (hessian-weighted), bottom-up
+#   quantize      split thresholds become indices into per-feature tables of
+#                 the distinct thresholds (lossless); leaf values are stored as
+#                 float32, float16 or int16 × one scale
+# Nodes are laid out in pre-order, so a left child is always the next node and
+# only the right child's offset is stored (0 marks a leaf). The file is a JSON
+# header followed by 64-byte-aligned arrays; its sha256 goes in compact.json.
+# load_compact checks the sha256, memory-maps the file, rebuilds the flat
+# evaluator's node arrays with a few vector ops, and never imports xgboost.
+# It is also the ``compact`` backend (--backend compact in serve.py and
+# batch_score.py). Tolerances are in model units ($100K); 0 prunes nothing.
+COMPACT_FILE = "model.compact"
+COMPACT_META = "compact.json"
+MAGIC        = b"HPCTREE1"
+ALIGN        = 64
+LEAF_DTYPES  = ("float32", "float16", "int16")
+
+
+def read_trees(booster):
+    """``(base_score, trees)`` of a single-output booster; each tree is a dict of arrays."""
+    learner = json.loads(booster.save_raw("json"))["learner"]
+    objective = learner["objective"]["name"]
+    if objective not in _IDENTITY_OBJECTIVES:
+        raise ValueError(f"compression supports identity-link objectives only, got {objective!r}")
+    if int(learner["learner_model_param"].get("num_target", 1)) != 1:
+        raise ValueError("compression supports single-output boosters only")
+    trees = [{"left":         np.asarray(t["left_children"], dtype=np.int64),
+              "right":        np.asarray(t["right_children"], dtype=np.int64),
+              "feature":      np.asarray(t["split_indices"], dtype=np.int64),
+              "threshold":    np.asarray(t["split_conditions"], dtype=np.float32),
+              "default_left": np.asarray(t["default_left"], dtype=bool),
+              "hess":         np.asarray(t["sum_hessian"], dtype=np.float64)}
+             for t in learner["gradient_booster"]["model"]["trees"]]
+    return _parse_base_score(learner["learner_model_param"]["base_score"]), trees
+
+
+def prune_leaves(tree, leaf_tol):
+    """Pre-order node lists of ``tree`` after merging near-equal sibling leaves."""
+    left, right, hess = tree["left"], tree["right"], tree["hess"].copy()
+    value = tree["threshold"].astype(np.float64)      # leaf value on leaf nodes
+    leaf  = left == -1
+    if leaf_tol > 0:
+        order, stack = [], [0]
+        while stack:                                  # reversed pre-order = children first
+            n = stack.pop()
+            order.append(n)
+            if not leaf[n]:
+                stack += [left[n], right[n]]
+        for n in reversed(order):
+            a, b = left[n], right[n]
+            if leaf[n] or not (leaf[a] and leaf[b]) or abs(value[a] - value[b]) > leaf_tol:
+                continue
+            h = hess[a] + hess[b]
+            value[n] = (hess[a] * value[a] + hess[b] * value[b]) / h if h > 0 else (value[a] + value[b]) / 2
+            hess[n], leaf[n] = h, True
+
+    nodes, offsets = [], []
+    def emit(n):
+        i = len(nodes)
+        nodes.append(n)
+        offsets.append(0)
+        if not leaf[n]:
+            emit(left[n])
+            offsets[i] = len(nodes) - i
+            emit(right[n])
+    emit(0)
+    nodes = np.asarray(nodes)
+    return {"feature": np.where(leaf[nodes], 0, tree["feature"][nodes]),
+            "threshold": tree["threshold"][nodes], "value": value[nodes],
+            "default_left": tree["default_left"][nodes], "right": np.asarray(offsets),
+            "leaf": leaf[nodes], "hess": hess[nodes]}
+
+
+def compress(booster, tree_tol=0.0, leaf_tol=0.0, leaf_dtype="float32"):
+    """Pruned, quantized node arrays of ``booster`` plus a header for ``write_compact``."""
+    if leaf_dtype not in LEAF_DTYPES:
+        raise ValueError(f"unknown leaf dtype {leaf_dtype!r}; expected one of {LEAF_DTYPES}")
+    base_score, trees = read_trees(booster)
+    n_nodes = sum(len(t["left"]) for t in trees)
+    kept, base = [], float(base_score)
+    for tree in trees:
+        tree = prune_leaves(tree, leaf_tol)
+        v, h = tree["value"][tree["leaf"]], tree["hess"][tree["leaf"]]
+        mean = float(np.average(v, weights=h)) if h.sum() > 0 else float(v.mean())
+        if np.abs(v - mean).max() <= tree_tol:
+            base += mean                              # the whole tree ≈ a constant
+        else:
+            kept.append(tree)
+    if not kept:
+        raise ValueError("every tree was pruned; lower --tree-tol")
+    nodes = {key: np.concatenate([t[key] for t in kept]) for key in kept[0]}
+    leaf, feature = nodes["leaf"], nodes["feature"]
+
+    # thresholds → per-feature tables of distinct values + an index per split
+    n_features = int(booster.num_features())
+    splits = ~leaf
+    tables = [np.unique(nodes["threshold"][splits & (feature == f)]) for f in range(n_features)]
+    table_offsets = np.cumsum([0] + [len(t) for t in tables])
+    split = np.zeros(len(leaf), dtype=np.int64)
+    for f, table in enumerate(tables):
+        at = splits & (feature == f)
+        split[at] = np.searchsorted(table, nodes["threshold"][at])
+
+    values = np.where(leaf, nodes["value"], 0.0)
+    scale = 1.0
+    if leaf_dtype == "int16":
+        scale  = float(np.abs(values).max()) / 32767 or 1.0
+        values = np.rint(values / scale)
+    index_dtype = lambda top: np.uint16 if top < 2**16 else np.uint32
+    arrays = {
+        "feature":       feature.astype(np.uint8 if n_features < 256 else np.uint16),
+        "default_left":  nodes["default_left"].astype(np.uint8),
+        "split":         split.astype(index_dtype(max(len(t) for t in tables))),
+        "right":         nodes["right"].astype(index_dtype(nodes["right"].max() + 1)),
+        "value":         values.astype(leaf_dtype),
+        "roots":         np.cumsum([0] + [len(t["leaf"]) for t in kept[:-1]]).astype(np.uint32),
+        "thresholds":    np.concatenate(tables).astype(np.float32),
+        "table_offsets": table_offsets.astype(np.uint32),
+    }
+    transform = transforms.for_model(booster)
+    header = {"format": 1, "base_score": base, "leaf_dtype": leaf_dtype, "leaf_scale": scale,
+              "n_features": n_features, "feature_names": booster.feature_names,
+              "transform": transform.to_dict() if transform is not None else None,
+              "max_depth": max(_tree_depth(*_children(t)) for t in kept),
+              "trees": [len(trees), len(kept)], "nodes": [n_nodes, int(len(leaf))],
+              "tree_tol": tree_tol, "leaf_tol": leaf_tol}
+    return header, arrays
+
+
+def _children(tree):
+    n = np.arange(len(tree["leaf"]))
+    return (np.where(tree["leaf"], -1, n + 1), np.where(tree["leaf"], -1, n + tree["right"]))
+
+
+# ── File Format ───────────────────────────────────────────────────────────────
+def _sha256(path):
+    return hashlib.sha256(Path(path).read_bytes()).hexdigest()
+
+
+def _align(n):
+    return -(-n // ALIGN) * ALIGN
+
+
+def write_compact(path, header, arrays):
+    """MAGIC, header length (uint64), JSON header, then the aligned arrays."""
+    layout, offset = {}, 0
+    for name, array in arrays.items():
+        layout[name] = [array.dtype.str, list(array.shape), offset]
+        offset = _align(offset + array.nbytes)
+    text = json.dumps({**header, "arrays": layout}).encode()
+    start = _align(len(MAGIC) + 8 + len(text))
+    path = Path(path)
+    tmp = path.with_name(f".{path.name}.tmp")
+    with open(tmp, "wb") as fh:
+        fh.write(MAGIC + np.uint64(len(text)).tobytes() + text)
+        for name, array in arrays.items():
+            fh.seek(start + layout[name][2])
+            fh.write(np.ascontiguousarray(array).tobytes())
+        fh.truncate(start + offset)
+    tmp.replace(path)
+    return path
+
+
+def read_compact(path):
+    """``(header, arrays)`` with every array a read-only view into one memory map."""
+    data = np.memmap(path, dtype=np.uint8, mode="r")
+    if bytes(data[:len(MAGIC)]) != MAGIC:
+        raise ValueError(f"{path} is not a compact model file")
+    size = int(data[len(MAGIC):len(MAGIC) + 8].view(np.uint64)[0])
+    header = json.loads(bytes(data[len(MAGIC) + 8:len(MAGIC) + 8 + size]))
+    start = _align(len(MAGIC) + 8 + size)
+    arrays = {}
+    for name, (dtype, shape, offset) in header.pop("arrays").items():
+        dtype = np.dtype(dtype)
+        count = int(np.prod(shape))
+        arrays[name] = data[start + offset:start + offset + count * dtype.itemsize] \
+            .view(dtype).reshape(shape)
+    return header, arrays
+
+
+class CompactBackend(FlatTreeBackend):
+    """The flat NumPy evaluator over a compact file's node arrays."""
+
+    name = "compact"
+
+    def __init__(self, header, arrays):
+        right, feature = arrays["right"].astype(np.int32), arrays["feature"].astype(np.int32)
+        leaf = right == 0
+        ids  = np.arange(len(right), dtype=np.int32)
+        table_index = np.minimum(arrays["table_offsets"][feature] + arrays["split"],
+                                 max(len(arrays["thresholds"]) - 1, 0))
+        leaf_values = arrays["value"].astype(np.float32) * np.float32(header["leaf_scale"])
+        self.feature      = np.where(leaf, 0, feature)
+        self.threshold    = np.where(leaf, leaf_values, arrays["thresholds"][table_index])
+        self.left         = np.where(leaf, ids, ids + 1)
+        self.right        = np.where(leaf, ids, ids + right)
+        self.default_left = arrays["default_left"].astype(bool)
+        self.roots        = arrays["roots"].astype(np.int32)
+        self.max_depth    = header["max_depth"]
+        self.base_score   = header["base_score"]
+        self.header       = header
+
+
+def write_sidecar(version_dir, data):
+    tmp = Path(version_dir) / f".{COMPACT_META}.tmp"
+    tmp.write_text(json.dumps(data, indent=2))
+    tmp.replace(Path(version_dir) / COMPACT_META)
+
+
+def open_compact(path):
+    """The CompactBackend of ``model.compact`` (or a version directory holding one).
+
+    The file is checked against the sha256 in compact.json before it is mapped.
+    """
+    path = Path(path)
+    path = path / COMPACT_FILE if path.is_dir() else path
+    sidecar = path.with_name(COMPACT_META)
+    if not sidecar.exists():
+        raise FileNotFoundError(f"no compact model in {path.parent} — run `compress.py`")
+    expected = json.loads(sidecar.read_text())["sha256"]
+    digest = _sha256(path)
+    if digest != expected:
+        raise ValueError(f"compact model {path} is corrupt: "
+                         f"sha256 {digest[:12]}… != {expected[:12]}…")
+    return CompactBackend(*read_compact(path))
+
+
+def load_compact(path):
+    """``open_compact`` plus the feature transform saved in its header."""
+    backend = open_compact(path)
+    if backend.header["transform"] is None:
+        return backend
+    return TransformedBackend(backend,
+                              transforms.FeatureTransform.from_dict(backend.header["transform"]))
+
+
+# ── Report ────────────────────────────────────────────────────────────────────
+def _best_of(fn, repeat=5):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - start)
+    return min(times), result
+
+
+def compare(version_dir, meta, compact_path, x_test, y_test, sizes=(1, 256, 10_000)):
+    """Size, load time, predict latency and test accuracy: original booster vs compact file."""
+    version_dir = Path(version_dir)
+    model_path = version_dir / meta["model_file"]
+    load_original = lambda: backends.make_backend(
+        "inplace", model_store.load_model(meta["version"], version_dir.parent)[0])
+    original_s, original = _best_of(load_original)
+    compact_s, compact   = _best_of(lambda: load_compact(compact_path))
+    report = {"bytes": [model_path.stat().st_size, Path(compact_path).stat().st_size],
+              "load_ms": [original_s * 1000, compact_s * 1000], "predict_ms": {}}
+    for n in sizes:
+        X = np.resize(np.asarray(x_test, dtype=np.float32), (n, x_test.shape[1]))
+        report["predict_ms"][n] = [_best_of(lambda: p.predict(X))[0] * 1000
+                                   for p in (original, compact)]
+    before, after = original.predict(x_test), compact.predict(x_test)
+    scores = [evaluate.evaluate({"test": (y_test, pred)}, ("rmse", "r2")) for pred in (before, after)]
+    report.update(test_rmse=[s["test_rmse"] for s in scores], test_r2=[s["test_r2"] for s in scores],
+                  max_abs_diff=float(np.abs(before - after).max()),
+                  mean_abs_diff=float(np.abs(before - after).mean()))
+    return report
+
+
+def print_report(header, report):
+    (t0, t1), (n0, n1) = header["trees"], header["nodes"]
+    (b0, b1), (l0, l1) = report["bytes"], report["load_ms"]
+    print(f"trees {t0:,} → {t1:,}   nodes {n0:,} → {n1:,}   leaves {header['leaf_dtype']}")
+    print(f"size  {b0 / 1024:,.1f} KB → {b1 / 1024:,.1f} KB  ({1 - b1 / b0:.0%} smaller)")
+    print(f"load  {l0:.2f} ms → {l1:.2f} ms  (both sha256-checked; booster + inplace vs mmap + flat evaluator)")
+    for n, (p0, p1) in report["predict_ms"].items():
+        print(f"predict {n:>7,} rows  {p0:8.2f} ms → {p1:8.2f} ms")
+    (r0, r1), (q0, q1) = report["test_rmse"], report["test_r2"]
+    print(f"test RMSE {r0:.5f} → {r1:.5f}   R² {q0:.5f} → {q1:.5f}   "
+          f"|Δ prediction| max {report['max_abs_diff']:.2e} mean {report['mean_abs_diff']:.2e}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export a pruned, quantized compact model.")
+    parser.add_argument("--tree-tol", type=float, default=0.0,
+                        help="drop trees whose leaves all lie within this of their mean "
+                             "(model units, $100K; default: off)")
+    parser.add_argument("--leaf-tol", type=float, default=0.0,
+                        help="merge sibling leaves closer than this (default: off)")
+    parser.add_argument("--leaf-dtype", choices=LEAF_DTYPES, default="float32")
+    parser.add_argument("--data-source", choices=dataset.SOURCES, default=None,
+                        help="test split for the accuracy check (default: the one it was trained on)")
+    parser.add_argument("--data-path", default=str(dataset.DATA_DIR))
+    parser.add_argument("--model-dir", default=str(model_store.ARTIFACT_ROOT))
+    parser.add_argument("--model-version", default=None)
+    args = parser.parse_args(argv)
+
+    model, meta = model_store.load_model(args.model_version, args.model_dir)
+    version_dir = Path(args.model_dir) / meta["version"]
+    start = time.perf_counter()
+    header, arrays = compress(model.get_booster(), args.tree_tol, args.leaf_tol, args.leaf_dtype)
+    path = write_compact(version_dir / COMPACT_FILE, header, arrays)
+    digest = _sha256(path)
+    # compact.json last and atomically: a watcher serving --backend compact takes
+    # its presence to mean model.compact is complete
+    write_sidecar(version_dir, {**header, "sha256": digest})
+    print(f"wrote {path} in {time.perf_counter() - start:.2f}s")
+
+    source = args.data_source or meta["params"].get("data_source", dataset.DATA_SOURCE)
+    X, Y = dataset.load_housing(source, args.data_path)
+    _, x_test, _, y_test = dataset.split(X, Y, random_state=meta["params"].get("random_state", 42))
+    report = compare(version_dir, meta, path, x_test, y_test)
+    print_report(header, report)
+    write_sidecar(version_dir, {**header, **report, "sha256": digest})
+    return report
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,211 @@
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from multiprocessing import shared_memory
+from pathlib import Path
+
+import numpy as np
+from xgboost import XGBRegressor
+
+import dataset
+import evaluate
+import schema
+import spatial
+import transforms
+from tune import thread_budget
+
+# ── Cross-Validation ──────────────────────────────────────────────────────────
+#   python cv.py --folds 5 --scheme spatial --workers 4
+#   python train.py --cv-folds 5             # also records mean ± std in meta.json
+#
+# Rows are split into k folds either at random (kfold) or by lat/lon cell
+# (spatial): every block in a CELL_DEG × CELL_DEG cell lands in the same fold,
+# so a test block never has its next-door neighbours in training. Cells are
+# dealt largest first to the fold with the fewest rows, which keeps the folds
+# within a few percent of each other in size.
+# Each fold is fitted exactly like train.py (derived features fitted on the
+# fold's training rows). The feature matrix, target and fold ids are copied
+# once into shared memory. Pool workers attach to the blocks by name in their
+# initializer, so only a fold number crosses the process boundary per task.
+# Workers × threads per fit ≤ cores, as in tune.py. The serial baseline runs
+# the same folds one after another in this process on every core.
+SCHEMES  = ("kfold", "spatial")
+CELL_DEG = 0.5
+DEFAULT_METRICS = ("r2", "rmse", "mae", "mape")
+
+
+def fold_ids(X, k=5, scheme="spatial", cell_deg=CELL_DEG, seed=0):
+    """int8 fold number of every row."""
+    if scheme not in SCHEMES:
+        raise ValueError(f"unknown CV scheme {scheme!r}; expected one of {SCHEMES}")
+    rng = np.random.default_rng(seed)
+    if scheme == "kfold":
+        return (rng.permutation(len(X)) % k).astype(np.int8)
+    X = np.asarray(X)
+    cells = np.floor(X[:, [spatial.LAT, spatial.LON]] / cell_deg).astype(np.int64)
+    _, cell = np.unique(cells, axis=0, return_inverse=True)
+    cell  = cell.ravel()
+    sizes = np.bincount(cell)
+    if len(sizes) < k:
+        raise ValueError(f"only {len(sizes)} {cell_deg}° cells for {k} folds; use a smaller --cell-deg")
+    order = rng.permutation(len(sizes))
+    order = order[np.argsort(-sizes[order], kind="stable")]   # largest first, ties shuffled
+    load, assign = np.zeros(k, dtype=np.int64), np.empty(len(sizes), dtype=np.int8)
+    for c in order:
+        fold = int(np.argmin(load))
+        assign[c] = fold
+        load[fold] += sizes[c]
+    return assign[cell]
+
+
+# ── Shared Memory ─────────────────────────────────────────────────────────────
+class SharedArrays:
+    """NumPy arrays copied into named shared-memory blocks; ``spec`` lets a worker attach."""
+
+    def __init__(self, **arrays):
+        self._blocks, self.spec = [], {}
+        for name, array in arrays.items():
+            array = np.ascontiguousarray(array)
+            block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+            np.ndarray(array.shape, array.dtype, buffer=block.buf)[...] = array
+            self._blocks.append(block)
+            self.spec[name] = (block.name, array.shape, array.dtype.str)
+
+    @property
+    def nbytes(self):
+        return sum(block.size for block in self._blocks)
+
+    def close(self):
+        for block in self._blocks:
+            block.close()
+            block.unlink()
+        self._blocks = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# ── Worker ────────────────────────────────────────────────────────────────────
+_DATA   = {}
+_BLOCKS = []                                     # keeps the attached blocks mapped
+
+
+def _attach(spec):
+    for name, (block_name, shape, dtype) in spec.items():
+        block = shared_memory.SharedMemory(name=block_name)
+        _BLOCKS.append(block)
+        view = np.ndarray(shape, np.dtype(dtype), buffer=block.buf)
+        view.flags.writeable = False
+        _DATA[name] = view
+
+
+def run_fold(fold, n_estimators, random_state, derived, nthread, metrics):
+    start = time.perf_counter()
+    X, y, test = _DATA["X"], _DATA["y"], _DATA["folds"] == fold
+    x_train, y_train, x_test, y_test = X[~test], y[~test], X[test], y[test]
+    transform = transforms.FeatureTransform.fit(x_train) if derived else None
+    if transform is not None:
+        x_train, x_test = transform.transform(x_train), transform.transform(x_test)
+    model = XGBRegressor(n_estimators=n_estimators, random_state=random_state, n_jobs=nthread,
+                         verbosity=0)
+    model.fit(x_train, y_train)
+    scores = evaluate.evaluate({"train": (y_train, model.predict(x_train)),
+                                "test":  (y_test,  model.predict(x_test))}, metrics)
+    return {"fold": fold, "rows": int(test.sum()), "scores": scores,
+            "seconds": time.perf_counter() - start}
+
+
+def summarize(results):
+    """``{metric: {"mean": …, "std": …}}`` over the folds (population std)."""
+    names = [k for k, v in results[0]["scores"].items() if isinstance(v, float)]
+    return {name: {"mean": float(np.mean([r["scores"][name] for r in results])),
+                   "std":  float(np.std([r["scores"][name] for r in results]))}
+            for name in names}
+
+
+def cross_validate(X, y, folds=5, scheme="spatial", cell_deg=CELL_DEG, workers=None,
+                   n_estimators=100, random_state=42, derived=True, metrics=DEFAULT_METRICS,
+                   serial=True, seed=0, log=print):
+    ids = fold_ids(X, folds, scheme, cell_deg, seed)
+    workers, nthread = thread_budget(min(workers or os.cpu_count() or 1, folds))
+    fit_args = (n_estimators, random_state, derived)
+    X, y = schema.coerce(X), np.asarray(y, dtype=np.float64)
+    log(f"{folds}-fold {scheme} CV on {len(X):,} rows "
+        f"(fold sizes {np.bincount(ids, minlength=folds).tolist()}): "
+        f"{workers} workers × {nthread} threads")
+
+    with SharedArrays(X=X, y=y, folds=ids) as shared:
+        start = time.perf_counter()
+        with ProcessPoolExecutor(workers, initializer=_attach, initargs=(shared.spec,)) as pool:
+            results = list(pool.map(run_fold, range(folds), *map(repeat, fit_args),
+                                    repeat(nthread), repeat(metrics)))
+        parallel = time.perf_counter() - start
+        shared_mb = shared.nbytes / 2**20
+    for r in results:
+        log(f"  fold {r['fold']}  rows={r['rows']:>7,}  test_r2={r['scores']['test_r2']:.4f}  "
+            f"test_rmse={r['scores']['test_rmse']:.4f}  {r['seconds']:.2f}s")
+    report = {"folds": folds, "scheme": scheme, "cell_deg": cell_deg if scheme == "spatial" else None,
+              "rows": len(X), "workers": workers, "nthread": nthread,
+              "shared_mb": round(shared_mb, 2), "parallel_seconds": round(parallel, 3),
+              "fold_results": results, **summarize(results)}
+    if serial:
+        _DATA.update(X=X, y=y, folds=ids)
+        start = time.perf_counter()
+        for fold in range(folds):
+            run_fold(fold, *fit_args, os.cpu_count() or 1, metrics)
+        report["serial_seconds"] = round(time.perf_counter() - start, 3)
+        report["speedup"] = round(report["serial_seconds"] / parallel, 2)
+        _DATA.clear()
+    return report
+
+
+def print_report(report):
+    for name, stats in report.items():
+        if isinstance(stats, dict) and "mean" in stats:
+            print(f"  {name:<12} {stats['mean']:.4f} ± {stats['std']:.4f}")
+    line = f"parallel {report['parallel_seconds']:.2f}s on {report['workers']} workers"
+    if "serial_seconds" in report:
+        line += f", serial {report['serial_seconds']:.2f}s → speedup {report['speedup']:.2f}×"
+    print(f"{line}  (shared memory {report['shared_mb']:.1f} MB)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Cross-validate the house price model.")
+    parser.add_argument("--folds", type=int, default=5)
+    parser.add_argument("--scheme", choices=SCHEMES, default="spatial",
+                        help="random k-fold, or folds grouped by lat/lon cell (default: %(default)s)")
+    parser.add_argument("--cell-deg", type=float, default=CELL_DEG,
+                        help="spatial cell size in degrees (default: %(default)s)")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="worker processes (default: min(cores, folds))")
+    parser.add_argument("--n-estimators", type=int, default=100)
+    parser.add_argument("--random-state", type=int, default=42)
+    parser.add_argument("--seed", type=int, default=0, help="fold assignment seed")
+    parser.add_argument("--raw-features", action="store_true")
+    parser.add_argument("--metrics", nargs="+", default=list(DEFAULT_METRICS),
+                        choices=sorted(set(evaluate.METRICS) - {"tier_mae"}))
+    parser.add_argument("--no-serial", action="store_true",
+                        help="skip the serial baseline (no speedup figure)")
+    parser.add_argument("--json", default=None, help="also write the report to this file")
+    parser.add_argument("--data-source", choices=dataset.SOURCES, default=dataset.DATA_SOURCE)
+    parser.add_argument("--data-path", default=str(dataset.DATA_DIR))
+    args = parser.parse_args(argv)
+
+    X, Y = dataset.load_housing(args.data_source, args.data_path)
+    report = cross_validate(X, Y, args.folds, args.scheme, args.cell_deg, args.workers,
+                            args.n_estimators, args.random_state, not args.raw_features,
+                            tuple(args.metrics), not args.no_serial, args.seed)
+    print_report(report)
+    if args.json:
+        Path(args.json).write_text(json.dumps(report, indent=2))
+    return report
+
+
+if __name__ == "__main__":
+    main()
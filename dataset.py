@@ -0,0 +1,232 @@
+import argparse
+import hashlib
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+
+from model_store import FEATURE_NAMES
+
+# ── Dataset Cache ─────────────────────────────────────────────────────────────
+#   data/
+#     X.npy            ← float64 (n, 8) feature matrix, opened memory-mapped
+#     y.npy            ← float64 (n,)   MedHouseVal in $100K units
+#     manifest.json    ← shape, dtype and sha256 of both files
+#
+# Serving pods have no outbound network, so the table is read from this local
+# cache instead of fetch_california_housing(). `python dataset.py build` fills
+# it from sklearn (on a machine with network), a CSV/Parquet file, or the
+# deterministic synthetic generator.
+DATA_DIR = Path(os.environ.get("HOUSE_DATA_DIR",
+                               Path(__file__).resolve().parent / "data"))
+DATA_SOURCE = os.environ.get("HOUSE_DATA_SOURCE", "auto")
+MANIFEST = "manifest.json"
+TARGET   = "Target"
+
+SOURCES = ("auto", "cache", "sklearn", "synthetic")
+TEST_SIZE = 0.2
+SYNTHETIC_CHUNK = 1_000_000
+
+
+def _sha256(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for block in iter(lambda: fh.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+# ── Synthetic Stand-in ────────────────────────────────────────────────────────
+# Same columns, units and clipping as the real table, with a target that
+# depends on income, age, latitude and distance to the coast, so models train
+# to a realistic R² for tests and benchmarks.
+def synthetic_housing(n_rows=20_640, seed=0):
+    rng = np.random.default_rng(seed)
+    X = np.empty((n_rows, len(FEATURE_NAMES)), dtype=np.float64)
+
+    X[:, 0] = np.clip(rng.lognormal(np.log(3.5), 0.45, n_rows), 0.4999, 15.0001)   # MedInc
+    X[:, 1] = rng.integers(1, 53, n_rows)                                           # HouseAge
+    X[:, 2] = np.clip(rng.lognormal(np.log(5.2), 0.25, n_rows), 0.846, 141.909)    # AveRooms
+    X[:, 3] = np.clip(X[:, 2] * rng.normal(0.2, 0.03, n_rows), 0.333, 34.066)      # AveBedrms
+    X[:, 4] = np.clip(np.rint(rng.lognormal(np.log(1166), 0.75, n_rows)), 3, 35682)  # Population
+    X[:, 5] = np.clip(rng.lognormal(np.log(2.8), 0.3, n_rows), 0.692, 1243.333)    # AveOccup
+
+    # Blocks cluster around the Bay Area and Los Angeles, the rest spread out
+    centres = np.array([[37.75, -122.25], [34.05, -118.25], [36.5, -119.5]])
+    which   = rng.choice(3, size=n_rows, p=[0.3, 0.45, 0.25])
+    spread  = np.array([0.6, 0.7, 1.8])[which, None]
+    latlon  = centres[which] + rng.normal(0.0, 1.0, (n_rows, 2)) * spread
+    X[:, 6] = np.clip(latlon[:, 0], 32.54, 41.95)                                   # Latitude
+    X[:, 7] = np.clip(latlon[:, 1], -124.35, -114.31)                               # Longitude
+
+    coast_lon = -124.2 + (41.95 - X[:, 6]) * 0.62
+    coastal   = 1.2 * np.exp(-np.clip(X[:, 7] - coast_lon, 0, None))
+    y = (0.2 + 0.42 * X[:, 0] + 0.004 * X[:, 1] - 0.15 * np.abs(X[:, 6] - 35.5)
+         + coastal - 0.05 * np.log(X[:, 5]) + rng.normal(0.0, 0.35, n_rows))
+    return X, np.clip(y, 0.14999, 5.00001)
+
+
+# ── Cache I/O ─────────────────────────────────────────────────────────────────
+def _write_manifest(path, n_rows, source):
+    manifest = {
+        "source":        source,
+        "feature_names": FEATURE_NAMES,
+        "n_rows":        int(n_rows),
+        "dtype":         "float64",
+        "sha256":        {name: _sha256(path / name) for name in ("X.npy", "y.npy")},
+    }
+    (path / MANIFEST).write_text(json.dumps(manifest, indent=2))
+    return manifest
+
+
+def write_cache(X, y, path=DATA_DIR, source="unknown"):
+    path = Path(path)
+    path.mkdir(parents=True, exist_ok=True)
+    X = np.ascontiguousarray(X, dtype=np.float64)
+    y = np.ascontiguousarray(y, dtype=np.float64)
+    if X.shape != (len(y), len(FEATURE_NAMES)):
+        raise ValueError(f"expected X of shape (n, {len(FEATURE_NAMES)}) matching "
+                         f"y of length n, got {X.shape} and {y.shape}")
+    np.save(path / "X.npy", X)
+    np.save(path / "y.npy", y)
+    return _write_manifest(path, len(y), source)
+
+
+def write_synthetic_cache(n_rows, path=DATA_DIR, chunk_rows=SYNTHETIC_CHUNK, seed=0):
+    """Generate a scaled-up synthetic cache chunk by chunk, straight into .npy memmaps.
+
+    Memory stays at one chunk however large ``n_rows`` is (50M rows is a 3.2 GB X.npy).
+    Chunk ``i`` uses seed ``seed + i``, so a given (n_rows, chunk_rows, seed) is reproducible.
+    """
+    path = Path(path)
+    path.mkdir(parents=True, exist_ok=True)
+    X = np.lib.format.open_memmap(path / "X.npy", mode="w+", dtype=np.float64,
+                                  shape=(n_rows, len(FEATURE_NAMES)))
+    y = np.lib.format.open_memmap(path / "y.npy", mode="w+", dtype=np.float64, shape=(n_rows,))
+    for i, start in enumerate(range(0, n_rows, chunk_rows)):
+        stop = min(start + chunk_rows, n_rows)
+        X[start:stop], y[start:stop] = synthetic_housing(stop - start, seed + i)
+    X.flush()
+    y.flush()
+    del X, y
+    return _write_manifest(path, n_rows, f"synthetic:{n_rows}:{chunk_rows}:{seed}")
+
+
+def read_cache(path=DATA_DIR, verify=True, mmap=True):
+    """Return ``(X, y)`` from the .npy cache, memory-mapped read-only by default."""
+    path = Path(path)
+    if not (path / MANIFEST).exists():
+        raise FileNotFoundError(f"no dataset cache in {path} — run `python dataset.py build`")
+    manifest = json.loads((path / MANIFEST).read_text())
+    if manifest["feature_names"] != FEATURE_NAMES:
+        raise ValueError(f"dataset cache {path} has columns {manifest['feature_names']}, "
+                         f"expected {FEATURE_NAMES}")
+    if verify:
+        for name, expected in manifest["sha256"].items():
+            digest = _sha256(path / name)
+            if digest != expected:
+                raise ValueError(f"dataset cache {path / name} is corrupt: "
+                                 f"sha256 {digest[:12]}… != {expected[:12]}…")
+    mode = "r" if mmap else None
+    X = np.load(path / "X.npy", mmap_mode=mode)
+    y = np.load(path / "y.npy", mmap_mode=mode)
+    return X, y
+
+
+def read_table(path):
+    """Read a CSV/Parquet file with the 8 feature columns and ``Target``."""
+    path = Path(path)
+    if path.suffix == ".parquet":
+        import pyarrow.parquet as pq
+        table = pq.read_table(path, columns=FEATURE_NAMES + [TARGET])
+        X = np.column_stack([table.column(name).to_numpy() for name in FEATURE_NAMES])
+        return X.astype(np.float64, copy=False), table.column(TARGET).to_numpy()
+    import pandas as pd
+    frame = pd.read_csv(path, usecols=FEATURE_NAMES + [TARGET])
+    return (frame[FEATURE_NAMES].to_numpy(dtype=np.float64),
+            frame[TARGET].to_numpy(dtype=np.float64))
+
+
+def fetch_sklearn():
+    from sklearn.datasets import fetch_california_housing
+    dataset = fetch_california_housing()
+    return dataset.data, dataset.target
+
+
+def load_housing(source=DATA_SOURCE, path=DATA_DIR):
+    """Return the housing table as ``(X, y)`` float64 arrays.
+
+    ``source`` is one of:
+      * ``auto``      – the local cache; on a miss fetch from sklearn once and
+                        write the cache so later starts are offline
+      * ``cache``     – the local cache only (never touches the network)
+      * ``sklearn``   – fetch_california_housing(), bypassing the cache
+      * ``synthetic`` – the deterministic synthetic stand-in
+    ``path`` may also point at a CSV/Parquet file, which is read directly.
+    """
+    if source not in SOURCES:
+        raise ValueError(f"unknown dataset source {source!r}; expected one of {SOURCES}")
+    if source == "synthetic":
+        return synthetic_housing()
+    if source == "sklearn":
+        return fetch_sklearn()
+
+    path = Path(path)
+    if path.suffix in (".csv", ".parquet"):
+        return read_table(path)
+    try:
+        return read_cache(path)
+    except FileNotFoundError:
+        if source == "cache":
+            raise
+    X, y = fetch_sklearn()
+    write_cache(X, y, path, source="sklearn")
+    return read_cache(path, verify=False)
+
+
+# ── Train/Test Split ──────────────────────────────────────────────────────────
+# Every trainer and side-file builder takes its rows from this one split, so the
+# spatial index, drift reference and tuned/compressed scores all see the same
+# training rows as the model.
+def split(*arrays, random_state=42, test_size=TEST_SIZE):
+    """``train_test_split`` order: ``(a_train, a_test, b_train, b_test, …)``."""
+    from sklearn.model_selection import train_test_split
+    return train_test_split(*arrays, test_size=test_size, random_state=random_state)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build the local housing dataset cache.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build = sub.add_parser("build", help="write X.npy / y.npy / manifest.json")
+    build.add_argument("--from", dest="src", default="sklearn",
+                       help="'sklearn', 'synthetic', or a CSV/Parquet file (default: %(default)s)")
+    build.add_argument("--rows", type=int, default=20_640, help="rows for --from synthetic")
+    build.add_argument("--seed", type=int, default=0, help="seed for --from synthetic")
+    build.add_argument("--out", default=str(DATA_DIR))
+    verify = sub.add_parser("verify", help="check the cache against its manifest")
+    verify.add_argument("--path", default=str(DATA_DIR))
+    args = parser.parse_args(argv)
+
+    if args.command == "verify":
+        X, y = read_cache(args.path)
+        print(f"ok  {X.shape[0]:,} rows × {X.shape[1]} features in {args.path}")
+        return
+
+    if args.src == "synthetic" and args.rows > SYNTHETIC_CHUNK:
+        manifest = write_synthetic_cache(args.rows, args.out, SYNTHETIC_CHUNK, args.seed)
+        print(f"wrote {manifest['n_rows']:,} synthetic rows to {args.out}")
+        return
+
+    if args.src == "sklearn":
+        X, y = fetch_sklearn()
+    elif args.src == "synthetic":
+        X, y = synthetic_housing(args.rows, args.seed)
+    else:
+        X, y = read_table(args.src)
+    manifest = write_cache(X, y, args.out, source=args.src)
+    print(f"wrote {manifest['n_rows']:,} rows from {args.src} to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
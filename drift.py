@@ -0,0 +1,323 @@
+import argparse
+import json
+import threading
+from pathlib import Path
+
+import numpy as np
+
+import dataset
+import model_store
+import schema
+import spatial
+
+# ── Drift Monitor ─────────────────────────────────────────────────────────────
+#   python drift.py build                        # reference for the LATEST artifact
+#   python drift.py report blocks.parquet        # a file of inputs vs the reference
+#   monitor = DriftMonitor.load(artifacts / version)
+#   monitor.update(X, predicted)                 # per predict batch
+#   monitor.report()                             # PSI / KS per feature
+#
+# At training time every feature and the predicted value get a histogram over
+# the training split with quantile bin edges (plus one bin below the training
+# minimum and one above the maximum), and (lat, lon) gets a coarse grid of
+# block counts. They are saved next to the model as drift.json by every trainer
+# (through model_store.publish); an incremental update adds its batch to the
+# parent's counts on the parent's edges.
+# The monitor keeps the same histograms for the rows it is shown. One
+# comparison per bin edge per column per batch means O(bins) per value and
+# fixed memory however many rows pass. Counts cover the last one to two
+# `window`s of rows: the current window plus the one before it.
+#   PSI   Σ (served − ref) · ln(served / ref) over bins; < 0.1 stable,
+#         0.1–0.25 moderate, > 0.25 major shift
+#   KS    largest gap between the binned CDFs (a lower bound on the exact KS)
+# Below MIN_ROWS served rows both are None and the level is "insufficient": a
+# handful of rows fills a few bins and scores as a major shift (3 rows ≈ PSI 7.7).
+#   outside_share   share of rows beyond the training min/max
+#   rare_location_share   share of rows in grid cells with < RARE_CELL_ROWS
+#                         training blocks (lat/lon combinations seldom trained on)
+DRIFT_FILE     = "drift.json"
+PREDICTION     = "Prediction"                    # $100K units, like Target
+BINS           = 20
+LOCATION_STEP  = 0.25                            # degrees
+RARE_CELL_ROWS = 5
+PSI_LEVELS     = ((0.25, "major"), (0.1, "moderate"), (0.0, "stable"))
+EPS            = 1e-4                            # share floor for empty bins
+WINDOW         = 100_000
+SMALL_BATCH    = 512                             # see histograms()
+MIN_ROWS       = 1_000                           # ≈ 50 rows per bin before PSI / KS are scored
+
+
+def _edges(values, bins=BINS):
+    """Quantile bin edges from the minimum to just past the maximum.
+
+    Computed in the values' own dtype (float32 for model inputs and
+    predictions), so the edges compare exactly against served rows.
+    """
+    values = np.asarray(values)
+    inner  = np.quantile(values, np.linspace(0, 1, bins + 1)[1:-1])
+    return np.unique(np.concatenate([[values.min()], inner,
+                                     [np.nextafter(values.max(), np.inf)]]))
+
+
+def histograms(edges, V):
+    """Bin counts of every column of ``V`` (rows × columns) at once.
+
+    ``edges`` is (columns, K) and padded with +inf. The result is (columns,
+    K + 1): rows below the minimum, each quantile bin, rows at or past the
+    maximum, then zeros for the padding. NaN counts as below the minimum.
+    Small batches use one broadcast ``V >= edges`` and a single bincount. Large
+    ones count ``column >= edge`` per edge on contiguous columns and take
+    differences, avoiding a rows × columns × K temporary. Both beat
+    searchsorted, whose binary search mispredicts on nearly every value.
+    """
+    edges = edges.astype(V.dtype)
+    n_cols, n_edges = edges.shape
+    if len(V) < SMALL_BATCH:
+        bins = (V[:, :, None] >= edges).sum(axis=-1) + np.arange(n_cols) * (n_edges + 1)
+        return np.bincount(bins.ravel(), minlength=n_cols * (n_edges + 1)).reshape(n_cols, -1)
+    at_least = np.array([[np.count_nonzero(column >= edge) for edge in row]
+                         for column, row in zip(np.ascontiguousarray(V.T), edges)])
+    bounds = np.column_stack([np.full(n_cols, len(V)), at_least, np.zeros(n_cols, np.int64)])
+    return -np.diff(bounds, axis=1)
+
+
+def _pad(edges):
+    edges = list(edges)
+    out = np.full((len(edges), max(len(e) for e in edges)), np.inf)
+    for row, e in zip(out, edges):
+        row[:len(e)] = e
+    return out
+
+
+def values_matrix(X, predicted):
+    """The 8 feature columns and the prediction side by side, in X's dtype."""
+    V = np.empty((len(X), len(schema.FEATURES) + 1), dtype=X.dtype)
+    V[:, :-1] = X
+    V[:, -1]  = predicted
+    return V
+
+
+def psi(served, reference):
+    p = np.maximum(served / max(served.sum(), 1), EPS)
+    q = np.maximum(reference / max(reference.sum(), 1), EPS)
+    return float(np.sum((p - q) * np.log(p / q)))
+
+
+def ks(served, reference):
+    p = np.cumsum(served) / max(served.sum(), 1)
+    q = np.cumsum(reference) / max(reference.sum(), 1)
+    return float(np.max(np.abs(p - q)))
+
+
+def psi_level(value):
+    return next(level for bound, level in PSI_LEVELS if value >= bound)
+
+
+class LocationGrid:
+    def __init__(self, bounds=spatial.GRID_BOUNDS, step=LOCATION_STEP):
+        self.lat0, lat1, self.lon0, lon1 = bounds
+        self.step  = step
+        self.shape = (round((lat1 - self.lat0) / step), round((lon1 - self.lon0) / step))
+
+    def cells(self, X):
+        """Flat cell index of each row's (lat, lon), clamped to the grid."""
+        i = np.clip(((X[:, spatial.LAT] - self.lat0) / self.step).astype(np.int64),
+                    0, self.shape[0] - 1)
+        j = np.clip(((X[:, spatial.LON] - self.lon0) / self.step).astype(np.int64),
+                    0, self.shape[1] - 1)
+        return i * self.shape[1] + j
+
+    def counts(self, X):
+        return np.bincount(self.cells(X), minlength=self.shape[0] * self.shape[1])
+
+
+class Reference:
+    """Training-split histograms of the features, the prediction and the location."""
+
+    def __init__(self, edges, counts, location, grid=None):
+        self.edges    = {name: np.asarray(e, dtype=np.float64) for name, e in edges.items()}
+        self.counts   = {name: np.asarray(c, dtype=np.int64) for name, c in counts.items()}
+        self.location = np.asarray(location, dtype=np.int64)
+        self.grid     = grid or LocationGrid()
+        self.rare     = self.location < RARE_CELL_ROWS
+        self.edge_matrix = _pad(self.edges.values())
+
+    @classmethod
+    def build(cls, X, predicted, bins=BINS):
+        V = values_matrix(schema.coerce(X), predicted)
+        names  = schema.FEATURE_NAMES + [PREDICTION]
+        edges  = {name: _edges(column, bins) for name, column in zip(names, V.T)}
+        counts = histograms(_pad(edges.values()), V)
+        grid = LocationGrid()
+        return cls(edges, {name: counts[i, :len(edges[name]) + 1] for i, name in enumerate(names)},
+                   grid.counts(V), grid)
+
+    def extend(self, X, predicted):
+        """These counts plus more training rows, binned on the same edges."""
+        V = values_matrix(schema.coerce(X), predicted)
+        counts = histograms(self.edge_matrix, V)
+        return type(self)(self.edges,
+                          {name: self.counts[name] + counts[i, :len(self.counts[name])]
+                           for i, name in enumerate(self.names)},
+                          self.location + self.grid.counts(V), self.grid)
+
+    @property
+    def names(self):
+        return list(self.edges)
+
+    @property
+    def rows(self):
+        return int(self.counts[PREDICTION].sum())
+
+    def to_dict(self):
+        return {"rows":     self.rows,
+                "bins":     {name: {"edges": self.edges[name].tolist(),
+                                    "counts": self.counts[name].tolist()}
+                             for name in self.names},
+                "location": {"bounds": [self.grid.lat0, self.grid.lat0 + self.grid.shape[0] * self.grid.step,
+                                        self.grid.lon0, self.grid.lon0 + self.grid.shape[1] * self.grid.step],
+                             "step": self.grid.step, "counts": self.location.tolist()}}
+
+    @classmethod
+    def from_dict(cls, data):
+        loc = data["location"]
+        return cls({name: b["edges"] for name, b in data["bins"].items()},
+                   {name: b["counts"] for name, b in data["bins"].items()},
+                   loc["counts"], LocationGrid(loc["bounds"], loc["step"]))
+
+    def save(self, version_dir):
+        tmp = Path(version_dir) / f".{DRIFT_FILE}.tmp"
+        tmp.write_text(json.dumps(self.to_dict()))
+        tmp.replace(Path(version_dir) / DRIFT_FILE)
+
+    @classmethod
+    def load(cls, version_dir):
+        """The saved reference, or None if this version has none."""
+        path = Path(version_dir) / DRIFT_FILE
+        return cls.from_dict(json.loads(path.read_text())) if path.exists() else None
+
+
+class DriftMonitor:
+    def __init__(self, reference, window=WINDOW):
+        self.reference = reference
+        self.window    = window
+        self._lock     = threading.Lock()
+        self._current  = self._empty()
+        self._previous = self._empty()
+        self.rows_total = 0
+
+    def _empty(self):
+        shape = self.reference.edge_matrix.shape
+        return {"counts": np.zeros((shape[0], shape[1] + 1), dtype=np.int64), "rare": 0, "rows": 0}
+
+    @classmethod
+    def load(cls, version_dir, window=WINDOW):
+        reference = Reference.load(version_dir)
+        return cls(reference, window) if reference is not None else None
+
+    def update(self, X, predicted):
+        """Add a batch of raw feature rows and their predictions."""
+        ref = self.reference
+        X = np.asarray(X)
+        counts = histograms(ref.edge_matrix, values_matrix(X, predicted))
+        rare = int(ref.rare[ref.grid.cells(X)].sum())
+        with self._lock:
+            current = self._current
+            current["counts"] += counts
+            current["rare"] += rare
+            current["rows"] += len(X)
+            self.rows_total += len(X)
+            if current["rows"] >= self.window:
+                self._previous, self._current = current, self._empty()
+
+    def report(self):
+        ref = self.reference
+        with self._lock:
+            windows = (self._previous, self._current)
+            counts  = self._previous["counts"] + self._current["counts"]
+            rows    = sum(w["rows"] for w in windows)
+            rare    = sum(w["rare"] for w in windows)
+        features = {}
+        for name, served in zip(ref.names, counts):
+            expected = ref.counts[name]
+            served   = served[:len(expected)]
+            scored = rows >= MIN_ROWS
+            value = psi(served, expected) if scored else None
+            features[name] = {"psi": value, "ks": ks(served, expected) if scored else None,
+                              "level": psi_level(value) if scored else "insufficient",
+                              "outside_share": float(served[0] + served[-1]) / rows if rows else 0.0}
+        return {"rows": rows, "rows_total": self.rows_total, "reference_rows": ref.rows,
+                "features": features,
+                "rare_location_share": rare / rows if rows else 0.0,
+                "reference_rare_location_share":
+                    float(ref.location[ref.rare].sum()) / max(ref.location.sum(), 1)}
+
+
+def build_reference(model, x_train):
+    """Reference over the model's training rows and its predictions on them.
+
+    ``model`` is an XGBRegressor or a Booster.
+    """
+    import transforms
+    booster = model.get_booster() if hasattr(model, "get_booster") else model
+    x_train = schema.coerce(x_train)
+    return Reference.build(x_train, booster.inplace_predict(
+        transforms.model_inputs(booster, x_train)))
+
+
+def print_report(report):
+    print(f"{report['rows']:,} rows vs {report['reference_rows']:,} training rows")
+    print(f"{'feature':<12} {'PSI':>7} {'KS':>6} {'outside':>8}  level")
+    for name, stats in report["features"].items():
+        if stats["psi"] is None:
+            print(f"{name:<12} {'–':>7} {'–':>6} {stats['outside_share']:>8.2%}  {stats['level']}")
+            continue
+        print(f"{name:<12} {stats['psi']:>7.3f} {stats['ks']:>6.3f} "
+              f"{stats['outside_share']:>8.2%}  {stats['level']}")
+    print(f"rare locations {report['rare_location_share']:.2%} "
+          f"(training {report['reference_rare_location_share']:.2%})")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build drift references or report drift.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build = sub.add_parser("build", help="build the reference histograms for an artifact version")
+    build.add_argument("--data-source", choices=dataset.SOURCES, default=dataset.DATA_SOURCE)
+    build.add_argument("--data-path", default=str(dataset.DATA_DIR))
+    report = sub.add_parser("report", help="drift of a CSV/Parquet file against the reference")
+    report.add_argument("input", help=".csv or .parquet with the 8 feature columns")
+    report.add_argument("--json", default=None, help="also write the report to this file")
+    for command in (build, report):
+        command.add_argument("--model-version", default=None, help="default: LATEST")
+        command.add_argument("--model-dir", default=str(model_store.ARTIFACT_ROOT))
+    args = parser.parse_args(argv)
+
+    import backends
+    model, meta = model_store.load_model(args.model_version, args.model_dir)
+    version_dir = Path(args.model_dir) / meta["version"]
+    if args.command == "build":
+        X, Y = dataset.load_housing(args.data_source, args.data_path)
+        x_train, _, _, _ = dataset.split(
+            X, Y, random_state=meta["params"].get("random_state", 42))
+        reference = build_reference(model, x_train)
+        reference.save(version_dir)
+        print(f"drift reference over {reference.rows:,} training rows for {meta['version']}")
+        return
+
+    from batch_score import read_chunks
+    monitor = DriftMonitor.load(version_dir, window=float("inf"))
+    if monitor is None:
+        raise FileNotFoundError(f"no drift reference for {meta['version']} — run `drift.py build`")
+    predictor = backends.load_backend("auto", model, version_dir)
+    for chunk in read_chunks(args.input):
+        X = schema.from_frame(chunk)
+        monitor.update(X, predictor.predict(X))
+    result = monitor.report()
+    print_report(result)
+    if args.json:
+        Path(args.json).write_text(json.dumps(result, indent=2))
+    return result
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+import time
+from contextlib import contextmanager
+
+import numpy as np
+
+import pricing
+
+# ── Metrics Stage ─────────────────────────────────────────────────────────────
+# Every metric is computed from prediction vectors that were produced once per
+# split, so adding a metric never costs another model.predict call.
+def r2(y_true, y_pred):
+    ss_res = np.sum((y_true - y_pred) ** 2)
+    ss_tot = np.sum((y_true - y_true.mean()) ** 2)
+    return 1.0 - ss_res / ss_tot
+
+
+def mse(y_true, y_pred):
+    return np.mean((y_true - y_pred) ** 2)
+
+
+def rmse(y_true, y_pred):
+    return np.sqrt(mse(y_true, y_pred))
+
+
+def mae(y_true, y_pred):
+    return np.mean(np.abs(y_true - y_pred))
+
+
+def mape(y_true, y_pred):
+    return np.mean(np.abs((y_true - y_pred) / y_true))
+
+
+def tier_mae(y_true, y_pred, tier_edges=pricing.TIER_EDGES):
+    """MAE within each market tier of the *true* price, in $100K units."""
+    codes = pricing.tier_codes(y_true * 100_000, tier_edges)
+    abs_err = np.abs(y_true - y_pred)
+    counts = np.bincount(codes, minlength=len(pricing.TIERS))
+    sums   = np.bincount(codes, weights=abs_err, minlength=len(pricing.TIERS))
+    return {str(tier): (float(s / n) if n else None)
+            for tier, s, n in zip(pricing.TIERS, sums, counts)}
+
+
+METRICS = {"r2": r2, "mse": mse, "rmse": rmse, "mae": mae, "mape": mape, "tier_mae": tier_mae}
+DEFAULT_METRICS = ("r2", "mse", "rmse", "mae", "mape", "tier_mae")
+
+
+def evaluate(splits, metrics=DEFAULT_METRICS):
+    """Score ``{"train": (y_true, y_pred), "test": ...}`` into flat ``<split>_<metric>`` keys."""
+    unknown = set(metrics) - METRICS.keys()
+    if unknown:
+        raise ValueError(f"unknown metrics {sorted(unknown)}; expected some of {sorted(METRICS)}")
+    scores = {}
+    for split, (y_true, y_pred) in splits.items():
+        y_true = np.asarray(y_true, dtype=np.float64)
+        y_pred = np.asarray(y_pred, dtype=np.float64)
+        for name in metrics:
+            value = METRICS[name](y_true, y_pred)
+            scores[f"{split}_{name}"] = value if isinstance(value, dict) else float(value)
+    return scores
+
+
+# ── Phase Timings ─────────────────────────────────────────────────────────────
+class PhaseTimer:
+    def __init__(self):
+        self.timings = {}
+
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] = round(time.perf_counter() - start, 6)
@@ -0,0 +1,143 @@
+import json
+import threading
+from pathlib import Path
+
+import numpy as np
+import xgboost as xgb
+
+import dataset
+import model_store
+import transforms
+
+# ── Prediction Explanations ───────────────────────────────────────────────────
+#   explainer = Explainer(model)
+#   contribs  = explainer.contributions(X)    # (n, 9): 8 features + bias
+#
+# TreeSHAP contributions come straight from XGBoost (pred_contribs=True): one
+# call per batch, however many rows. Each row sums to the raw prediction, in
+# the same $100K units as `predicted`. Models trained with derived features are
+# explained in terms of their inputs: the 8 raw columns plus the derived ones.
+#   exact   – TreeSHAP; ≈1 ms/row for the default 100-tree model on one core
+#   approx  – Saabas path attribution (approx_contribs=True); ≈100× cheaper,
+#             still sums to the prediction, for scoring large files
+#
+# Global importance is the mean |contribution| of each feature over a fixed
+# background sample. It is computed once per model version on a background
+# thread and written next to the model as importance.json, so other processes
+# (and restarts) just read it.
+IMPORTANCE_FILE = "importance.json"
+BACKGROUND_ROWS = 5_000
+BIAS = "bias"
+METHODS = ("exact", "approx")
+FEATURE_LABELS = {
+    "MedInc": "Median Income",  "HouseAge": "House Age",
+    "AveRooms": "Avg Rooms",    "AveBedrms": "Avg Bedrooms",
+    "Population": "Population", "AveOccup": "Avg Occupancy",
+    "Latitude": "Latitude",     "Longitude": "Longitude",
+    **transforms.LABELS,
+}
+
+
+class Explainer:
+    def __init__(self, model, method="exact"):
+        if method not in METHODS:
+            raise ValueError(f"unknown explain method {method!r}; expected one of {METHODS}")
+        self.booster   = model.get_booster() if hasattr(model, "get_booster") else model
+        self.method    = method
+        self.transform = transforms.for_model(self.booster)
+        self.feature_names = transforms.input_names(self.booster)
+
+    def contributions(self, X):
+        """``(n, len(feature_names) + 1)`` contributions for raw rows; bias last."""
+        if self.transform is not None:
+            X = self.transform.transform(X)
+        dmatrix = xgb.DMatrix(np.asarray(X, dtype=np.float32), feature_names=self.feature_names)
+        return self.booster.predict(dmatrix, pred_contribs=True, validate_features=False,
+                                    approx_contribs=self.method == "approx")
+
+
+def to_records(contribs, names=model_store.FEATURE_NAMES):
+    """One ``{"bias": b, "contributions": {feature: value}}`` dict per row."""
+    return [{BIAS: float(row[-1]), "contributions": dict(zip(names, row[:-1].tolist()))}
+            for row in contribs]
+
+
+def to_columns(contribs, names=model_store.FEATURE_NAMES):
+    """``contrib_<feature>`` / ``contrib_bias`` columns for tabular outputs."""
+    columns = {f"contrib_{name}": contribs[:, i] for i, name in enumerate(names)}
+    columns[f"contrib_{BIAS}"] = contribs[:, -1]
+    return columns
+
+
+def top_features(contrib_row, k=3, names=model_store.FEATURE_NAMES):
+    """``(feature, contribution)`` pairs with the largest magnitude first."""
+    order = np.argsort(-np.abs(contrib_row[:-1]))[:k]
+    return [(names[i], float(contrib_row[i])) for i in order]
+
+
+# ── Global Importance ─────────────────────────────────────────────────────────
+def background_sample(n_rows=BACKGROUND_ROWS, path=dataset.DATA_DIR):
+    """Evenly spaced rows of the local dataset cache, or synthetic rows without one."""
+    try:
+        X, _ = dataset.read_cache(path, verify=False)
+    except (FileNotFoundError, ValueError):
+        return dataset.synthetic_housing(n_rows, seed=0)[0], "synthetic"
+    idx = np.linspace(0, len(X) - 1, min(n_rows, len(X))).astype(np.int64)
+    return np.asarray(X[idx]), "cache"
+
+
+def global_importance(explainer, X):
+    mean_abs = np.abs(explainer.contributions(X)[:, :-1]).mean(axis=0)
+    return dict(zip(explainer.feature_names, mean_abs.tolist()))
+
+
+class ImportanceCache:
+    """Global importances per model version, computed at most once per version.
+
+    ``get`` never blocks: it returns the cached result, reads a saved
+    importance.json, or starts the computation on a daemon thread and returns
+    None until it lands.
+    """
+
+    def __init__(self, root=model_store.ARTIFACT_ROOT, data_path=dataset.DATA_DIR):
+        self.root      = Path(root)
+        self.data_path = data_path
+        self._results  = {}
+        self._pending  = set()
+        self._lock     = threading.Lock()
+
+    def get(self, version, model):
+        with self._lock:
+            if version in self._results:
+                return self._results[version]
+            path = self.root / version / IMPORTANCE_FILE
+            if path.exists():
+                self._results[version] = json.loads(path.read_text())["importance"]
+                return self._results[version]
+            if version not in self._pending:
+                self._pending.add(version)
+                threading.Thread(target=self._compute, args=(version, model),
+                                 name=f"importance-{version}", daemon=True).start()
+        return None
+
+    def compute(self, version, model):
+        """Compute (and persist) synchronously; returns the importance dict."""
+        X, source = background_sample(path=self.data_path)
+        importance = global_importance(Explainer(model), X)
+        version_dir = self.root / version
+        if version_dir.is_dir():
+            tmp = version_dir / f".{IMPORTANCE_FILE}.tmp"
+            tmp.write_text(json.dumps({"version": version, "background": source,
+                                       "rows": int(len(X)), "importance": importance},
+                                      indent=2))
+            tmp.replace(version_dir / IMPORTANCE_FILE)
+        with self._lock:
+            self._results[version] = importance
+        return importance
+
+    def _compute(self, version, model):
+        try:
+            self.compute(version, model)
+        finally:
+            with self._lock:
+                self._pending.discard(version)
@@ -0,0 +1,241 @@
+import argparse
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+import numpy as np
+
+import model_store
+import pricing
+import schema
+import spatial
+from prediction_cache import FEATURE_DECIMALS
+
+# ── Price Heatmap ─────────────────────────────────────────────────────────────
+#   surface = SurfaceCache().get(predictor, version, profile, mask)
+#   rgba, extent = surface.view(level=1, lat=36.8, lon=-119.4)
+#   python heatmap.py --png map.png --MedInc 6.5      # render one surface offline
+#
+# Predicted price over a STEP° lat/lon grid covering the schema bounds, for one
+# profile of the 6 non-location features. The whole grid is one vectorized
+# predict call: the profile is broadcast into a float32 (cells, 8) matrix and
+# only the lat/lon columns vary. When a land mask is given (grid cells within
+# MASK_RADIUS cells of a training block), only those cells are predicted and
+# the rest are NaN.
+# The base grid is then downsampled into a pyramid of LEVELS zoom levels (2×2
+# mean per level) and cut into TILE × TILE tiles. A view at any zoom level and
+# centre is assembled from cached tiles, so panning and zooming never predict.
+# Surfaces are cached by model version and the profile quantized to the
+# app's input precision.
+STEP        = 0.04                               # degrees per base cell (~4 km)
+LEVELS      = 3                                  # 0.04°, 0.08°, 0.16° (whole state in one view)
+TILE        = 32
+VIEW        = 64                                 # cells per side of a view
+MASK_RADIUS = 2
+GEO         = [spatial.LAT, spatial.LON]
+PROFILE     = [i for i in range(len(schema.FEATURES)) if i not in GEO]
+# dark → sky → amber → red over $0 … PRICE_SCALE_MAX
+PALETTE = np.array([[12, 20, 40], [3, 105, 161], [56, 189, 248], [245, 158, 11],
+                    [239, 68, 68]], dtype=np.float32)
+
+
+def grid_axes(step=STEP):
+    """Cell-centre latitudes (south → north) and longitudes (west → east)."""
+    (lat0, lat1), (lon0, lon1) = (schema.BOUNDS["Latitude"], schema.BOUNDS["Longitude"])
+    lats = lat0 + (np.arange(int(np.ceil((lat1 - lat0) / step))) + 0.5) * step
+    lons = lon0 + (np.arange(int(np.ceil((lon1 - lon0) / step))) + 0.5) * step
+    return lats, lons
+
+
+def land_mask(latlon, step=STEP, radius=MASK_RADIUS):
+    """Grid cells within ``radius`` cells of any of the (lat, lon) points."""
+    lats, lons = grid_axes(step)
+    i = np.clip(((latlon[:, 0] - lats[0]) / step + 0.5).astype(np.int64), 0, len(lats) - 1)
+    j = np.clip(((latlon[:, 1] - lons[0]) / step + 0.5).astype(np.int64), 0, len(lons) - 1)
+    seen = np.zeros((len(lats), len(lons)), dtype=bool)
+    seen[i, j] = True
+    padded = np.pad(seen, radius)
+    mask = np.zeros_like(seen)
+    for di in range(2 * radius + 1):             # dilate: OR of the shifted copies
+        for dj in range(2 * radius + 1):
+            mask |= padded[di:di + seen.shape[0], dj:dj + seen.shape[1]]
+    return mask
+
+
+def _downsample(values):
+    """2×2 mean ignoring NaN; a block with no values stays NaN."""
+    h, w = values.shape
+    padded = np.full((h + h % 2, w + w % 2), np.nan, dtype=values.dtype)
+    padded[:h, :w] = values
+    blocks = padded.reshape(padded.shape[0] // 2, 2, padded.shape[1] // 2, 2)
+    present = ~np.isnan(blocks)
+    count = present.sum(axis=(1, 3))
+    total = np.where(present, blocks, 0).sum(axis=(1, 3))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(count > 0, total / count, np.nan).astype(values.dtype)
+
+
+class PriceSurface:
+    def __init__(self, prices, step=STEP, levels=LEVELS, tile=TILE):
+        self.step, self.tile_size = step, tile
+        lats, lons = grid_axes(step)
+        self.lat0, self.lon0 = lats[0] - step / 2, lons[0] - step / 2
+        pyramid = [prices]
+        for _ in range(levels - 1):
+            pyramid.append(_downsample(pyramid[-1]))
+        self.shapes = [level.shape for level in pyramid]
+        self.tiles = {(z, ty, tx): level[ty * tile:(ty + 1) * tile, tx * tile:(tx + 1) * tile]
+                      for z, level in enumerate(pyramid)
+                      for ty in range(-(-level.shape[0] // tile))
+                      for tx in range(-(-level.shape[1] // tile))}
+        self.seconds = 0.0
+
+    @classmethod
+    def compute(cls, predictor, profile, mask=None, step=STEP):
+        """One predict call over every (masked) grid cell for ``profile`` (8 raw features)."""
+        start = time.perf_counter()
+        lats, lons = grid_axes(step)
+        cells = np.ones((len(lats), len(lons)), dtype=bool) if mask is None else mask
+        rows, cols = np.nonzero(cells)
+        X = np.empty((len(rows), len(schema.FEATURES)), dtype=schema.DTYPE)
+        X[:] = schema.coerce(np.reshape(profile, (1, -1)))
+        X[:, spatial.LAT] = lats[rows]
+        X[:, spatial.LON] = lons[cols]
+        prices = np.full(cells.shape, np.nan, dtype=np.float32)
+        prices[rows, cols] = predictor.predict(X) * 100_000
+        surface = cls(prices, step)
+        surface.seconds = time.perf_counter() - start
+        surface.cells = len(X)
+        return surface
+
+    def tile(self, level, ty, tx):
+        return self.tiles[(level, ty, tx)]
+
+    def view(self, level=LEVELS - 1, lat=None, lon=None, size=VIEW):
+        """Prices (north up) of a ``size``-cell window at ``level`` and its lat/lon extent.
+
+        Centred on (lat, lon), or the whole level when it fits; assembled from tiles.
+        """
+        h, w = self.shapes[level]
+        step = self.step * 2 ** level
+        rows, cols = min(size, h), min(size, w)
+        if lat is None or lon is None:
+            i0, j0 = (h - rows) // 2, (w - cols) // 2
+        else:
+            i0 = int(np.clip((lat - self.lat0) / step - rows / 2, 0, h - rows))
+            j0 = int(np.clip((lon - self.lon0) / step - cols / 2, 0, w - cols))
+        out = np.empty((rows, cols), dtype=np.float32)
+        t = self.tile_size
+        for ty in range(i0 // t, (i0 + rows - 1) // t + 1):
+            for tx in range(j0 // t, (j0 + cols - 1) // t + 1):
+                block = self.tile(level, ty, tx)
+                r0, c0 = max(ty * t, i0), max(tx * t, j0)
+                r1, c1 = min(ty * t + block.shape[0], i0 + rows), min(tx * t + block.shape[1], j0 + cols)
+                out[r0 - i0:r1 - i0, c0 - j0:c1 - j0] = block[r0 - ty * t:r1 - ty * t,
+                                                              c0 - tx * t:c1 - tx * t]
+        extent = (self.lat0 + i0 * step, self.lat0 + (i0 + rows) * step,
+                  self.lon0 + j0 * step, self.lon0 + (j0 + cols) * step)
+        return out[::-1], extent
+
+
+def colorize(prices, vmax=pricing.PRICE_SCALE_MAX, scale=1):
+    """RGBA uint8 image of a price array; NaN cells are transparent."""
+    t = np.clip(np.nan_to_num(prices / vmax), 0.0, 1.0) * (len(PALETTE) - 1)
+    low = np.minimum(t.astype(np.int64), len(PALETTE) - 2)
+    frac = (t - low)[..., None]
+    rgba = np.empty(prices.shape + (4,), dtype=np.uint8)
+    rgba[..., :3] = PALETTE[low] * (1 - frac) + PALETTE[low + 1] * frac
+    rgba[..., 3] = np.where(np.isnan(prices), 0, 255)
+    return rgba.repeat(scale, axis=0).repeat(scale, axis=1) if scale > 1 else rgba
+
+
+def mark(rgba, extent, lat, lon, scale=1):
+    """Draw a white cross at (lat, lon) on a ``colorize`` image, if it is in view."""
+    lat0, lat1, lon0, lon1 = extent
+    if not (lat0 <= lat < lat1 and lon0 <= lon < lon1):
+        return rgba
+    i = int((lat1 - lat) / (lat1 - lat0) * rgba.shape[0])
+    j = int((lon - lon0) / (lon1 - lon0) * rgba.shape[1])
+    arm = max(2 * scale, 4)
+    rgba[max(i - arm, 0):i + arm + 1, j] = rgba[i, max(j - arm, 0):j + arm + 1] = (255, 255, 255, 255)
+    return rgba
+
+
+def profile_key(version, profile):
+    """Cache key: model version + the non-location features at input precision."""
+    values = np.asarray(profile, dtype=np.float64)[PROFILE]
+    scale  = 10.0 ** np.asarray(FEATURE_DECIMALS, dtype=np.float64)[PROFILE]
+    return (version, tuple(np.rint(values * scale).astype(np.int64).tolist()))
+
+
+class SurfaceCache:
+    """LRU of computed surfaces keyed by ``profile_key``; entries of older versions age out."""
+
+    def __init__(self, max_entries=16):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock    = threading.Lock()
+        self.hits = self.misses = 0
+
+    def get(self, predictor, version, profile, mask=None):
+        key = profile_key(version, profile)
+        with self._lock:
+            surface = self._entries.get(key)
+            if surface is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return surface
+            self.misses += 1
+        surface = PriceSurface.compute(predictor, profile, mask)
+        with self._lock:
+            self._entries[key] = surface
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return surface
+
+
+def main(argv=None):
+    import backends
+    parser = argparse.ArgumentParser(description="Render or time the predicted-price heatmap.")
+    defaults = (3.87, 28.64, 5.43, 1.10, 1425.5, 3.07)
+    for i, default in zip(PROFILE, defaults):
+        parser.add_argument(f"--{schema.FEATURE_NAMES[i]}", type=float, default=default)
+    parser.add_argument("--backend", choices=sorted(backends.BACKENDS), default="auto")
+    parser.add_argument("--no-mask", action="store_true", help="predict every grid cell")
+    parser.add_argument("--repeat", type=int, default=5, help="timed grid evaluations")
+    parser.add_argument("--png", default=None, help="write the state-level view here")
+    parser.add_argument("--model-dir", default=str(model_store.ARTIFACT_ROOT))
+    parser.add_argument("--model-version", default=None)
+    args = parser.parse_args(argv)
+
+    model, meta = model_store.load_model(args.model_version, args.model_dir)
+    version_dir = Path(args.model_dir) / meta["version"]
+    predictor = backends.load_backend(args.backend, model, version_dir)
+    index = spatial.ComparablesIndex.load(version_dir)
+    mask = None if args.no_mask or index is None else land_mask(index.latlon)
+    profile = np.zeros(len(schema.FEATURES))
+    profile[PROFILE] = [getattr(args, schema.FEATURE_NAMES[i]) for i in PROFILE]
+    profile[GEO] = [np.mean(schema.BOUNDS["Latitude"]), np.mean(schema.BOUNDS["Longitude"])]
+
+    PriceSurface.compute(predictor, profile, mask)                    # warm-up
+    times = [PriceSurface.compute(predictor, profile, mask) for _ in range(args.repeat)]
+    surface = times[-1]
+    lats, lons = grid_axes()
+    print(f"model {meta['version']}  grid {len(lats)}×{len(lons)} at {STEP}°, "
+          f"{surface.cells:,} cells predicted  levels {surface.shapes}")
+    print(f"grid evaluation median {np.median([s.seconds for s in times]) * 1000:.1f} ms  "
+          f"(min {min(s.seconds for s in times) * 1000:.1f} ms)")
+    start = time.perf_counter()
+    for level in range(LEVELS):
+        for lat in np.linspace(33, 41, 5):
+            surface.view(level, lat, -120.0)
+    print(f"15 views from tiles in {(time.perf_counter() - start) * 1000:.2f} ms")
+    if args.png:
+        from PIL import Image
+        Image.fromarray(colorize(surface.view(LEVELS - 1)[0], scale=8)).save(args.png)
+        print(f"wrote {args.png}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,483 +1,153 @@
+import os
+from pathlib import Path
+from profiling import TRACER, RerunProfiler
+TRACER.begin_rerun()
+profiler = RerunProfiler()
+if os.environ.get("HOUSE_PROFILE_RERUN") == "1":
+    profiler.start()
+TRACER.phase("imports")
 import streamlit as st
 import numpy as np
-import pandas as pd
-from sklearn.datasets import fetch_california_housing
-from sklearn.model_selection import train_test_split
-from sklearn import metrics
-from xgboost import XGBRegressor
+import model_store
+import pricing
+import schema
 import warnings
 warnings.simplefilter("ignore")
 
 # ── Page Config ───────────────────────────────────────────────────────────────
+TRACER.phase("page_config")
 st.set_page_config(
     page_title="California House Price Prediction",
     page_icon="🏡",
     layout="wide",
 )
-
-# ── Train Model ───────────────────────────────────────────────────────────────
+if st.query_params.get("profile") == "1":
+    profiler.start()
+
+# ── Load Model ────────────────────────────────────────────────────────────────
+# Serving only loads the artifact written by `python train.py`. Retraining at
+# startup is an explicit opt-in (HOUSE_MODEL_RETRAIN=1) for local development.
+# One watcher per process polls artifacts/LATEST and swaps new versions in from
+# a background thread (HOUSE_MODEL_WATCH seconds, 0 to disable), so publishing
+# a model never needs a cache clear or restart.
+# Modules that import xgboost (and with it sklearn, scipy and pandas) are
+# imported inside the cached loaders, once per process, after the page config.
 @st.cache_resource(show_spinner=False)
 def load_model():
-    dataset = fetch_california_housing()
-    house_price = pd.DataFrame(dataset.data, columns=dataset.feature_names)
-    house_price["Target"] = dataset.target
-    X = house_price.drop("Target", axis=1)
-    Y = house_price["Target"]
-    x_train, x_test, y_train, y_test = train_test_split(
-        X, Y, test_size=0.2, random_state=42)
-    model = XGBRegressor(n_estimators=100, random_state=42, verbosity=0)
-    model.fit(x_train, y_train)
-    train_r2  = metrics.r2_score(y_train, model.predict(x_train))
-    test_r2   = metrics.r2_score(y_test,  model.predict(x_test))
-    test_mse  = metrics.mean_squared_error(y_test, model.predict(x_test))
-    return model, train_r2, test_r2, test_mse, len(X)
+    from model_watcher import ModelWatcher
+    TRACER.count("load_model_cold")
+    watcher = ModelWatcher(model_store.ARTIFACT_ROOT, os.environ.get("HOUSE_BACKEND", "auto"),
+                           float(os.environ.get("HOUSE_MODEL_WATCH", "2")),
+                           on_swap=lambda predictor, meta, model: TRACER.count("model_swaps"))
+    try:
+        watcher.load()
+    except FileNotFoundError:
+        if os.environ.get("HOUSE_MODEL_RETRAIN") != "1":
+            raise
+        from train import train_model
+        model, scores = train_model()
+        watcher.install(model, {"version": "untracked", "metrics": scores})
+    return watcher.start(load=False)
+
+# One cache per process, shared by every session; rebinding to a new artifact
+# version drops all cached predictions.
+@st.cache_resource(show_spinner=False)
+def load_prediction_cache():
+    from prediction_cache import PredictionCache
+    return PredictionCache(None, None, max_entries=10_000)
+
+# TreeSHAP explainer per model version; global importances are computed once per
+# version on a background thread and saved next to the model (see explain.py).
+@st.cache_resource(show_spinner=False)
+def load_explainer(version, _model):
+    from explain import Explainer
+    return Explainer(_model)
+
+@st.cache_resource(show_spinner=False)
+def load_importance_cache():
+    from explain import ImportanceCache
+    return ImportanceCache(model_store.ARTIFACT_ROOT)
+
+# Quantile booster saved with the artifact by `train.py --intervals` (None otherwise)
+@st.cache_resource(show_spinner=False)
+def load_intervals(version, _meta):
+    from intervals import load_interval_model
+    return load_interval_model(_meta, model_store.ARTIFACT_ROOT)
+
+# Region grid and nearest-comparables index (see spatial.py); the index is saved
+# next to each model version by train.py (None for versions built without one).
+@st.cache_resource(show_spinner=False)
+def load_region_grid():
+    from spatial import RegionGrid
+    return RegionGrid()
 
+@st.cache_resource(show_spinner=False)
+def load_comparables(version):
+    from spatial import ComparablesIndex
+    return ComparablesIndex.load(model_store.ARTIFACT_ROOT / version)
+
+@st.cache_resource(show_spinner=False)
+def load_surface_cache():
+    from heatmap import SurfaceCache
+    return SurfaceCache()
+
+@st.cache_resource(show_spinner=False)
+def load_land_mask(version):
+    from heatmap import land_mask
+    comparables = load_comparables(version)
+    return land_mask(comparables.latlon) if comparables is not None else None
+
+# The stylesheet lives in house_prediction.css and is read once per process
+@st.cache_resource(show_spinner=False)
+def load_css():
+    return f"<style>{Path(__file__).with_suffix('.css').read_text()}</style>"
+
+TRACER.phase("load_model")
+TRACER.count("load_model_calls")
 with st.spinner("Initialising model…"):
-    model, train_r2, test_r2, test_mse, n_samples = load_model()
+    try:
+        watcher = load_model()
+    except FileNotFoundError as exc:
+        st.error(f"{exc}. Set HOUSE_MODEL_RETRAIN=1 to train in-process instead.")
+        st.stop()
+
+# Hero chips read the metrics recorded at training time; nothing is re-scored here.
+# A metric the artifact didn't record (train.py --metrics) drops its chip.
+def metric_chip(value, label, title=None):
+    if value is None:
+        return ""
+    title = f' title="{title}"' if title else ""
+    return f'<div class="acc-chip"{title}><span>{value}</span> {label}</div>'
+
+meta      = watcher.current[1]
+scores    = meta["metrics"]
+model_version = meta["version"].split("-")[-1]                 # sha256 prefix of the booster
+test_rmse = (scores["test_rmse"] if "test_rmse" in scores       # older artifacts: MSE only
+             else scores["test_mse"] ** 0.5 if "test_mse" in scores else None)
+cv_r2     = (scores.get("cv") or {}).get("test_r2")   # train.py --cv-folds: mean ± std over folds
+hero_chips = "\n    ".join(chip for chip in (
+    metric_chip(f"{scores['train_r2']*100:.1f}%" if "train_r2" in scores else None, "Train R² Score"),
+    metric_chip(f"{scores['test_r2']*100:.1f}%" if "test_r2" in scores else None, "Test R² Score"),
+    metric_chip(f"{cv_r2['mean']*100:.1f}% ± {cv_r2['std']*100:.1f}" if cv_r2 else None,
+                "CV R² Score", cv_r2 and f'{scores["cv"]["folds"]}-fold {scores["cv"]["scheme"]} CV'),
+    metric_chip(f"{scores['n_samples']:,}" if "n_samples" in scores else None, "Training Samples"),
+    metric_chip("8", "Input Features"),
+    metric_chip(f"${test_rmse*100_000:,.0f}" if test_rmse is not None else None, "Test RMSE"),
+    metric_chip(f"{scores['test_interval_coverage']*100:.1f}%"
+                if "test_interval_coverage" in scores else None, "Interval Coverage"),
+    metric_chip(model_version, "Model Version", meta["version"]),
+) if chip)
 
 # ══════════════════════════════════════════════════════════════════════════════
 #  CSS  —  Golden Amber · Dark Theme · matching diabetes.py style
 # ══════════════════════════════════════════════════════════════════════════════
-st.markdown("""
-<style>
-@import url('https://fonts.googleapis.com/css2?family=Playfair+Display:wght@500;600;700&family=IBM+Plex+Mono:wght@300;400;500&display=swap');
-
-/* ── Variables ── */
-:root {
-    --bg:           #090b0f;
-    --surface:      #0f1318;
-    --surface2:     #141a22;
-    --border:       #1c2535;
-    --border-hi:    #263245;
-    --amber:        #f59e0b;
-    --amber-light:  #fde68a;
-    --amber-dim:    rgba(245,158,11,0.13);
-    --sky:          #38bdf8;
-    --red:          #f43f5e;
-    --green:        #10b981;
-    --text:         #f0ead8;
-    --muted:        #5a6070;
-    --head-font:    'Playfair Display', Georgia, serif;
-    --mono-font:    'IBM Plex Mono', monospace;
-    --glow-amber:   0 0 28px rgba(245,158,11,0.22);
-}
-
-/* ── Global ── */
-html, body,
-[data-testid="stAppViewContainer"],
-[data-testid="stAppViewBlockContainer"] {
-    background: var(--bg) !important;
-    font-family: var(--mono-font) !important;
-    color: var(--text) !important;
-}
-[data-testid="stHeader"] { background: transparent !important; }
-#MainMenu, footer, [data-testid="stToolbar"] { visibility: hidden; }
-
-::-webkit-scrollbar { width: 5px; }
-::-webkit-scrollbar-track { background: var(--bg); }
-::-webkit-scrollbar-thumb { background: var(--border-hi); border-radius: 4px; }
-
-/* ══════════════════════════════
-   HERO
-══════════════════════════════ */
-.hero {
-    position: relative;
-    padding: 3rem 3.5rem 2.5rem;
-    margin-bottom: 2.5rem;
-    background: linear-gradient(135deg, #090b0f 0%, #101620 60%, #090b0f 100%);
-    border: 1px solid var(--border);
-    border-radius: 16px;
-    overflow: hidden;
-}
-.hero::before {
-    content: '';
-    position: absolute; inset: 0;
-    background:
-        radial-gradient(ellipse 60% 50% at 90% 50%, rgba(245,158,11,0.09) 0%, transparent 70%),
-        radial-gradient(ellipse 40% 60% at 10% 80%, rgba(56,189,248,0.05) 0%, transparent 70%);
-    pointer-events: none;
-}
-.hero::after {
-    content: '';
-    position: absolute;
-    top: 0; left: 0; right: 0; height: 2px;
-    background: linear-gradient(90deg, transparent, var(--amber), var(--amber-light), var(--sky), transparent);
-}
-.hero-tag {
-    display: inline-block;
-    font-family: var(--mono-font);
-    font-size: 0.68rem;
-    letter-spacing: 0.25em;
-    text-transform: uppercase;
-    color: var(--amber);
-    background: var(--amber-dim);
-    border: 1px solid rgba(245,158,11,0.28);
-    border-radius: 4px;
-    padding: 0.25rem 0.8rem;
-    margin-bottom: 1rem;
-}
-.hero h1 {
-    font-family: var(--head-font) !important;
-    font-size: 2.8rem !important;
-    font-weight: 700 !important;
-    color: var(--text) !important;
-    line-height: 1.1 !important;
-    letter-spacing: -0.01em;
-    margin: 0 0 0.6rem 0 !important;
-}
-.hero h1 span {
-    background: linear-gradient(135deg, var(--amber), var(--amber-light));
-    -webkit-background-clip: text;
-    -webkit-text-fill-color: transparent;
-    background-clip: text;
-}
-.hero-sub {
-    font-size: 0.82rem;
-    color: var(--muted);
-    letter-spacing: 0.04em;
-}
-.hero-badge {
-    position: absolute;
-    right: 3.5rem; top: 50%;
-    transform: translateY(-50%);
-    width: 80px; height: 80px;
-    border-radius: 50%;
-    background: var(--amber-dim);
-    border: 1px solid rgba(245,158,11,0.3);
-    display: flex; align-items: center; justify-content: center;
-    font-size: 2.2rem;
-    box-shadow: var(--glow-amber);
-}
-.status-dot {
-    display: inline-block;
-    width: 7px; height: 7px;
-    border-radius: 50%;
-    background: var(--amber);
-    box-shadow: 0 0 6px var(--amber);
-    margin-right: 0.5rem;
-    vertical-align: middle;
-}
-.status-badge {
-    font-size: 0.7rem; letter-spacing: 0.1em;
-    color: var(--muted); text-transform: uppercase;
-}
-
-/* ── Metric Chips ── */
-.acc-row {
-    display: flex; gap: 0.8rem; margin-bottom: 2.5rem; flex-wrap: wrap;
-}
-.acc-chip {
-    background: var(--surface2);
-    border: 1px solid var(--border-hi);
-    border-radius: 8px;
-    padding: 0.6rem 1.2rem;
-    font-size: 0.78rem;
-    color: var(--muted);
-    letter-spacing: 0.05em;
-}
-.acc-chip span {
-    font-family: var(--head-font);
-    font-size: 1.1rem;
-    font-weight: 600;
-    color: var(--amber);
-    margin-right: 0.35rem;
-}
-
-/* ══════════════════════════════
-   SECTION LABELS
-══════════════════════════════ */
-.section-label {
-    font-family: var(--mono-font);
-    font-size: 0.65rem;
-    font-weight: 500;
-    letter-spacing: 0.22em;
-    text-transform: uppercase;
-    color: var(--amber);
-    border-left: 2px solid var(--amber);
-    padding-left: 0.7rem;
-    margin-bottom: 1.4rem;
-    margin-top: 0.5rem;
-}
-
-/* ══════════════════════════════
-   FORM PANELS
-══════════════════════════════ */
-.form-panel {
-    background: var(--surface);
-    border: 1px solid var(--border);
-    border-radius: 14px;
-    padding: 1.8rem 2rem 2rem;
-    position: relative;
-    margin-bottom: 1.4rem;
-    transition: border-color 0.3s;
-}
-.form-panel:hover { border-color: var(--border-hi); }
-.form-panel::before {
-    content: '';
-    position: absolute;
-    top: 0; left: 1.5rem; right: 1.5rem; height: 1px;
-    background: linear-gradient(90deg, transparent, rgba(245,158,11,0.15), transparent);
-}
-
-/* ══════════════════════════════
-   INPUTS
-══════════════════════════════ */
-[data-testid="stNumberInput"] label,
-[data-testid="stSelectbox"] label {
-    font-family: var(--mono-font) !important;
-    font-size: 0.74rem !important;
-    font-weight: 500 !important;
-    letter-spacing: 0.07em !important;
-    text-transform: uppercase !important;
-    color: var(--muted) !important;
-    margin-bottom: 0.25rem !important;
-}
-[data-testid="stNumberInput"] input {
-    background: var(--surface2) !important;
-    border: 1px solid var(--border) !important;
-    border-radius: 8px !important;
-    color: var(--text) !important;
-    font-family: var(--mono-font) !important;
-    font-size: 0.9rem !important;
-    padding: 0.5rem 0.85rem !important;
-    transition: border-color 0.2s, box-shadow 0.2s !important;
-}
-[data-testid="stNumberInput"] input:focus {
-    border-color: var(--amber) !important;
-    box-shadow: 0 0 0 3px rgba(245,158,11,0.12) !important;
-    outline: none !important;
-}
-[data-testid="stNumberInput"] button {
-    background: var(--surface2) !important;
-    border-color: var(--border) !important;
-    color: var(--muted) !important;
-}
-[data-testid="stNumberInput"] button:hover {
-    background: var(--amber-dim) !important;
-    color: var(--amber) !important;
-}
-[data-testid="stSelectbox"] > div > div {
-    background: var(--surface2) !important;
-    border: 1px solid var(--border) !important;
-    border-radius: 8px !important;
-    color: var(--text) !important;
-    font-family: var(--mono-font) !important;
-    font-size: 0.88rem !important;
-    transition: border-color 0.2s !important;
-}
-[data-testid="stSelectbox"] > div > div:focus-within {
-    border-color: var(--amber) !important;
-    box-shadow: 0 0 0 3px rgba(245,158,11,0.12) !important;
-}
-[data-testid="stSelectbox"] svg { color: var(--amber) !important; }
-[data-testid="stSelectbox"] ul {
-    background: var(--surface2) !important;
-    border: 1px solid var(--border-hi) !important;
-    border-radius: 8px !important;
-}
-[data-testid="stSelectbox"] li {
-    font-family: var(--mono-font) !important;
-    font-size: 0.85rem !important;
-    color: var(--text) !important;
-}
-[data-testid="stSelectbox"] li:hover {
-    background: var(--amber-dim) !important;
-    color: var(--amber-light) !important;
-}
-
-/* ══════════════════════════════
-   BUTTON
-══════════════════════════════ */
-[data-testid="stButton"] > button {
-    width: 100% !important;
-    height: 58px !important;
-    background: linear-gradient(135deg, #b45309, var(--amber), #fde68a) !important;
-    color: #0a0800 !important;
-    border: none !important;
-    border-radius: 10px !important;
-    font-family: var(--head-font) !important;
-    font-size: 1.1rem !important;
-    font-weight: 600 !important;
-    letter-spacing: 0.05em !important;
-    cursor: pointer !important;
-    transition: all 0.3s ease !important;
-    box-shadow: 0 4px 20px rgba(245,158,11,0.30), 0 1px 0 rgba(255,255,255,0.08) inset !important;
-}
-[data-testid="stButton"] > button:hover {
-    transform: translateY(-2px) !important;
-    box-shadow: 0 8px 32px rgba(245,158,11,0.45), 0 2px 0 rgba(255,255,255,0.12) inset !important;
-}
-[data-testid="stButton"] > button:active {
-    transform: translateY(0) !important;
-}
-
-/* ══════════════════════════════
-   RESULT CARDS
-══════════════════════════════ */
-.result-wrap {
-    animation: fadeSlideUp 0.5s cubic-bezier(0.22,1,0.36,1) both;
-}
-@keyframes fadeSlideUp {
-    from { opacity: 0; transform: translateY(18px); }
-    to   { opacity: 1; transform: translateY(0); }
-}
-
-/* High price */
-.result-high {
-    background: linear-gradient(135deg, rgba(245,158,11,0.12) 0%, rgba(9,11,15,0) 60%);
-    border: 1px solid rgba(245,158,11,0.38);
-    border-top: 3px solid var(--amber);
-    border-radius: 14px;
-    padding: 2.5rem 2.5rem 2rem;
-    position: relative; overflow: hidden;
-}
-.result-high::after {
-    content: '';
-    position: absolute; inset: 0;
-    background: radial-gradient(ellipse 80% 60% at 90% 10%, rgba(245,158,11,0.08) 0%, transparent 70%);
-    pointer-events: none;
-}
-
-/* Mid price */
-.result-mid {
-    background: linear-gradient(135deg, rgba(56,189,248,0.10) 0%, rgba(9,11,15,0) 60%);
-    border: 1px solid rgba(56,189,248,0.32);
-    border-top: 3px solid var(--sky);
-    border-radius: 14px;
-    padding: 2.5rem 2.5rem 2rem;
-    position: relative; overflow: hidden;
-}
-.result-mid::after {
-    content: '';
-    position: absolute; inset: 0;
-    background: radial-gradient(ellipse 80% 60% at 90% 10%, rgba(56,189,248,0.07) 0%, transparent 70%);
-    pointer-events: none;
-}
-
-/* Low price */
-.result-low {
-    background: linear-gradient(135deg, rgba(16,185,129,0.10) 0%, rgba(9,11,15,0) 60%);
-    border: 1px solid rgba(16,185,129,0.32);
-    border-top: 3px solid var(--green);
-    border-radius: 14px;
-    padding: 2.5rem 2.5rem 2rem;
-    position: relative; overflow: hidden;
-}
-.result-low::after {
-    content: '';
-    position: absolute; inset: 0;
-    background: radial-gradient(ellipse 80% 60% at 90% 10%, rgba(16,185,129,0.07) 0%, transparent 70%);
-    pointer-events: none;
-}
-
-.result-icon  { font-size: 3rem; margin-bottom: 1rem; display: block; }
-.result-verdict {
-    font-family: var(--head-font);
-    font-size: 1.3rem; font-weight: 600;
-    margin-bottom: 0.4rem; line-height: 1.2;
-    color: var(--muted);
-    text-transform: uppercase; letter-spacing: 0.08em;
-}
-.result-price {
-    font-family: var(--head-font);
-    font-size: 3rem; font-weight: 700;
-    line-height: 1; margin-bottom: 0.5rem;
-}
-.result-price.amber { color: var(--amber); }
-.result-price.sky   { color: var(--sky); }
-.result-price.green { color: var(--green); }
-
-.result-sub {
-    font-size: 0.8rem; color: var(--muted); margin-top: 0.3rem;
-}
-
-/* Price breakdown bar */
-.price-range-wrap { margin-top: 1.6rem; }
-.price-range-label {
-    display: flex; justify-content: space-between;
-    font-size: 0.7rem; color: var(--muted);
-    letter-spacing: 0.08em; margin-bottom: 0.4rem;
-}
-.price-range-track {
-    width: 100%; height: 8px;
-    background: rgba(255,255,255,0.06);
-    border-radius: 6px;
-    position: relative; overflow: visible;
-}
-.price-range-fill {
-    position: absolute; left: 0; top: 0;
-    height: 100%; border-radius: 6px;
-    transition: width 0.8s cubic-bezier(0.22,1,0.36,1);
-}
-.price-range-dot {
-    position: absolute; top: 50%;
-    transform: translate(-50%, -50%);
-    width: 14px; height: 14px;
-    border-radius: 50%;
-    border: 2px solid var(--bg);
-    box-shadow: 0 0 8px currentColor;
-}
-
-.result-note {
-    font-size: 0.78rem; color: var(--muted);
-    margin-top: 1.4rem; line-height: 1.65;
-    border-top: 1px solid rgba(255,255,255,0.05);
-    padding-top: 1rem;
-}
-
-/* Feature insight mini cards */
-.insight-row {
-    display: grid; grid-template-columns: 1fr 1fr;
-    gap: 0.6rem; margin-top: 1.4rem;
-}
-.insight-chip {
-    background: rgba(255,255,255,0.03);
-    border: 1px solid var(--border);
-    border-radius: 8px;
-    padding: 0.6rem 0.8rem;
-    font-size: 0.72rem;
-}
-.insight-chip .ic-label {
-    color: var(--muted);
-    text-transform: uppercase;
-    letter-spacing: 0.08em;
-    margin-bottom: 0.2rem;
-}
-.insight-chip .ic-value {
-    font-family: var(--head-font);
-    font-size: 1rem; font-weight: 600;
-    color: var(--text);
-}
-
-/* Idle card */
-.idle-card {
-    background: var(--surface);
-    border: 1px dashed var(--border-hi);
-    border-radius: 14px;
-    padding: 3.5rem 2rem;
-    text-align: center; color: var(--muted);
-}
-.idle-icon { font-size: 2.8rem; margin-bottom: 1rem; opacity: 0.45; }
-.idle-head {
-    font-family: var(--head-font);
-    font-size: 1.2rem; color: #2a2a1a; margin-bottom: 0.4rem;
-}
-.idle-body { font-size: 0.8rem; line-height: 1.6; }
-
-/* ── Layout helpers ── */
-[data-testid="stHorizontalBlock"] {
-    gap: 1.4rem !important;
-    align-items: stretch !important;
-}
-.block-container {
-    padding-top: 1.5rem !important;
-    padding-bottom: 3rem !important;
-}
-hr { border: none !important; border-top: 1px solid var(--border) !important; margin: 1.5rem 0 !important; }
-</style>
-""", unsafe_allow_html=True)
+# Sent on full-page runs only: st.html puts a style-only block in the event
+# container (no layout space), and estimator reruns below don't re-send it.
+TRACER.phase("css")
+st.html(load_css())
 
 # ── Hero ──────────────────────────────────────────────────────────────────────
+TRACER.phase("hero")
 st.markdown(f"""
 <div class="hero">
     <div class="hero-tag">⬡ Real Estate Intelligence Platform</div>
@@ -490,155 +160,244 @@ st.markdown(f"""
     <div class="hero-badge">🏡</div>
 </div>
 <div class="acc-row">
-    <div class="acc-chip"><span>{train_r2*100:.1f}%</span> Train R² Score</div>
-    <div class="acc-chip"><span>{test_r2*100:.1f}%</span> Test R² Score</div>
-    <div class="acc-chip"><span>{n_samples:,}</span> Training Samples</div>
-    <div class="acc-chip"><span>8</span> Input Features</div>
-    <div class="acc-chip"><span>${test_mse*100000:.0f}</span> RMSE (×$100K)</div>
+    {hero_chips}
 </div>
 """, unsafe_allow_html=True)
 
-# ── Main Layout ───────────────────────────────────────────────────────────────
-form_col, result_col = st.columns([1.05, 0.95], gap="medium")
-
-with form_col:
-
-    # ── Section 01 : Household Demographics ──────────────────────────────────
-    st.markdown('<div class="section-label">01 — Household Demographics</div>', unsafe_allow_html=True)
-    st.markdown('<div class="form-panel">', unsafe_allow_html=True)
+# ── Price Map ─────────────────────────────────────────────────────────────────
+# Nested in the estimator, so a new estimate redraws it for the new profile,
+# while zoom / centre changes rerun only this fragment and read cached tiles.
+MAP_ZOOM  = {"State": 2, "Region": 1, "Local": 0}      # heatmap pyramid level
+MAP_SCALE = 8                                          # screen pixels per grid cell
+
+@st.fragment
+def price_map(predictor, version, profile, location):
+    import heatmap
+    from spatial import REGION_ANCHORS
+    standalone = not TRACER.in_rerun
+    if standalone:
+        TRACER.begin_rerun()
+        TRACER.count("fragment_reruns")
+
+    st.markdown('<div class="section-label">05 — Price Map</div>', unsafe_allow_html=True)
+    centres = {"Entered location": location,
+               **{f"{icon} {name}": points[0] for icon, name, points in REGION_ANCHORS}}
     c1, c2 = st.columns(2)
     with c1:
-        MedInc      = st.number_input("Median Income (×$10K)",      0.5,  15.0,  3.87, step=0.01, format="%.4f",
-                                       help="Median household income in tens of thousands of dollars")
-        HouseAge    = st.number_input("House Age (years)",           1.0,  52.0, 28.64, step=1.0,  format="%.1f",
-                                       help="Median age of houses in the block")
+        zoom = st.segmented_control("Zoom", list(MAP_ZOOM), default="State", key="map_zoom") or "State"
     with c2:
-        Population  = st.number_input("Block Population",           3.0, 35682.0, 1425.5, step=1.0, format="%.1f",
-                                       help="Total population in the block")
-        AveOccup    = st.number_input("Avg Occupancy (persons/house)", 0.5, 1243.0, 3.07, step=0.01, format="%.4f",
-                                       help="Average number of household members")
-    st.markdown('</div>', unsafe_allow_html=True)
-
-    # ── Section 02 : Property Characteristics ────────────────────────────────
-    st.markdown('<div class="section-label">02 — Property Characteristics</div>', unsafe_allow_html=True)
-    st.markdown('<div class="form-panel">', unsafe_allow_html=True)
-    c3, c4 = st.columns(2)
-    with c3:
-        AveRooms    = st.number_input("Avg Rooms per House",         0.85, 141.9,  5.43, step=0.01, format="%.4f",
-                                       help="Average number of rooms per household")
-        AveBedrms   = st.number_input("Avg Bedrooms per House",      0.33,  34.07, 1.10, step=0.01, format="%.4f",
-                                       help="Average number of bedrooms per household")
-    with c4:
-        st.markdown("""
-        <div style="background:rgba(245,158,11,0.05);border:1px solid rgba(245,158,11,0.15);
-                    border-radius:8px;padding:0.9rem 1rem;margin-top:1.8rem;font-size:0.78rem;
-                    color:#6a6040;line-height:1.7">
-            💡 <strong style="color:#a07820">Tip:</strong> Avg Bedrooms / Avg Rooms ratio
-            (ideally 0.15–0.25) indicates room composition quality.
-            Lower ratios often correlate with higher property values.
+        centre = st.selectbox("Centre", list(centres), key="map_centre", disabled=zoom == "State")
+    with TRACER.span("heatmap"):
+        cache  = load_surface_cache()
+        misses = cache.misses
+        surface = cache.get(predictor, version, profile, load_land_mask(version))
+        lat, lon = centres[centre] if zoom != "State" else (None, None)
+        prices, extent = surface.view(MAP_ZOOM[zoom], lat, lon)
+        image = heatmap.mark(heatmap.colorize(prices, scale=MAP_SCALE), extent, *location, MAP_SCALE)
+    source = (f"{surface.cells:,} cells predicted in {surface.seconds * 1000:.0f} ms"
+              if cache.misses > misses else "cached surface for this profile")
+    st.image(image, caption=f"Predicted value across {extent[0]:.1f}–{extent[1]:.1f}°N, "
+                            f"{-extent[3]:.1f}–{-extent[2]:.1f}°W for this household profile "
+                            f"(blue → amber → red: $0 → ${pricing.PRICE_SCALE_MAX / 1000:,.0f}K+; "
+                            f"✚ entered location) · {source}")
+
+    if standalone:
+        TRACER.end_rerun()
+
+# ── Estimator ─────────────────────────────────────────────────────────────────
+# The form and the result card are one fragment. Inputs sit in an st.form, so
+# editing them reruns nothing; submitting reruns only this function — the CSS
+# and hero above are neither rebuilt nor re-sent.
+@st.fragment
+def estimator(watcher, rendered_version):
+    from explain import FEATURE_LABELS, top_features
+    standalone = not TRACER.in_rerun                  # fragment-only rerun
+    if standalone:
+        TRACER.begin_rerun()
+        TRACER.count("fragment_reruns")
+
+    # Read the active triple once: this run predicts and reports on the same
+    # version even if the watcher swaps in a newer one meanwhile.
+    predictor, meta, model = watcher.current
+    if meta["version"] != rendered_version:
+        st.rerun()                                    # new model: redraw the hero too
+    prediction_cache = load_prediction_cache()
+    prediction_cache.bind(predictor, meta["version"])
+    explainer  = load_explainer(meta["version"], model)
+    interval_model = load_intervals(meta["version"], meta) if meta.get("extras") else None
+    importance = load_importance_cache().get(meta["version"], model)   # None until computed
+
+    TRACER.phase("form")
+    form_col, result_col = st.columns([1.05, 0.95], gap="medium")
+
+    with form_col, st.form("estimate", border=False):
+
+        # ── Section 01 : Household Demographics ──────────────────────────────
+        st.markdown('<div class="section-label">01 — Household Demographics</div>', unsafe_allow_html=True)
+        st.markdown('<div class="form-panel">', unsafe_allow_html=True)
+        c1, c2 = st.columns(2)
+        with c1:
+            MedInc      = st.number_input("Median Income (×$10K)",      *schema.BOUNDS["MedInc"],     3.87, step=0.01, format="%.4f",
+                                           help="Median household income in tens of thousands of dollars")
+            HouseAge    = st.number_input("House Age (years)",           *schema.BOUNDS["HouseAge"],  28.64, step=1.0,  format="%.1f",
+                                           help="Median age of houses in the block")
+        with c2:
+            Population  = st.number_input("Block Population",           *schema.BOUNDS["Population"], 1425.5, step=1.0, format="%.1f",
+                                           help="Total population in the block")
+            AveOccup    = st.number_input("Avg Occupancy (persons/house)", *schema.BOUNDS["AveOccup"], 3.07, step=0.01, format="%.4f",
+                                           help="Average number of household members")
+        st.markdown('</div>', unsafe_allow_html=True)
+
+        # ── Section 02 : Property Characteristics ────────────────────────────
+        st.markdown('<div class="section-label">02 — Property Characteristics</div>', unsafe_allow_html=True)
+        st.markdown('<div class="form-panel">', unsafe_allow_html=True)
+        c3, c4 = st.columns(2)
+        with c3:
+            AveRooms    = st.number_input("Avg Rooms per House",         *schema.BOUNDS["AveRooms"],   5.43, step=0.01, format="%.4f",
+                                           help="Average number of rooms per household")
+            AveBedrms   = st.number_input("Avg Bedrooms per House",      *schema.BOUNDS["AveBedrms"],  1.10, step=0.01, format="%.4f",
+                                           help="Average number of bedrooms per household")
+        with c4:
+            st.markdown("""
+            <div style="background:rgba(245,158,11,0.05);border:1px solid rgba(245,158,11,0.15);
+                        border-radius:8px;padding:0.9rem 1rem;margin-top:1.8rem;font-size:0.78rem;
+                        color:#6a6040;line-height:1.7">
+                💡 <strong style="color:#a07820">Tip:</strong> Avg Bedrooms / Avg Rooms ratio
+                (ideally 0.15–0.25) indicates room composition quality.
+                Lower ratios often correlate with higher property values.
+            </div>
+            """, unsafe_allow_html=True)
+        st.markdown('</div>', unsafe_allow_html=True)
+
+        # ── Section 03 : Geographic Location ─────────────────────────────────
+        st.markdown('<div class="section-label">03 — Geographic Location</div>', unsafe_allow_html=True)
+        st.markdown('<div class="form-panel">', unsafe_allow_html=True)
+        c5, c6 = st.columns(2)
+        with c5:
+            Latitude    = st.number_input("Latitude",   *schema.BOUNDS["Latitude"],   35.63, step=0.01, format="%.4f",
+                                           help="Block latitude — Southern CA (~32–34) vs Northern CA (~37–42)")
+        with c6:
+            Longitude   = st.number_input("Longitude", *schema.BOUNDS["Longitude"], -119.57, step=0.01, format="%.4f",
+                                           help="Block longitude — Coastal (-124 to -120) vs Inland (-120 to -114)")
+
+        # Quick location hint: grid-cell region + the nearest training blocks
+        region = load_region_grid().lookup(Latitude, Longitude)
+        comparables_html = ""
+        comparables = load_comparables(meta["version"])
+        if comparables is not None:
+            with TRACER.span("comparables"):
+                nearest = comparables.query(Latitude, Longitude, k=5)
+            prices = [c["price_usd"] for c in nearest]
+            comparables_html = f"""<br>
+            🏘️ {len(nearest)} nearest census blocks (≤ {nearest[-1]["distance_km"]:.1f} km):
+            <strong style="color:#38bdf8">median ${np.median(prices):,.0f}</strong>
+            · ${min(prices) / 1000:,.0f}K–${max(prices) / 1000:,.0f}K"""
+
+        st.markdown(f"""
+        <div style="background:rgba(56,189,248,0.06);border:1px solid rgba(56,189,248,0.15);
+                    border-radius:8px;padding:0.7rem 1rem;margin-top:0.3rem;font-size:0.8rem;
+                    color:#3a6070;letter-spacing:0.04em">
+            📍 Detected Region: <strong style="color:#38bdf8">{region}</strong>{comparables_html}
         </div>
         """, unsafe_allow_html=True)
-    st.markdown('</div>', unsafe_allow_html=True)
-
-    # ── Section 03 : Geographic Location ─────────────────────────────────────
-    st.markdown('<div class="section-label">03 — Geographic Location</div>', unsafe_allow_html=True)
-    st.markdown('<div class="form-panel">', unsafe_allow_html=True)
-    c5, c6 = st.columns(2)
-    with c5:
-        Latitude    = st.number_input("Latitude",   32.54,  41.95,  35.63, step=0.01, format="%.4f",
-                                       help="Block latitude — Southern CA (~32–34) vs Northern CA (~37–42)")
-    with c6:
-        Longitude   = st.number_input("Longitude", -124.35, -114.31, -119.57, step=0.01, format="%.4f",
-                                       help="Block longitude — Coastal (-124 to -120) vs Inland (-120 to -114)")
-
-    # Quick location hint
-    region = ""
-    if Latitude > 37.5:
-        region = "🌉 Northern California (Bay Area / Sacramento)"
-    elif Latitude > 34.5:
-        region = "🌴 Central California (Fresno / Central Valley)"
-    else:
-        region = "☀️ Southern California (LA / San Diego)"
-
-    st.markdown(f"""
-    <div style="background:rgba(56,189,248,0.06);border:1px solid rgba(56,189,248,0.15);
-                border-radius:8px;padding:0.7rem 1rem;margin-top:0.3rem;font-size:0.8rem;
-                color:#3a6070;letter-spacing:0.04em">
-        📍 Detected Region: <strong style="color:#38bdf8">{region}</strong>
-    </div>
-    """, unsafe_allow_html=True)
-    st.markdown('</div>', unsafe_allow_html=True)
-
-    st.markdown("<div style='height:0.5rem'></div>", unsafe_allow_html=True)
-    predict_btn = st.button("Estimate House Price →")
-
-# ── Result Column ─────────────────────────────────────────────────────────────
-with result_col:
-    st.markdown('<div class="section-label">04 — Price Estimate</div>', unsafe_allow_html=True)
-
-    if predict_btn:
-        input_data = np.array([[MedInc, HouseAge, AveRooms, AveBedrms,
-                                 Population, AveOccup, Latitude, Longitude]])
-        predicted  = model.predict(input_data)[0]          # value in $100K units
-        price_usd  = predicted * 100_000                   # convert to dollars
-
-        # Classify tier
-        if price_usd >= 350_000:
-            tier = "high"
-            tier_label = "Premium Market"
-            icon = "🏆"
-            bar_color_css = "background: linear-gradient(90deg, #b45309, #f59e0b); box-shadow: 0 0 10px rgba(245,158,11,0.5);"
-            pct_class = "amber"
-            card_class = "result-high"
-        elif price_usd >= 180_000:
-            tier = "mid"
-            tier_label = "Mid-Range Market"
-            icon = "🏠"
-            bar_color_css = "background: linear-gradient(90deg, #0369a1, #38bdf8); box-shadow: 0 0 10px rgba(56,189,248,0.5);"
-            pct_class = "sky"
-            card_class = "result-mid"
-        else:
-            tier = "low"
-            tier_label = "Affordable Market"
-            icon = "🏘️"
-            bar_color_css = "background: linear-gradient(90deg, #065f46, #10b981); box-shadow: 0 0 10px rgba(16,185,129,0.5);"
-            pct_class = "green"
-            card_class = "result-low"
-
-        # Format price
-        if price_usd >= 1_000_000:
-            price_str = f"${price_usd/1_000_000:.2f}M"
+        st.markdown('</div>', unsafe_allow_html=True)
+
+        st.markdown("<div style='height:0.5rem'></div>", unsafe_allow_html=True)
+        predict_btn = st.form_submit_button("Estimate House Price →", width="stretch")
+
+    # ── Result Column ─────────────────────────────────────────────────────────
+    TRACER.phase("result")
+    with result_col:
+        st.markdown('<div class="section-label">04 — Price Estimate</div>', unsafe_allow_html=True)
+
+        if predict_btn:
+            input_data = schema.coerce([[MedInc, HouseAge, AveRooms, AveBedrms,
+                                         Population, AveOccup, Latitude, Longitude]])
+            with TRACER.span("predict"):
+                predicted = prediction_cache.predict(input_data)[0]  # value in $100K units
+                quantiles = interval_model.predict(input_data)[0] if interval_model else None
+            price_usd  = predicted * 100_000                   # convert to dollars
+
+            # Classify tier & format price (same vectorized code as batch/API paths)
+            tier_info  = {k: v[0] for k, v in pricing.classify([price_usd]).items()}
+            tier_label = tier_info["label"]
+            icon       = tier_info["icon"]
+            pct_class  = tier_info["price_class"]
+            card_class = tier_info["card_class"]
+            price_str  = pricing.format_prices([price_usd])[0]
+
+            # Insight chips: the three features that moved this estimate most, plus
+            # the model's strongest driver overall
+            with TRACER.span("explain"):
+                contribs = explainer.contributions(input_data)[0]
+            chips = [(FEATURE_LABELS[name], f"{'+' if value >= 0 else '−'}${abs(value) * 100_000:,.0f}")
+                     for name, value in top_features(contribs, 3, explainer.feature_names)]
+            if importance:
+                chips.append(("Top Driver · Overall", FEATURE_LABELS[max(importance, key=importance.get)]))
+            else:
+                chips.append(("Baseline Value", f"${contribs[-1] * 100_000:,.0f}"))
+            insights = "".join(f'<div class="insight-chip"><div class="ic-label">{label}</div>'
+                               f'<div class="ic-value">{value}</div></div>' for label, value in chips)
+
+            # Range bar: the quantile band and the point estimate on a $0–$500K+ scale
+            price_range = ""
+            if quantiles is not None:
+                low_usd, high_usd = quantiles[0] * 100_000, quantiles[-1] * 100_000
+                low_str, high_str = pricing.format_prices([low_usd, high_usd])
+                pct = lambda usd: min(max(usd / pricing.PRICE_SCALE_MAX * 100, 0.0), 100.0)
+                coverage = round((interval_model.alphas[-1] - interval_model.alphas[0]) * 100)
+                price_range = f"""
+                <div class="price-range-wrap">
+                    <div class="price-range-label"><span>{low_str}</span><span>{coverage}% range</span><span>{high_str}</span></div>
+                    <div class="price-range-track">
+                        <div class="price-range-fill" style="left:{pct(low_usd):.1f}%;width:{pct(high_usd) - pct(low_usd):.1f}%;{tier_info['bar_css']}"></div>
+                        <div class="price-range-dot" style="left:{pct(price_usd):.1f}%;color:var(--{pct_class});background:currentColor"></div>
+                    </div>
+                </div>"""
+
+            st.markdown(f"""
+            <div class="result-wrap">
+            <div class="{card_class}">
+                <span class="result-icon">{icon}</span>
+                <div class="result-verdict">{tier_label}</div>
+                <div class="result-price {pct_class}">{price_str}</div>
+                <div class="result-sub">Predicted median house value</div>{price_range}
+                <div class="insight-row">{insights}</div>
+            </div>
+            </div>
+            """, unsafe_allow_html=True)
+
         else:
-            price_str = f"${price_usd:,.0f}"
+            st.markdown("""
+            <div class="idle-card">
+                <div class="idle-icon">◈</div>
+                <div class="idle-head">Awaiting Estimate</div>
+                <div class="idle-body">
+                    Fill in the property details across<br>
+                    the three sections on the left,<br>
+                    then click <em>Estimate House Price</em>.
+                </div>
+            </div>""", unsafe_allow_html=True)
 
-        st.markdown(f"""
-        <div class="result-wrap">
-        <div class="{card_class}">
-            <span class="result-icon">{icon}</span>
-            <div class="result-verdict">{tier_label}</div>
-            <div class="result-price {pct_class}">{price_str}</div>
-            <div class="result-sub">Predicted median house value</div>
-        </div>
+        st.markdown("""
+        <div style="margin-top:2rem;font-size:0.72rem;color:#3a3010;
+                    border-top:1px solid #1c2535;padding-top:1rem;line-height:1.7">
+            Predictions are based on the 1990 California Census and are for
+            educational purposes only. Actual market values may differ significantly.
+            Consult a licensed real estate professional for accurate valuations.
         </div>
         """, unsafe_allow_html=True)
 
-    else:
-        st.markdown("""
-        <div class="idle-card">
-            <div class="idle-icon">◈</div>
-            <div class="idle-head">Awaiting Estimate</div>
-            <div class="idle-body">
-                Fill in the property details across<br>
-                the three sections on the left,<br>
-                then click <em>Estimate House Price</em>.
-            </div>
-        </div>""", unsafe_allow_html=True)
-
-    st.markdown("""
-    <div style="margin-top:2rem;font-size:0.72rem;color:#3a3010;
-                border-top:1px solid #1c2535;padding-top:1rem;line-height:1.7">
-        Predictions are based on the 1990 California Census and are for
-        educational purposes only. Actual market values may differ significantly.
-        Consult a licensed real estate professional for accurate valuations.
-    </div>
-    """, unsafe_allow_html=True)
\ No newline at end of file
+    price_map(predictor, meta["version"],
+              [MedInc, HouseAge, AveRooms, AveBedrms, Population, AveOccup, Latitude, Longitude],
+              (Latitude, Longitude))
+
+    if standalone:
+        TRACER.end_rerun()
+
+estimator(watcher, meta["version"])
+
+# ── Instrumentation ───────────────────────────────────────────────────────────
+TRACER.end_rerun()
+if profiler.active:
+    st.caption(f"cProfile for this rerun written to {profiler.stop()}")
@@ -0,0 +1,128 @@
+import argparse
+import asyncio
+import json
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+import model_store
+
+# ── Load Test ─────────────────────────────────────────────────────────────────
+#   python loadtest.py                        # spawn serve.py with/without batching
+#   python loadtest.py --url 127.0.0.1:8080   # hit an already running server
+#
+# Each of --concurrency clients keeps one keep-alive connection open and sends
+# single-row /predict requests back to back for --duration seconds.
+LOW  = np.array([0.5,  1.0,  0.85, 0.33,    3.0, 0.5, 32.54, -124.35])
+HIGH = np.array([15.0, 52.0, 10.0, 2.0,  5000.0, 6.0, 41.95, -114.31])
+
+
+async def _client(host, port, deadline, latencies, rng):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        while time.perf_counter() < deadline:
+            row = dict(zip(model_store.FEATURE_NAMES, rng.uniform(LOW, HIGH).tolist()))
+            body = json.dumps(row).encode()
+            start = time.perf_counter()
+            writer.write(b"POST /predict HTTP/1.1\r\nHost: x\r\nContent-Type: application/json\r\n"
+                         b"Content-Length: %d\r\n\r\n%s" % (len(body), body))
+            await writer.drain()
+            length = 0
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b""):
+                    break
+                if line.lower().startswith(b"content-length:"):
+                    length = int(line.split(b":")[1])
+            await reader.readexactly(length)
+            latencies.append(time.perf_counter() - start)
+    finally:
+        writer.close()
+
+
+async def run_load(host, port, concurrency, duration, seed=0):
+    latencies = []
+    deadline = time.perf_counter() + duration
+    start = time.perf_counter()
+    await asyncio.gather(*(
+        _client(host, port, deadline, latencies, np.random.default_rng(seed + i))
+        for i in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    lat_ms = np.array(latencies) * 1000
+    return {
+        "requests": len(lat_ms),
+        "rps":      len(lat_ms) / elapsed,
+        "p50_ms":   float(np.percentile(lat_ms, 50)) if len(lat_ms) else float("nan"),
+        "p99_ms":   float(np.percentile(lat_ms, 99)) if len(lat_ms) else float("nan"),
+    }
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _wait_ready(port, proc, timeout=60):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"serve.py exited with code {proc.returncode}")
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.2):
+                return
+        except OSError:
+            time.sleep(0.1)
+    raise TimeoutError(f"serve.py did not start listening on port {port}")
+
+
+def spawn_and_measure(label, serve_args, args):
+    port = _free_port()
+    cmd = [sys.executable, str(Path(__file__).with_name("serve.py")),
+           "--port", str(port), "--model-dir", args.model_dir, *serve_args]
+    proc = subprocess.Popen(cmd, stdout=subprocess.DEVNULL)
+    try:
+        _wait_ready(port, proc)
+        stats = asyncio.run(run_load("127.0.0.1", port, args.concurrency, args.duration))
+    finally:
+        proc.terminate()
+        proc.wait()
+    return label, stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load-test the /predict endpoint.")
+    parser.add_argument("--url", default=None,
+                        help="host:port of a running server (default: spawn serve.py)")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds per run")
+    parser.add_argument("--batch-window-ms", type=float, default=2.0)
+    parser.add_argument("--max-batch", type=int, default=256)
+    parser.add_argument("--model-dir", default=str(model_store.ARTIFACT_ROOT))
+    args = parser.parse_args(argv)
+
+    if args.url:
+        host, _, port = args.url.rpartition(":")
+        results = [("target", asyncio.run(
+            run_load(host or "127.0.0.1", int(port), args.concurrency, args.duration)))]
+    else:
+        results = [
+            spawn_and_measure("no batching", ["--batch-window-ms", "0"], args),
+            spawn_and_measure(f"batching {args.batch_window_ms:g}ms",
+                              ["--batch-window-ms", str(args.batch_window_ms),
+                               "--max-batch", str(args.max_batch)], args),
+        ]
+
+    print(f"{'mode':<18}{'requests':>10}{'req/s':>10}{'p50 ms':>10}{'p99 ms':>10}")
+    for label, s in results:
+        print(f"{label:<18}{s['requests']:>10,}{s['rps']:>10,.0f}"
+              f"{s['p50_ms']:>10.2f}{s['p99_ms']:>10.2f}")
+    return results
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+import transforms
+from schema import FEATURE_NAMES
+
+# ── Artifact Layout ───────────────────────────────────────────────────────────
+#   artifacts/
+#     LATEST                      ← name of the active version directory
+#     20240101T120000-3fa4c2d1e0b9/
+#       model.ubj                 ← XGBoost native booster (ubj or json)
+#       quantiles.ubj             ← optional extra boosters (see save_model extras)
+#       spatial.pkl, drift.json   ← side files written by publish() before promotion
+#       meta.json                 ← feature order, metrics, sha256, params, lineage,
+#                                   derived-feature transform (also inside the model file)
+ARTIFACT_ROOT = Path(os.environ.get("HOUSE_MODEL_DIR",
+                                    Path(__file__).resolve().parent / "artifacts"))
+META_FILE   = "meta.json"
+LATEST_FILE = "LATEST"
+# xgboost (which drags in sklearn, scipy and pandas, ~1.3 s) is imported by the
+# functions that load or save boosters, not here: reading meta.json, LATEST or
+# FEATURE_NAMES stays cheap.
+
+
+def _sha256(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for block in iter(lambda: fh.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def _write_atomic(path, text):
+    tmp = path.with_name(f".{path.name}.tmp")
+    tmp.write_text(text)
+    os.replace(tmp, path)
+
+
+def save_model(model, scores, root=ARTIFACT_ROOT, fmt="ubj", params=None, lineage=None,
+               promote=True, extras=None):
+    """Write a trained model as a new versioned artifact and mark it LATEST.
+
+    The version name is the UTC timestamp plus the first 12 hex digits of the
+    booster's sha256, so identical boosters are easy to spot across versions.
+    ``lineage`` records the parent of an incrementally updated model; with
+    ``promote=False`` the version is written but LATEST is left alone.
+    ``extras`` maps a name to another booster saved alongside (``<name>.<fmt>``),
+    e.g. the quantile model; ``load_extra`` reads one back.
+    """
+    if fmt not in ("ubj", "json"):
+        raise ValueError(f"unsupported model format: {fmt!r}")
+    root = Path(root)
+    root.mkdir(parents=True, exist_ok=True)
+
+    from xgboost import __version__ as xgb_version
+    staging = Path(tempfile.mkdtemp(prefix=".staging-", dir=root))
+    try:
+        model_file = f"model.{fmt}"
+        booster = model.get_booster() if hasattr(model, "get_booster") else model
+        booster.save_model(staging / model_file)
+        transform = transforms.for_model(booster)
+        digest  = _sha256(staging / model_file)
+        extra_files = {}
+        for name, extra in (extras or {}).items():
+            extra_file = f"{name}.{fmt}"
+            extra.save_model(staging / extra_file)
+            extra_files[name] = {"file": extra_file, "sha256": _sha256(staging / extra_file)}
+        version = f"{time.strftime('%Y%m%dT%H%M%S', time.gmtime())}-{digest[:12]}"
+        meta = {
+            "version":        version,
+            "model_file":     model_file,
+            "sha256":         digest,
+            "feature_names":  FEATURE_NAMES,
+            "transform":      transform.to_dict() if transform is not None else None,
+            "metrics":        scores,
+            "params":         params or {},
+            "lineage":        lineage,
+            "extras":         extra_files,
+            "xgboost":        xgb_version,
+            "created_at":     time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        }
+        (staging / META_FILE).write_text(json.dumps(meta, indent=2))
+        target = root / version
+        if target.exists():
+            shutil.rmtree(target)
+        os.replace(staging, target)
+    except BaseException:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+
+    if promote:
+        promote_version(version, root)
+    return target
+
+
+def publish(version_dir, side_files=(), root=ARTIFACT_ROOT, promote=True):
+    """Save each side file into a version written with ``promote=False``, then promote it.
+
+    ``side_files`` are objects with ``save(version_dir)`` (the comparables index,
+    the drift reference); None entries are skipped. Watchers read side files once
+    per version, so every training entry point publishes through here and LATEST
+    only ever names a complete version.
+    """
+    version_dir = Path(version_dir)
+    for side_file in side_files:
+        if side_file is not None:
+            side_file.save(version_dir)
+    if promote:
+        promote_version(version_dir.name, root)
+    return version_dir
+
+
+def promote_version(version, root=ARTIFACT_ROOT):
+    """Point LATEST at an existing version."""
+    root = Path(root)
+    if not (root / version / META_FILE).exists():
+        raise FileNotFoundError(f"artifact {version!r} has no {META_FILE} in {root}")
+    _write_atomic(root / LATEST_FILE, version + "\n")
+
+
+def latest_version(root=ARTIFACT_ROOT):
+    pointer = Path(root) / LATEST_FILE
+    if not pointer.exists():
+        return None
+    return pointer.read_text().strip() or None
+
+
+def read_meta(version=None, root=ARTIFACT_ROOT):
+    root = Path(root)
+    version = version or latest_version(root)
+    if version is None:
+        raise FileNotFoundError(f"no model artifact in {root} — run `python train.py` first")
+    meta_path = root / version / META_FILE
+    if not meta_path.exists():
+        raise FileNotFoundError(f"artifact {version!r} has no {META_FILE} in {root}")
+    return json.loads(meta_path.read_text())
+
+
+def load_model(version=None, root=ARTIFACT_ROOT):
+    """Load a saved artifact; returns ``(model, meta)``.
+
+    The booster file is checked against the sha256 recorded at save time and
+    its feature order against ``FEATURE_NAMES`` before it is handed back.
+    """
+    meta = read_meta(version, root)
+    model_path = Path(root) / meta["version"] / meta["model_file"]
+    digest = _sha256(model_path)
+    if digest != meta["sha256"]:
+        raise ValueError(f"artifact {meta['version']!r} is corrupt: "
+                         f"sha256 {digest[:12]}… != {meta['sha256'][:12]}…")
+    if meta["feature_names"] != FEATURE_NAMES:
+        raise ValueError(f"artifact {meta['version']!r} feature order "
+                         f"{meta['feature_names']} does not match {FEATURE_NAMES}")
+
+    from xgboost import XGBRegressor
+    model = XGBRegressor()
+    model.load_model(model_path)
+    return model, meta
+
+
+def load_extra(meta, name, root=ARTIFACT_ROOT):
+    """Load the extra booster ``name`` of an artifact, or None if it has none."""
+    entry = (meta.get("extras") or {}).get(name)
+    if entry is None:
+        return None
+    path = Path(root) / meta["version"] / entry["file"]
+    digest = _sha256(path)
+    if digest != entry["sha256"]:
+        raise ValueError(f"artifact {meta['version']!r} {name} model is corrupt: "
+                         f"sha256 {digest[:12]}… != {entry['sha256'][:12]}…")
+    from xgboost import Booster
+    return Booster(model_file=path)
@@ -0,0 +1,122 @@
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+
+import backends
+import model_store
+import transforms
+
+# ── Hot-swappable Model ───────────────────────────────────────────────────────
+#   watcher = ModelWatcher(root, backend="auto", interval=2.0).start()
+#   predictor, meta, model = watcher.current      # read once per request
+#
+# A daemon thread polls <root>/LATEST. When it names a new version the artifact
+# is loaded off the request path, its booster checked against the feature schema
+# (plus the derived columns of its saved transform), a smoke row predicted, and
+# only then is the (predictor, meta, model) triple replaced — one reference
+# assignment, so readers see the old triple or the new one, never a mix. A
+# request that already took the old one finishes on it.
+# A candidate that fails any check is skipped and the active model stays put.
+# One that is missing a file (e.g. model.compact under --backend compact, before
+# compress.py has run) is not ready rather than bad: it is retried every poll.
+SMOKE_ROW = np.array([[3.87, 28.6, 5.43, 1.10, 1425.0, 3.07, 35.6, -119.6]])
+
+
+def validate(model, meta, predictor):
+    """Raise ValueError unless the booster matches the schema and predicts sanely."""
+    booster = model.get_booster() if hasattr(model, "get_booster") else model
+    expected = transforms.input_names(booster)       # raw 8, or raw + derived
+    if booster.feature_names is not None and list(booster.feature_names) != expected:
+        raise ValueError(f"model {meta['version']!r} has features {booster.feature_names}, "
+                         f"expected {expected}")
+    if booster.num_features() != len(expected):
+        raise ValueError(f"model {meta['version']!r} takes {booster.num_features()} features, "
+                         f"expected {len(expected)}")
+    out = np.asarray(predictor.predict(SMOKE_ROW))
+    if out.shape != (1,) or not np.isfinite(out).all():
+        raise ValueError(f"model {meta['version']!r} smoke prediction returned {out!r}")
+
+
+class ModelWatcher:
+    def __init__(self, root=model_store.ARTIFACT_ROOT, backend="auto", interval=2.0,
+                 on_swap=None):
+        self.root     = Path(root)
+        self.backend  = backend
+        self.interval = interval
+        self.on_swap  = on_swap
+        self.current  = None                     # (predictor, meta, model) — swapped atomically
+        self.swaps    = 0
+        self.failures = 0
+        self.last_error = None
+        self.loaded_at  = None
+        self._rejected  = None                   # last version that failed validation
+        self._lock    = threading.Lock()         # one load at a time
+        self._stop    = threading.Event()
+        self._thread  = None
+
+    @property
+    def version(self):
+        return self.current[1]["version"] if self.current else None
+
+    def load(self, version=None):
+        """Load, validate and install ``version`` (default LATEST). Raises on failure."""
+        with self._lock:
+            model, meta = model_store.load_model(version, self.root)
+            if meta["version"] == self.version:
+                return False
+            predictor = backends.load_backend(self.backend, model, self.root / meta["version"])
+            validate(model, meta, predictor)
+            self.install(model, meta, predictor)
+            return True
+
+    def install(self, model, meta, predictor=None):
+        """Make ``model`` the active one (e.g. a model trained in-process)."""
+        predictor = predictor or backends.load_backend(self.backend, model)
+        first = self.current is None
+        self.current   = (predictor, meta, model)
+        self.loaded_at = time.time()
+        if not first:
+            self.swaps += 1
+        if self.on_swap is not None:
+            self.on_swap(predictor, meta, model)
+
+    def check(self):
+        """Poll LATEST once; returns True if a new version was swapped in."""
+        version = model_store.latest_version(self.root)
+        if version is None or version in (self.version, self._rejected):
+            return False
+        try:
+            return self.load(version)
+        except FileNotFoundError as exc:         # not complete yet: retry next poll
+            self.last_error = f"{version}: {exc}"
+            return False
+        except Exception as exc:                 # keep serving the active model
+            self.failures  += 1
+            self.last_error = f"{version}: {exc}"
+            self._rejected  = version
+            return False
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.check()
+
+    def start(self, load=True):
+        """Load LATEST synchronously (unless ``load=False``), then start watching."""
+        if load:
+            self.load()
+        if self.interval and self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="model-watcher", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def stats(self):
+        return {"version": self.version, "swaps": self.swaps, "failures": self.failures,
+                "last_error": self.last_error, "loaded_at": self.loaded_at}
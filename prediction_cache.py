@@ -0,0 +1,104 @@
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+# ── Prediction Cache ──────────────────────────────────────────────────────────
+# LRU + TTL cache in front of model.predict. Rows are quantized to the display
+# precision of the matching st.number_input (%.4f / %.1f) and predicted on the
+# quantized values, so a cached result is exactly what the model returns for
+# its key. Binding a different model version clears every entry.
+FEATURE_DECIMALS = (4, 1, 4, 4, 1, 4, 4, 4)   # MedInc … Longitude
+
+
+class PredictionCache:
+    def __init__(self, model, version, max_entries=100_000, ttl=None,
+                 decimals=FEATURE_DECIMALS):
+        self.max_entries = max_entries
+        self.ttl         = ttl
+        self._scale      = 10.0 ** np.asarray(decimals, dtype=np.float64)
+        self._entries    = OrderedDict()           # key → (prediction, stored_at)
+        self._lock       = threading.Lock()
+        self.hits = self.misses = self.evictions = self.expirations = 0
+        self.model   = None
+        self.version = None
+        self.bind(model, version)
+
+    def bind(self, model, version):
+        with self._lock:
+            if version != self.version:
+                self._entries.clear()
+            self.model, self.version = model, version
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def quantize(self, X):
+        """Integer grid coordinates of each row at display precision."""
+        return np.rint(np.asarray(X, dtype=np.float64) * self._scale).astype(np.int64)
+
+    def _keys(self, grid):
+        grid = np.ascontiguousarray(grid)
+        return grid.view(np.dtype((np.void, grid.shape[1] * 8))).ravel().tolist()
+
+    def predict(self, X, model=None):
+        """Cached predictions of the bound model; another ``model`` (one a request
+        captured before a rebind) is predicted directly and never cached."""
+        grid = self.quantize(np.atleast_2d(X))
+        keys = self._keys(grid)
+        out  = np.empty(len(keys), dtype=np.float32)
+        now  = time.monotonic()
+
+        miss_idx = []
+        with self._lock:
+            if model is None:
+                model = self.model
+            stale = model is not self.model
+            for i, key in enumerate(keys):
+                entry = None if stale else self._entries.get(key)
+                if entry is not None and self.ttl is not None and now - entry[1] > self.ttl:
+                    del self._entries[key]
+                    self.expirations += 1
+                    entry = None
+                if entry is None:
+                    miss_idx.append(i)
+                else:
+                    self._entries.move_to_end(key)
+                    out[i] = entry[0]
+            self.hits   += len(keys) - len(miss_idx)
+            self.misses += len(miss_idx)
+
+        if miss_idx:
+            miss_idx = np.asarray(miss_idx)
+            # duplicate rows inside one batch are predicted once
+            uniq, first, inverse = np.unique(grid[miss_idx], axis=0,
+                                             return_index=True, return_inverse=True)
+            preds = model.predict(uniq / self._scale)
+            out[miss_idx] = preds[inverse.ravel()]
+            with self._lock:
+                if model is self.model:          # skip stale results after a rebind
+                    for j, row in enumerate(first):
+                        self._entries[keys[miss_idx[row]]] = (preds[j], now)
+                    overflow = len(self._entries) - self.max_entries
+                    for _ in range(max(overflow, 0)):
+                        self._entries.popitem(last=False)
+                        self.evictions += 1
+        return out
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "version":     self.version,
+            "entries":     len(self._entries),
+            "max_entries": self.max_entries,
+            "hits":        self.hits,
+            "misses":      self.misses,
+            "evictions":   self.evictions,
+            "expirations": self.expirations,
+            "hit_rate":    self.hits / lookups if lookups else 0.0,
+        }
@@ -0,0 +1,71 @@
+import numpy as np
+
+# ── Market Tiers ──────────────────────────────────────────────────────────────
+# Tiers are bins over the predicted price in dollars. TIER_EDGES are the lower
+# bounds of every tier after the first, so a price equal to an edge falls into
+# the higher tier (>= 180K → mid, >= 350K → high).
+TIER_EDGES = (180_000, 350_000)
+PRICE_SCALE_MAX = 500_000          # the census table caps MedHouseVal at $500,001
+
+TIERS        = np.array(["low", "mid", "high"])
+TIER_LABELS  = np.array(["Affordable Market", "Mid-Range Market", "Premium Market"])
+TIER_ICONS   = np.array(["🏘️", "🏠", "🏆"])
+CARD_CLASSES = np.array(["result-low", "result-mid", "result-high"])
+PRICE_CLASSES = np.array(["green", "sky", "amber"])
+BAR_CSS      = np.array([
+    "background: linear-gradient(90deg, #065f46, #10b981); box-shadow: 0 0 10px rgba(16,185,129,0.5);",
+    "background: linear-gradient(90deg, #0369a1, #38bdf8); box-shadow: 0 0 10px rgba(56,189,248,0.5);",
+    "background: linear-gradient(90deg, #b45309, #f59e0b); box-shadow: 0 0 10px rgba(245,158,11,0.5);",
+])
+
+
+def tier_codes(price_usd, edges=TIER_EDGES):
+    """Tier index per price: 0 = low … len(edges) = highest tier."""
+    edges = np.asarray(edges, dtype=np.float64)
+    if edges.ndim != 1 or np.any(np.diff(edges) <= 0):
+        raise ValueError(f"tier edges must be strictly increasing, got {edges.tolist()}")
+    if len(edges) + 1 != len(TIERS):
+        raise ValueError(f"expected {len(TIERS) - 1} tier edges, got {len(edges)}")
+    return np.searchsorted(edges, np.asarray(price_usd, dtype=np.float64), side="right")
+
+
+def classify(price_usd, edges=TIER_EDGES):
+    codes = tier_codes(price_usd, edges)
+    return {
+        "code":        codes,
+        "tier":        TIERS[codes],
+        "label":       TIER_LABELS[codes],
+        "icon":        TIER_ICONS[codes],
+        "card_class":  CARD_CLASSES[codes],
+        "price_class": PRICE_CLASSES[codes],
+        "bar_css":     BAR_CSS[codes],
+    }
+
+
+# ── Price Formatting ──────────────────────────────────────────────────────────
+# $1.23M at or above one million, otherwise whole dollars with thousands
+# separators ($245,300) — the same strings as f"${p/1e6:.2f}M" / f"${p:,.0f}".
+# Digit groups come from lookup tables, so only the millions part pays for an
+# int → str conversion.
+_GROUP   = np.array([str(i) for i in range(1000)])
+_GROUP03 = np.array([f"{i:03d}" for i in range(1000)])
+_CENTS   = np.array([f".{i:02d}M" for i in range(100)])
+
+
+def format_prices(price_usd):
+    p = np.asarray(price_usd, dtype=np.float64)
+    add = np.char.add
+
+    cents = np.rint(np.abs(p) / 10_000).astype(np.int64)       # hundredths of $1M
+    millions = add(add("$", (cents // 100).astype(str)), _CENTS[cents % 100])
+
+    r    = np.rint(np.abs(p)).astype(np.int64)
+    head = np.minimum(r // 1_000_000, 999)                      # ≤ 1 where it is used
+    mid  = (r // 1_000) % 1_000
+    low  = r % 1_000
+    body = np.where(
+        head > 0, add(add(_GROUP[head], ","), add(add(_GROUP03[mid], ","), _GROUP03[low])),
+        np.where(mid > 0, add(add(_GROUP[mid], ","), _GROUP03[low]), _GROUP[low]))
+    plain = add(np.where(p < 0, "$-", "$"), body)
+
+    return np.where(p >= 1_000_000, millions, plain)
@@ -0,0 +1,159 @@
+import cProfile
+import json
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from pathlib import Path
+
+# ── Rerun Instrumentation ─────────────────────────────────────────────────────
+# Named timing spans around each phase of a Streamlit rerun, plus counters.
+# Stdlib only, so it can be imported before streamlit/pandas/xgboost and time
+# those imports too.
+#
+#   HOUSE_PROFILE_EXPORT=jsonl:/tmp/spans.jsonl   one JSON line per rerun
+#   HOUSE_PROFILE_EXPORT=prom:/tmp/house.prom     Prometheus textfile, rewritten per rerun
+#   HOUSE_PROFILE_DIR=profiles                    where ?profile=1 cProfile dumps go
+#
+# Open the app with ?profile=1 (or set HOUSE_PROFILE_RERUN=1) to dump a cProfile
+# of that rerun; load it with `python -m pstats` or snakeviz. Nothing is hooked
+# otherwise, so an external sampler (`py-spy record --pid <streamlit pid>`) sees
+# the undisturbed app and the span offsets line up with its timeline.
+EXPORT      = os.environ.get("HOUSE_PROFILE_EXPORT", "")
+PROFILE_DIR = Path(os.environ.get("HOUSE_PROFILE_DIR", "profiles"))
+QUANTILE_WINDOW = 1024
+
+
+class Tracer:
+    def __init__(self, export=EXPORT):
+        self.export_kind, _, path = export.partition(":")
+        self.export_path = Path(path) if path else None
+        self._local    = threading.local()
+        self._lock     = threading.Lock()
+        self.counters  = defaultdict(int)
+        self.totals    = defaultdict(float)
+        self.counts    = defaultdict(int)
+        self.recent    = defaultdict(lambda: deque(maxlen=QUANTILE_WINDOW))
+        self.reruns    = 0
+
+    # ── Spans ─────────────────────────────────────────────────────────────────
+    def begin_rerun(self):
+        self._local.spans = []
+        self._local.phase = None
+        self._local.start = time.perf_counter()
+
+    @property
+    def in_rerun(self):
+        """True between ``begin_rerun`` and ``end_rerun`` on this thread."""
+        return getattr(self._local, "spans", None) is not None
+
+    def phase(self, name):
+        """Close the running phase (if any) and start ``name``.
+
+        Phases are sequential top-level sections of the script; ``end_rerun``
+        closes the last one. Use ``span`` for anything nested inside a phase.
+        """
+        now = time.perf_counter()
+        current = getattr(self._local, "phase", None)
+        if current is not None:
+            self.record(current[0], now - current[1], current[1])
+        self._local.phase = (name, now)
+
+    @contextmanager
+    def span(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start, start)
+
+    def record(self, name, seconds, start=None):
+        spans = getattr(self._local, "spans", None)
+        if spans is not None:
+            offset = (start - self._local.start) if start is not None else None
+            spans.append({"span": name, "ms": round(seconds * 1000, 3),
+                          "offset_ms": None if offset is None else round(offset * 1000, 3)})
+        with self._lock:
+            self.totals[name] += seconds
+            self.counts[name] += 1
+            self.recent[name].append(seconds)
+
+    def count(self, name, n=1):
+        with self._lock:
+            self.counters[name] += n
+
+    def end_rerun(self):
+        spans = getattr(self._local, "spans", None)
+        if spans is None:
+            return None
+        self.phase(None)
+        total = time.perf_counter() - self._local.start
+        self._local.spans = None
+        self._local.phase = None
+        self.record("rerun", total)
+        with self._lock:
+            self.reruns += 1
+            rerun = {"rerun": self.reruns, "ts": time.time(),
+                     "total_ms": round(total * 1000, 3), "spans": spans}
+        self._export(rerun)
+        return rerun
+
+    # ── Export ────────────────────────────────────────────────────────────────
+    def _export(self, rerun):
+        if self.export_path is None:
+            return
+        self.export_path.parent.mkdir(parents=True, exist_ok=True)
+        if self.export_kind == "jsonl":
+            with self._lock, open(self.export_path, "a") as fh:
+                fh.write(json.dumps(rerun) + "\n")
+        elif self.export_kind == "prom":
+            tmp = self.export_path.with_name(f".{self.export_path.name}.tmp")
+            tmp.write_text(self.prometheus())
+            os.replace(tmp, self.export_path)
+
+    def prometheus(self):
+        lines = ["# TYPE house_span_seconds summary"]
+        with self._lock:
+            for name in sorted(self.totals):
+                window = sorted(self.recent[name])
+                for q in (0.5, 0.99):
+                    value = window[min(len(window) - 1, int(q * len(window)))]
+                    lines.append(f'house_span_seconds{{span="{name}",quantile="{q}"}} {value:.6f}')
+                lines.append(f'house_span_seconds_sum{{span="{name}"}} {self.totals[name]:.6f}')
+                lines.append(f'house_span_seconds_count{{span="{name}"}} {self.counts[name]}')
+            for name in sorted(self.counters):
+                lines.append(f"house_{name}_total {self.counters[name]}")
+        return "\n".join(lines) + "\n"
+
+
+TRACER = Tracer()
+
+
+# ── cProfile ──────────────────────────────────────────────────────────────────
+class RerunProfiler:
+    """Profile everything between ``start()`` and ``stop()`` into one .prof file."""
+
+    def __init__(self, directory=PROFILE_DIR):
+        self.directory = Path(directory)
+        self._profile  = None
+
+    @property
+    def active(self):
+        return self._profile is not None
+
+    def start(self):
+        if self._profile is not None:
+            return
+        self._profile = cProfile.Profile()
+        self._profile.enable()
+
+    def stop(self):
+        if self._profile is None:
+            return None
+        self._profile.disable()
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self.directory / f"rerun-{time.strftime('%Y%m%dT%H%M%S')}-{os.getpid()}.prof"
+        self._profile.dump_stats(path)
+        self._profile = None
+        return path
@@ -0,0 +1,168 @@
+import argparse
+import time
+import tracemalloc
+from collections import namedtuple
+
+import numpy as np
+
+# ── Feature Schema ────────────────────────────────────────────────────────────
+#   X = schema.from_frame(frame)                 # (n, 8) C-contiguous float32
+#   X, ok = schema.validate(X, "clip")           # clip in place / flag bad rows
+#   booster.inplace_predict(X)                   # no conversion, no copy
+#
+# The 8 model inputs in model order, with the bounds the app's number inputs
+# enforce. The bounds cover the census table's full range (MedInc and the
+# ratios are stored unrounded, e.g. 15.0001 and 1243.333), and the synthetic
+# generator clips to within them, so no training row is ever out of range. Every path (app, API, batch) builds the same float32 buffer: XGBoost
+# evaluates splits in float32 anyway, so predictions are unchanged, the matrix
+# is half the size, and inplace_predict reads it without converting.
+Feature = namedtuple("Feature", "name low high")
+
+FEATURES = (
+    Feature("MedInc",      0.4999,  15.0001),
+    Feature("HouseAge",    1.0,     52.0),
+    Feature("AveRooms",    0.846,  141.91),
+    Feature("AveBedrms",   0.333,   34.07),
+    Feature("Population",  3.0,  35682.0),
+    Feature("AveOccup",    0.5,   1243.34),
+    Feature("Latitude",   32.54,    41.95),
+    Feature("Longitude", -124.35, -114.31),
+)
+FEATURE_NAMES = [f.name for f in FEATURES]
+BOUNDS = {f.name: (f.low, f.high) for f in FEATURES}
+DTYPE  = np.float32
+LOW    = np.array([f.low for f in FEATURES], dtype=DTYPE)
+HIGH   = np.array([f.high for f in FEATURES], dtype=DTYPE)
+
+
+def bounds(dtype=DTYPE):
+    """``(low, high)`` rounded once to ``dtype``: a float64 matrix is compared with
+    the float64 bounds, not float32 ones widened back (0.4999 → 0.49990001)."""
+    if np.dtype(dtype) == DTYPE:
+        return LOW, HIGH
+    return (np.array([f.low for f in FEATURES], dtype=dtype),
+            np.array([f.high for f in FEATURES], dtype=dtype))
+POLICIES = ("reject", "clip")
+
+
+def coerce(X, dtype=DTYPE):
+    """``X`` as an (n, 8) C-contiguous float32 array; no copy if it already is one."""
+    X = np.require(X, dtype=dtype, requirements="C")
+    if X.ndim != 2 or X.shape[1] != len(FEATURES):
+        raise ValueError(f"expected an (n, {len(FEATURES)}) feature matrix, got shape {X.shape}")
+    return X
+
+
+def from_frame(frame):
+    """The schema columns of a DataFrame, in model order, copied once into float32."""
+    missing = [name for name in FEATURE_NAMES if name not in frame.columns]
+    if missing:
+        raise ValueError(f"missing feature columns: {missing}")
+    X = np.empty((len(frame), len(FEATURES)), dtype=DTYPE)
+    for j, name in enumerate(FEATURE_NAMES):
+        X[:, j] = frame[name].to_numpy()
+    return X
+
+
+def in_range(X, chunk_rows=65_536):
+    """Boolean row mask: every feature within the schema bounds (NaN counts as outside).
+
+    Works through ``chunk_rows`` at a time so the (rows, 8) comparison
+    temporaries stay small next to the matrix itself.
+    """
+    low, high = bounds(X.dtype)
+    ok = np.empty(len(X), dtype=bool)
+    for start in range(0, len(X), chunk_rows):
+        block = X[start:start + chunk_rows]
+        ok[start:start + chunk_rows] = ((block >= low) & (block <= high)).all(axis=1)
+    return ok
+
+
+def validate(X, policy="reject", dtype=DTYPE):
+    """Coerce ``X`` and apply ``policy``; returns ``(X, ok)`` with ``ok`` a row mask.
+
+    ``reject`` leaves values alone and marks rows with any out-of-range or NaN
+    feature as not ok. ``clip`` clamps values to the bounds in place (the
+    buffer is the caller's if it was already float32); only rows with NaN stay
+    not ok.
+    """
+    if policy not in POLICIES:
+        raise ValueError(f"unknown out-of-range policy {policy!r}; expected one of {POLICIES}")
+    X = coerce(X, dtype)
+    if policy == "clip":
+        np.clip(X, *bounds(X.dtype), out=X)
+    return X, in_range(X)
+
+
+def describe_row(X, i):
+    """``"MedInc=99.0 outside [0.4999, 15.0001]"``-style message for one bad row."""
+    low, high = bounds(X.dtype)
+    bad = np.flatnonzero(~((X[i] >= low) & (X[i] <= high)))
+    return ", ".join(f"{FEATURE_NAMES[j]}={X[i, j]:g} outside "
+                     f"[{FEATURES[j].low:g}, {FEATURES[j].high:g}]" for j in bad)
+
+
+# ── Memory Benchmark ──────────────────────────────────────────────────────────
+def _peak(fn):
+    tracemalloc.start()
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak, elapsed
+
+
+def compare_memory(frame, consumers):
+    """Peak NumPy allocations of the validated float64 and float32 paths.
+
+    Both build a writable C-contiguous matrix from the frame (clipping needs
+    one; pandas only hands out read-only, column-major views), validate it and
+    pass it to each of ``consumers``: name → list of callables taking the
+    matrix, e.g. a backend's predict followed by an explainer.
+    """
+    results = {}
+    for name, fns in consumers.items():
+        run     = lambda X: [fn(X) for fn in fns]
+        legacy  = lambda: run(validate(frame[FEATURE_NAMES].to_numpy(dtype=np.float64),
+                                       "clip", np.float64)[0])
+        compact = lambda: run(validate(from_frame(frame), "clip")[0])
+        for a, b in zip(legacy(), compact()):
+            np.testing.assert_allclose(a, b, rtol=1e-6, atol=1e-6)
+        results[name] = {"float64": _peak(legacy), "float32": _peak(compact)}
+    return results
+
+
+def main(argv=None):
+    import pandas as pd
+
+    import backends
+    import dataset
+    import model_store
+    from explain import Explainer
+    parser = argparse.ArgumentParser(
+        description="Measure feature-matrix memory of the float64 and float32 predict paths.")
+    parser.add_argument("--rows", type=int, nargs="+", default=[100_000, 1_000_000])
+    parser.add_argument("--model-dir", default=str(model_store.ARTIFACT_ROOT))
+    parser.add_argument("--model-version", default=None)
+    args = parser.parse_args(argv)
+
+    model, meta = model_store.load_model(args.model_version, args.model_dir)
+    inplace, flat = backends.make_backend("inplace", model), backends.make_backend("flat", model)
+    explainer = Explainer(model, "approx")
+    consumers = {"inplace":          [inplace.predict],
+                 "flat":             [flat.predict],
+                 "inplace+explain":  [inplace.predict, explainer.contributions]}
+    print(f"model {meta['version']}  (peak NumPy allocations, MB)")
+    print(f"{'rows':>10}  {'path':<16} {'float64':>9} {'float32':>9} {'saved':>6}"
+          f"  {'float64 s':>9} {'float32 s':>9}")
+    for n_rows in args.rows:
+        frame = pd.DataFrame(dataset.synthetic_housing(n_rows, seed=1)[0], columns=FEATURE_NAMES)
+        for name, result in compare_memory(frame, consumers).items():
+            (old, old_s), (new, new_s) = result["float64"], result["float32"]
+            print(f"{n_rows:>10,}  {name:<16} {old / 2**20:>9.1f} {new / 2**20:>9.1f} "
+                  f"{1 - new / old:>6.0%}  {old_s:>9.3f} {new_s:>9.3f}")
+
+
+if __name__ == "__main__":
+    main()
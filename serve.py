@@ -0,0 +1,466 @@
+import argparse
+import asyncio
+import json
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+import backends
+import drift
+import model_store
+import pricing
+import schema
+from explain import METHODS as EXPLAIN_METHODS, Explainer, ImportanceCache, to_records
+from intervals import load_interval_model
+from model_watcher import ModelWatcher
+from prediction_cache import PredictionCache
+
+# ── HTTP Inference Service ────────────────────────────────────────────────────
+#   python serve.py --port 8080 --batch-window-ms 2 --max-batch 256
+#
+#   GET  /healthz   → {"status": "ok", "model_version": ...}
+#   GET  /metrics   → Prometheus text format
+#   GET  /importance → mean |SHAP| per feature for the active model
+#   GET  /drift     → PSI / KS of recent inputs and predictions vs training
+#   POST /predict   → {"MedInc": 3.87, ...}              one row
+#                     {"instances": [{...}, [8 floats], ...]}  many rows
+#                     {"instances": [...], "explain": true}    + per-row TreeSHAP
+#                     {"instances": [...], "explain": "approx"}  cheaper approximation
+# Artifacts trained with --intervals also return an "interval" per row: every
+# quantile in $ from one call to the multi-output quantile booster.
+#
+# Requests that arrive within the batching window are stacked into one matrix
+# and predicted together on a worker thread, so the event loop never blocks on
+# XGBoost and per-call overhead is paid once per batch instead of per request.
+# A ModelWatcher swaps in new artifact versions without a restart
+# (--watch-interval). Everything a request is answered with (predictor, meta,
+# explainer, interval model, drift monitor) is one ServingState, replaced as a
+# single reference and read once per request, so a request is predicted and
+# labelled by the same version. Requests still on a replaced state bypass the cache.
+# Rows are parsed straight into a float32 matrix and checked against the feature
+# schema's bounds: out-of-range rows get a 400, or are clamped with --out-of-range clip.
+# Every predicted batch also updates the drift monitor's histograms (one
+# bincount per column) when the artifact has a drift reference; the scores are
+# on /drift and as house_drift_* gauges on /metrics.
+# Bodies over MAX_BODY_BYTES get a 413 and header lines over the stream limit a
+# 431; both close the connection, since the rest of the request can't be framed.
+MAX_BODY_BYTES = 1 << 20
+
+
+class BadRequest(Exception):
+    pass
+
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def parse_rows(payload):
+    items = payload.get("instances", [payload]) if isinstance(payload, dict) else payload
+    if not isinstance(items, list) or not items:
+        raise BadRequest("expected a feature object or a non-empty 'instances' list")
+    rows = np.empty((len(items), len(schema.FEATURES)), dtype=schema.DTYPE)
+    for i, item in enumerate(items):
+        if isinstance(item, dict):
+            missing = [name for name in schema.FEATURE_NAMES if name not in item]
+            if missing:
+                raise BadRequest(f"instance {i}: missing feature {missing[0]!r}")
+            item = [item[name] for name in schema.FEATURE_NAMES]
+        elif not isinstance(item, list) or len(item) != len(schema.FEATURES):
+            raise BadRequest(f"instance {i}: expected a feature object or a list of "
+                             f"{len(schema.FEATURES)} numbers")
+        if not all(map(_is_number, item)):
+            raise BadRequest(f"instance {i}: expected {len(schema.FEATURES)} numeric features")
+        rows[i] = item
+    return rows
+
+
+class Metrics:
+    def __init__(self):
+        self.requests       = 0
+        self.errors         = 0
+        self.rows           = 0
+        self.batches        = 0
+        self.predict_seconds = 0.0
+        self.max_batch_rows = 0
+
+    def render(self, model_version, cache=None, watcher=None, monitor=None):
+        lines = [
+            f'house_model_info{{version="{model_version}"}} 1',
+            f"house_requests_total {self.requests}",
+            f"house_request_errors_total {self.errors}",
+            f"house_rows_predicted_total {self.rows}",
+            f"house_predict_batches_total {self.batches}",
+            f"house_predict_seconds_total {self.predict_seconds:.6f}",
+            f"house_predict_batch_rows_max {self.max_batch_rows}",
+        ]
+        if cache is not None:
+            stats = cache.stats()
+            lines += [f"house_prediction_cache_{key}_total {stats[key]}"
+                      for key in ("hits", "misses", "evictions", "expirations")]
+            lines.append(f"house_prediction_cache_entries {stats['entries']}")
+        if watcher is not None:
+            stats = watcher.stats()
+            lines += [f"house_model_swaps_total {stats['swaps']}",
+                      f"house_model_swap_failures_total {stats['failures']}",
+                      f"house_model_loaded_timestamp_seconds {stats['loaded_at'] or 0:.3f}"]
+        if monitor is not None:
+            report = monitor.report()
+            lines += [f"house_drift_rows_total {report['rows_total']}",
+                      f"house_drift_window_rows {report['rows']}"]
+            if report["rows"] >= drift.MIN_ROWS:          # fewer rows aren't scored: no gauges
+                lines += [f"house_drift_rare_location_share {report['rare_location_share']:.6f}"]
+                for key in ("psi", "ks", "outside_share"):
+                    lines += [f'house_drift_{key}{{feature="{name}"}} {stats[key]:.6f}'
+                              for name, stats in report["features"].items()]
+        return "\n".join(lines) + "\n"
+
+
+class MicroBatcher:
+    """Collect concurrent predict calls into one ``predictor.predict`` per window.
+
+    A batch is flushed when ``window`` seconds have passed since its first
+    request or when it reaches ``max_batch`` rows, whichever comes first.
+    A window of 0 disables batching: every request is predicted on its own.
+    Rows are predicted with the ServingState their request captured; a batch
+    that straddles a swap is split into one predict call per state.
+    """
+
+    def __init__(self, metrics, window=0.002, max_batch=256, cache=None):
+        self.metrics   = metrics
+        self.cache     = cache
+        self.window    = window
+        self.max_batch = max_batch
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="predict")
+        self._queue    = None
+        self._task     = None
+
+    def start(self):
+        self._queue = asyncio.Queue()
+        if self.window > 0:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+        self._executor.shutdown(wait=True)
+
+    def _predict(self, X, state):
+        start = time.perf_counter()
+        out = (self.cache.predict(X, state.predictor) if self.cache is not None
+               else state.predictor.predict(X))
+        self.metrics.predict_seconds += time.perf_counter() - start
+        if state.monitor is not None:
+            state.monitor.update(X, out)
+        self.metrics.batches += 1
+        self.metrics.rows    += len(X)
+        self.metrics.max_batch_rows = max(self.metrics.max_batch_rows, len(X))
+        return out
+
+    async def run(self, fn, *args):
+        """Run ``fn`` on the predict thread, behind any batch already running."""
+        return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
+    async def predict(self, rows, state):
+        loop = asyncio.get_running_loop()
+        if self._task is None:
+            return await loop.run_in_executor(self._executor, self._predict, rows, state)
+        fut = loop.create_future()
+        self._queue.put_nowait((rows, state, fut))
+        return await fut
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            pending = [await self._queue.get()]
+            n_rows   = len(pending[0][0])
+            deadline = loop.time() + self.window
+            while n_rows < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                pending.append(item)
+                n_rows += len(item[0])
+
+            groups = {}
+            for item in pending:
+                groups.setdefault(id(item[1]), []).append(item)
+            for group in groups.values():
+                await self._flush(loop, group)
+
+    async def _flush(self, loop, pending):
+        X = np.vstack([rows for rows, _, _ in pending])
+        try:
+            preds = await loop.run_in_executor(self._executor, self._predict, X, pending[0][1])
+        except Exception as exc:
+            for _, _, fut in pending:
+                if not fut.done():
+                    fut.set_exception(exc)
+            return
+        offset = 0
+        for rows, _, fut in pending:
+            if not fut.done():
+                fut.set_result(preds[offset:offset + len(rows)])
+            offset += len(rows)
+
+
+# everything one request is answered with; PredictionServer.swap replaces it whole
+ServingState = namedtuple("ServingState", "predictor meta explainer interval_model monitor")
+
+
+class PredictionServer:
+    def __init__(self, predictor, meta, window=0.002, max_batch=256, cache_size=0,
+                 cache_ttl=None, watcher=None, model=None, importance=None, interval_model=None,
+                 out_of_range="reject", monitor=None, drift_window=drift.WINDOW):
+        self.state   = ServingState(predictor, meta, Explainer(model) if model is not None else None,
+                                    interval_model, monitor)
+        self.out_of_range = out_of_range
+        self.watcher = watcher
+        self.importance = importance
+        self.metrics = Metrics()
+        self.cache   = (PredictionCache(predictor, meta["version"], cache_size, cache_ttl)
+                        if cache_size else None)
+        self.batcher = MicroBatcher(self.metrics, window, max_batch, self.cache)
+        self.drift_window = drift_window
+
+    def swap(self, predictor, meta, model=None):
+        """Route new requests to ``predictor``; called from the watcher thread.
+
+        The new state is built completely before the one assignment that publishes it.
+        """
+        root = Path(self.watcher.root) if self.watcher is not None else None
+        state = ServingState(
+            predictor, meta,
+            Explainer(model) if model is not None else None,
+            load_interval_model(meta, root) if root is not None else None,
+            drift.DriftMonitor.load(root / meta["version"], self.drift_window)
+            if root is not None and self.drift_window else None)
+        if self.cache is not None:
+            self.cache.bind(predictor, meta["version"])
+        self.state = state
+        if model is not None and self.importance is not None:
+            self.importance.get(meta["version"], model)        # warm in the background
+
+    async def handle_predict(self, body):
+        try:
+            payload = json.loads(body or b"null")
+        except ValueError:
+            raise BadRequest("request body is not valid JSON") from None
+        rows, ok = schema.validate(parse_rows(payload), self.out_of_range)
+        if not ok.all():
+            i = int(np.argmin(ok))
+            raise BadRequest(f"instance {i}: {schema.describe_row(rows, i)}")
+        explain = payload.get("explain") if isinstance(payload, dict) else None
+        if explain not in (None, False, True, *EXPLAIN_METHODS):
+            raise BadRequest(f"'explain' must be true or one of {list(EXPLAIN_METHODS)}")
+        state = self.state
+        if explain and state.explainer is None:
+            raise BadRequest("explanations are not available for this model")
+        explainer, interval_model = state.explainer, state.interval_model
+        if explain == "approx":
+            explainer = Explainer(explainer.booster, "approx")
+        predicted = (await self.batcher.predict(rows, state)).astype(np.float64)
+        price_usd = predicted * 100_000
+        tiers = pricing.classify(price_usd)
+        price_str = pricing.format_prices(price_usd)
+        predictions = [
+            {"predicted": float(p), "price_usd": float(u), "price": str(f),
+             "tier": str(t), "tier_label": str(l)}
+            for p, u, f, t, l in zip(predicted, price_usd, price_str,
+                                     tiers["tier"], tiers["label"])
+        ]
+        if interval_model is not None:
+            quantiles = (await self.batcher.run(interval_model.predict, rows)) * 100_000
+            names = [f"p{round(alpha * 100)}" for alpha in interval_model.alphas]
+            for prediction, row in zip(predictions, quantiles.tolist()):
+                prediction["interval"] = dict(zip(names, row))
+        if explain:
+            contribs = await self.batcher.run(explainer.contributions, rows)
+            records = to_records(contribs, explainer.feature_names)
+            for prediction, record in zip(predictions, records):
+                prediction["explain"] = record
+        return {"model_version": state.meta["version"], "predictions": predictions}
+
+    def handle_importance(self):
+        meta, explainer = self.state.meta, self.state.explainer
+        if self.importance is None or explainer is None:
+            return 404, {"error": "global importance is not enabled"}
+        importance = self.importance.get(meta["version"], explainer.booster)
+        if importance is None:
+            return 202, {"model_version": meta["version"], "status": "computing"}
+        return 200, {"model_version": meta["version"], "importance": importance}
+
+    def handle_drift(self):
+        meta, monitor = self.state.meta, self.state.monitor
+        if monitor is None:
+            return 404, {"error": "no drift reference for this model — run `drift.py build`"}
+        return 200, {"model_version": meta["version"], **monitor.report()}
+
+    async def route(self, method, path, body):
+        if path == "/healthz" and method == "GET":
+            return 200, "application/json", json.dumps(
+                {"status": "ok", "model_version": self.state.meta["version"]})
+        if path == "/metrics" and method == "GET":
+            state = self.state
+            return 200, "text/plain; version=0.0.4", self.metrics.render(
+                state.meta["version"], self.cache, self.watcher, state.monitor)
+        if path == "/importance" and method == "GET":
+            status, payload = self.handle_importance()
+            return status, "application/json", json.dumps(payload)
+        if path == "/drift" and method == "GET":
+            status, payload = self.handle_drift()
+            return status, "application/json", json.dumps(payload)
+        if path == "/predict" and method == "POST":
+            try:
+                return 200, "application/json", json.dumps(await self.handle_predict(body))
+            except BadRequest as exc:
+                return 400, "application/json", json.dumps({"error": str(exc)})
+        return 404, "application/json", json.dumps({"error": f"no route {method} {path}"})
+
+    async def handle_connection(self, reader, writer):
+        try:
+            while True:
+                try:
+                    request_line = await reader.readline()
+                except ValueError:               # longer than the stream limit
+                    await self.reject(writer, 431, "request line too long")
+                    break
+                if not request_line:
+                    break
+                try:
+                    method, path, version = request_line.decode("latin-1").split()
+                except ValueError:
+                    break
+                headers, error = {}, None
+                while True:
+                    try:
+                        line = await reader.readline()
+                    except ValueError:
+                        error = 431, "header line too long"
+                        break
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    key, _, value = line.decode("latin-1").partition(":")
+                    headers[key.strip().lower()] = value.strip()
+                if error is None:
+                    try:
+                        length = int(headers.get("content-length", 0))
+                    except ValueError:
+                        length = -1
+                    if length < 0:
+                        error = 400, "invalid Content-Length header"
+                    elif length > MAX_BODY_BYTES:
+                        error = 413, f"body over {MAX_BODY_BYTES} bytes"
+                if error is not None:            # the body can't be framed: answer, then close
+                    await self.reject(writer, *error)
+                    break
+                body = await reader.readexactly(length) if length > 0 else b""
+
+                self.metrics.requests += 1
+                try:
+                    status, ctype, text = await self.route(method, path.split("?")[0], body)
+                except Exception as exc:
+                    status, ctype, text = 500, "application/json", json.dumps({"error": str(exc)})
+                if status >= 400:
+                    self.metrics.errors += 1
+
+                keep_alive = (headers.get("connection", "").lower() != "close"
+                              and version == "HTTP/1.1")
+                await self.respond(writer, status, ctype, text, keep_alive)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def respond(self, writer, status, ctype, text, keep_alive):
+        data = text.encode()
+        writer.write(
+            f"HTTP/1.1 {status} {_REASONS.get(status, '')}\r\n"
+            f"Content-Type: {ctype}\r\n"
+            f"Content-Length: {len(data)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+            .encode("latin-1") + data)
+        await writer.drain()
+
+    async def reject(self, writer, status, message):
+        self.metrics.requests += 1
+        self.metrics.errors += 1
+        await self.respond(writer, status, "application/json", json.dumps({"error": message}),
+                           keep_alive=False)
+
+    async def serve(self, host, port):
+        self.batcher.start()
+        server = await asyncio.start_server(self.handle_connection, host, port)
+        print(f"serving model {self.state.meta['version']} on http://{host}:{port}  "
+              f"(batch window {self.batcher.window * 1000:g} ms, max batch {self.batcher.max_batch})",
+              flush=True)
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            await self.batcher.stop()
+
+
+_REASONS = {200: "OK", 202: "Accepted", 400: "Bad Request", 404: "Not Found",
+            413: "Content Too Large", 431: "Request Header Fields Too Large",
+            500: "Internal Server Error"}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve the house price model over HTTP.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--batch-window-ms", type=float, default=2.0,
+                        help="how long to gather requests into one batch; 0 disables batching")
+    parser.add_argument("--max-batch", type=int, default=256,
+                        help="flush a batch early once it holds this many rows")
+    parser.add_argument("--backend", choices=sorted(backends.BACKENDS), default="auto",
+                        help="inference backend (default: %(default)s)")
+    parser.add_argument("--cache-size", type=int, default=100_000,
+                        help="prediction cache entries keyed on quantized features; 0 disables")
+    parser.add_argument("--cache-ttl", type=float, default=None,
+                        help="seconds before a cached prediction expires (default: never)")
+    parser.add_argument("--model-dir", default=str(model_store.ARTIFACT_ROOT))
+    parser.add_argument("--model-version", default=None,
+                        help="pin this artifact version (disables hot-swapping)")
+    parser.add_argument("--watch-interval", type=float, default=2.0,
+                        help="seconds between checks of LATEST for a new version; 0 disables")
+    parser.add_argument("--out-of-range", choices=schema.POLICIES, default="reject",
+                        help="rows outside the feature bounds: 400 (reject) or clamp to the "
+                             "bounds (clip) (default: %(default)s)")
+    parser.add_argument("--drift-window", type=int, default=drift.WINDOW,
+                        help="drift scores cover the last 1-2 windows of this many rows; "
+                             "0 disables the monitor (default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    interval = 0 if args.model_version else args.watch_interval
+    watcher = ModelWatcher(args.model_dir, args.backend, interval)
+    watcher.load(args.model_version)
+    predictor, meta, model = watcher.current
+    importance = ImportanceCache(args.model_dir)
+    importance.get(meta["version"], model)
+    monitor = (drift.DriftMonitor.load(Path(args.model_dir) / meta["version"], args.drift_window)
+               if args.drift_window else None)
+    server = PredictionServer(predictor, meta, args.batch_window_ms / 1000, args.max_batch,
+                              args.cache_size, args.cache_ttl, watcher, model, importance,
+                              load_interval_model(meta, args.model_dir), args.out_of_range,
+                              monitor, args.drift_window)
+    watcher.on_swap = server.swap
+    watcher.start(load=False)
+    try:
+        asyncio.run(server.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
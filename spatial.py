@@ -0,0 +1,187 @@
+import argparse
+import hashlib
+import json
+import pickle
+from pathlib import Path
+
+import numpy as np
+
+import dataset
+import model_store
+
+# ── Spatial Index ─────────────────────────────────────────────────────────────
+#   python spatial.py build                     # index for the LATEST artifact
+#   index = ComparablesIndex.load(artifacts / version)
+#   index.query(37.77, -122.42, k=5)           # ≈0.1 ms on the census table
+#
+# A ball tree with haversine distance over the training blocks' (lat, lon),
+# built once per model version and pickled next to the model (every trainer
+# writes it through model_store.publish; an incremental update extends its
+# parent's index with the new batch). Queries return the k nearest real census blocks with their
+# true Target, so an estimate can be shown next to actual comparables.
+SPATIAL_FILE = "spatial.pkl"
+SPATIAL_META = "spatial.json"
+EARTH_RADIUS_KM = 6371.0088
+LAT, LON = model_store.FEATURE_NAMES.index("Latitude"), model_store.FEATURE_NAMES.index("Longitude")
+
+
+def _sha256(path):
+    return hashlib.sha256(Path(path).read_bytes()).hexdigest()
+
+
+class ComparablesIndex:
+    def __init__(self, tree, latlon, target):
+        self.tree   = tree
+        self.latlon = latlon                     # (n, 2) degrees
+        self.target = target                     # (n,) $100K units
+
+    @classmethod
+    def build(cls, X, y):
+        from sklearn.neighbors import BallTree
+        latlon = np.ascontiguousarray(np.asarray(X)[:, [LAT, LON]], dtype=np.float64)
+        return cls(BallTree(np.radians(latlon), metric="haversine"), latlon,
+                   np.asarray(y, dtype=np.float64))
+
+    def extend(self, X, y):
+        """A new index over these blocks plus the rows of ``X``."""
+        from sklearn.neighbors import BallTree
+        latlon = np.concatenate([self.latlon, np.asarray(X, dtype=np.float64)[:, [LAT, LON]]])
+        return type(self)(BallTree(np.radians(latlon), metric="haversine"), latlon,
+                          np.concatenate([self.target, np.asarray(y, dtype=np.float64)]))
+
+    def __len__(self):
+        return len(self.target)
+
+    def query_many(self, latlon, k=5):
+        """``(distance_km, index)`` arrays of shape (n, k) for many points at once."""
+        dist, idx = self.tree.query(np.radians(np.atleast_2d(latlon)), k=min(k, len(self)))
+        return dist * EARTH_RADIUS_KM, idx
+
+    def query(self, lat, lon, k=5):
+        dist, idx = self.query_many([[lat, lon]], k)
+        return [{"latitude": float(self.latlon[i, 0]), "longitude": float(self.latlon[i, 1]),
+                 "target": float(self.target[i]), "price_usd": float(self.target[i] * 100_000),
+                 "distance_km": float(d)}
+                for d, i in zip(dist[0], idx[0])]
+
+    # ── Persistence ───────────────────────────────────────────────────────────
+    def save(self, version_dir):
+        version_dir = Path(version_dir)
+        tmp = version_dir / f".{SPATIAL_FILE}.tmp"
+        with open(tmp, "wb") as fh:
+            # state, not the instance: `spatial.py build` runs as __main__
+            pickle.dump((self.tree, self.latlon, self.target), fh,
+                        protocol=pickle.HIGHEST_PROTOCOL)
+        tmp.replace(version_dir / SPATIAL_FILE)
+        (version_dir / SPATIAL_META).write_text(json.dumps(
+            {"rows": len(self), "metric": "haversine",
+             "sha256": _sha256(version_dir / SPATIAL_FILE)}, indent=2))
+
+    @classmethod
+    def load(cls, version_dir):
+        """The saved index, or None if this version has none."""
+        version_dir = Path(version_dir)
+        if not (version_dir / SPATIAL_META).exists():
+            return None
+        expected = json.loads((version_dir / SPATIAL_META).read_text())["sha256"]
+        digest = _sha256(version_dir / SPATIAL_FILE)
+        if digest != expected:
+            raise ValueError(f"spatial index in {version_dir} is corrupt: "
+                             f"sha256 {digest[:12]}… != {expected[:12]}…")
+        with open(version_dir / SPATIAL_FILE, "rb") as fh:
+            return cls(*pickle.load(fh))
+
+
+# ── Regions ───────────────────────────────────────────────────────────────────
+# A 0.05° grid over the state, each cell labelled with the region of its nearest
+# anchor city. Lookup is one array index instead of a chain of latitude cut-offs.
+REGION_ANCHORS = [
+    ("🌉", "San Francisco Bay Area",  [(37.77, -122.42), (37.80, -122.27), (37.34, -121.89),
+                                       (38.30, -122.29), (37.97, -122.53)]),
+    ("🏛️", "Sacramento Valley",       [(38.58, -121.49), (39.73, -121.84), (39.14, -121.62)]),
+    ("🌲", "North Coast",             [(40.80, -124.16), (41.76, -124.20), (39.41, -123.36)]),
+    ("⛰️", "Shasta / Far North",      [(40.59, -122.39), (41.31, -122.31), (41.49, -120.54)]),
+    ("🏔️", "Sierra Nevada",           [(38.93, -119.98), (37.74, -119.59), (37.36, -118.40),
+                                       (39.33, -120.18)]),
+    ("🌾", "San Joaquin Valley",      [(36.74, -119.79), (35.37, -119.02), (37.64, -120.99),
+                                       (37.96, -121.29), (36.33, -119.29)]),
+    ("🌊", "Central Coast",           [(36.60, -121.89), (35.28, -120.66), (34.42, -119.70),
+                                       (36.97, -122.03)]),
+    ("☀️", "Los Angeles Basin",       [(34.05, -118.24), (33.77, -118.19), (34.15, -118.14),
+                                       (34.28, -118.74), (34.20, -119.18)]),
+    ("🍊", "Orange County",           [(33.68, -117.83), (33.84, -117.91)]),
+    ("🏜️", "Inland Empire",           [(34.11, -117.29), (33.95, -117.40), (33.49, -117.15)]),
+    ("🌴", "San Diego",               [(32.72, -117.16), (33.16, -117.35), (32.64, -117.08)]),
+    ("🌵", "Desert",                  [(33.83, -116.55), (32.79, -115.56), (34.90, -117.02),
+                                       (34.58, -118.12)]),
+]
+GRID_BOUNDS = (32.5, 42.0, -124.5, -114.0)      # lat min/max, lon min/max
+GRID_STEP   = 0.05
+
+
+class RegionGrid:
+    def __init__(self, anchors=REGION_ANCHORS, bounds=GRID_BOUNDS, step=GRID_STEP):
+        self.labels = [f"{icon} {name}" for icon, name, _ in anchors]
+        points  = np.array([p for _, _, pts in anchors for p in pts])
+        owner   = np.array([r for r, (_, _, pts) in enumerate(anchors) for _ in pts])
+        self.lat0, lat1, self.lon0, lon1 = bounds
+        self.step = step
+        lats = self.lat0 + (np.arange(round((lat1 - self.lat0) / step)) + 0.5) * step
+        lons = self.lon0 + (np.arange(round((lon1 - self.lon0) / step)) + 0.5) * step
+        cell_lat, cell_lon = np.radians(np.meshgrid(lats, lons, indexing="ij"))
+        anchor_lat, anchor_lon = np.radians(points).T
+        # haversine to every anchor at once (cells × anchors); the grid only needs argmin
+        h = (np.sin((cell_lat[..., None] - anchor_lat) / 2) ** 2
+             + np.cos(cell_lat[..., None]) * np.cos(anchor_lat)
+             * np.sin((cell_lon[..., None] - anchor_lon) / 2) ** 2)
+        self.cells = owner[np.argmin(h, axis=-1)].astype(np.int8)
+
+    def lookup_many(self, lat, lon):
+        i = np.clip(((np.asarray(lat) - self.lat0) / self.step).astype(np.int64),
+                    0, self.cells.shape[0] - 1)
+        j = np.clip(((np.asarray(lon) - self.lon0) / self.step).astype(np.int64),
+                    0, self.cells.shape[1] - 1)
+        return self.cells[i, j]
+
+    def lookup(self, lat, lon):
+        return self.labels[int(self.lookup_many(lat, lon))]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build or query the comparables index.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build = sub.add_parser("build", help="build the index for an artifact version")
+    build.add_argument("--model-version", default=None, help="default: LATEST")
+    build.add_argument("--data-source", choices=dataset.SOURCES, default=dataset.DATA_SOURCE)
+    build.add_argument("--data-path", default=str(dataset.DATA_DIR))
+    query = sub.add_parser("query", help="k nearest training blocks to a point")
+    query.add_argument("lat", type=float)
+    query.add_argument("lon", type=float)
+    query.add_argument("-k", type=int, default=5)
+    query.add_argument("--model-version", default=None)
+    for command in (build, query):
+        command.add_argument("--model-dir", default=str(model_store.ARTIFACT_ROOT))
+    args = parser.parse_args(argv)
+
+    meta = model_store.read_meta(args.model_version, args.model_dir)
+    version_dir = Path(args.model_dir) / meta["version"]
+    if args.command == "build":
+        X, Y = dataset.load_housing(args.data_source, args.data_path)
+        x_train, _, y_train, _ = dataset.split(
+            X, Y, random_state=meta["params"].get("random_state", 42))
+        index = ComparablesIndex.build(x_train, y_train)
+        index.save(version_dir)
+        print(f"indexed {len(index):,} training blocks for {meta['version']}")
+        return
+
+    index = ComparablesIndex.load(version_dir)
+    if index is None:
+        raise FileNotFoundError(f"no spatial index for {meta['version']} — run `spatial.py build`")
+    print(RegionGrid().lookup(args.lat, args.lon))
+    for row in index.query(args.lat, args.lon, args.k):
+        print(f"  {row['distance_km']:>7.2f} km  ({row['latitude']:.4f}, {row['longitude']:.4f})"
+              f"  ${row['price_usd']:,.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+import argparse
+
+from xgboost import XGBRegressor
+
+import cv
+import dataset
+import drift
+import evaluate
+import intervals
+import model_store
+import spatial
+import transforms
+
+
+# ── Train Model ───────────────────────────────────────────────────────────────
+def train_model(n_estimators=100, random_state=42, source=dataset.DATA_SOURCE,
+                data_path=dataset.DATA_DIR, metrics=evaluate.DEFAULT_METRICS, derived=True,
+                data=None, timer=None):
+    """``data``: a ``dataset.split`` result to fit on instead of loading ``source``."""
+    timer = timer or evaluate.PhaseTimer()
+    if data is None:
+        with timer.phase("load_data"):
+            X, Y = dataset.load_housing(source, data_path)
+        with timer.phase("split"):
+            data = dataset.split(X, Y, random_state=random_state)
+    x_train, x_test, y_train, y_test = data
+    transform = transforms.FeatureTransform.fit(x_train) if derived else None
+    if transform is not None:
+        with timer.phase("transform"):
+            x_train, x_test = transform.transform(x_train), transform.transform(x_test)
+    with timer.phase("fit"):
+        model = XGBRegressor(n_estimators=n_estimators, random_state=random_state, verbosity=0)
+        model.fit(x_train, y_train)
+        if transform is not None:
+            transform.attach(model.get_booster())
+        else:
+            model.get_booster().feature_names = model_store.FEATURE_NAMES
+    with timer.phase("predict_train"):
+        train_pred = model.predict(x_train)
+    with timer.phase("predict_test"):
+        test_pred = model.predict(x_test)
+    with timer.phase("metrics"):
+        scores = evaluate.evaluate({"train": (y_train, train_pred),
+                                    "test":  (y_test,  test_pred)}, metrics)
+    scores["n_samples"] = int(len(x_train) + len(x_test))
+    scores["n_test"]    = int(len(x_test))
+    scores["timings"]   = timer.timings
+    return model, scores
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Train the house price model and save it as a versioned artifact.")
+    parser.add_argument("--out", default=str(model_store.ARTIFACT_ROOT),
+                        help="artifact root directory (default: %(default)s)")
+    parser.add_argument("--format", choices=("ubj", "json"), default="ubj",
+                        help="XGBoost native model format (default: %(default)s)")
+    parser.add_argument("--data-source", choices=dataset.SOURCES, default=dataset.DATA_SOURCE,
+                        help="where to read the housing table from (default: %(default)s)")
+    parser.add_argument("--data-path", default=str(dataset.DATA_DIR),
+                        help="dataset cache directory or CSV/Parquet file (default: %(default)s)")
+    parser.add_argument("--metrics", nargs="+", default=list(evaluate.DEFAULT_METRICS),
+                        choices=sorted(evaluate.METRICS),
+                        help="metrics recorded per split (default: all)")
+    parser.add_argument("--n-estimators", type=int, default=100)
+    parser.add_argument("--random-state", type=int, default=42)
+    parser.add_argument("--intervals", action="store_true",
+                        help="also train a quantile booster for low/median/high estimates")
+    parser.add_argument("--quantiles", type=float, nargs="+", default=list(intervals.QUANTILES),
+                        help="quantile_alpha values for --intervals (default: %(default)s)")
+    parser.add_argument("--raw-features", action="store_true",
+                        help="train on the 8 raw columns only, without derived features")
+    parser.add_argument("--no-spatial", action="store_true",
+                        help="skip the nearest-comparables index (spatial.pkl)")
+    parser.add_argument("--cv-folds", type=int, default=0,
+                        help="also cross-validate with this many folds and record mean ± std "
+                             "(see cv.py; default: off)")
+    parser.add_argument("--cv-scheme", choices=cv.SCHEMES, default="spatial")
+    args = parser.parse_args(argv)
+
+    # loaded and split once: the model, intervals and side files all use these rows
+    timer = evaluate.PhaseTimer()
+    with timer.phase("load_data"):
+        X, Y = dataset.load_housing(args.data_source, args.data_path)
+    with timer.phase("split"):
+        data = dataset.split(X, Y, random_state=args.random_state)
+    x_train, x_test, y_train, y_test = data
+    cv_report = None
+    if args.cv_folds:               # before any fit here: pool workers fork a fresh OpenMP state
+        cv_report = cv.cross_validate(X, Y, args.cv_folds, args.cv_scheme,
+                                      n_estimators=args.n_estimators,
+                                      random_state=args.random_state,
+                                      derived=not args.raw_features, serial=False)
+    model, scores = train_model(args.n_estimators, args.random_state,
+                                args.data_source, args.data_path, args.metrics,
+                                not args.raw_features, data=data, timer=timer)
+    params = {"n_estimators": args.n_estimators, "random_state": args.random_state,
+              "data_source": args.data_source, "derived_features": not args.raw_features}
+    extras = {}
+    if args.intervals:
+        interval_model, interval_scores = intervals.train_intervals(
+            x_train, y_train, x_test, y_test, args.n_estimators, args.random_state,
+            sorted(args.quantiles), transforms.for_model(model))
+        scores["timings"].update(interval_scores.pop("timings"))
+        scores.update(interval_scores)
+        extras[intervals.EXTRA_NAME] = interval_model.booster
+    if cv_report is not None:
+        scores["cv"] = {key: value for key, value in cv_report.items() if key != "fold_results"}
+    path = model_store.save_model(model, scores, args.out, args.format, params, extras=extras,
+                                  promote=False)
+    model_store.publish(path, [
+        None if args.no_spatial else spatial.ComparablesIndex.build(x_train, y_train),
+        drift.build_reference(model, x_train),
+    ], args.out)
+    summary = "  ".join(f"{k}={v:.4f}" for k, v in scores.items()
+                        if k.startswith("test_") and isinstance(v, float))
+    timings = "  ".join(f"{k}={v:.3f}s" for k, v in scores["timings"].items())
+    print(f"saved {path.name}  {summary}\n  {timings}")
+    return path
+
+
+if __name__ == "__main__":
+    main()
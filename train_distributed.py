@@ -0,0 +1,214 @@
+import argparse
+import contextlib
+import multiprocessing as mp
+import os
+import queue
+import sys
+import time
+
+import numpy as np
+import xgboost as xgb
+from xgboost import collective
+from xgboost.tracker import RabitTracker
+
+import dataset
+import drift
+import evaluate
+import model_store
+import spatial
+from batch_score import peak_rss_mb
+
+# ── Data-parallel Training ────────────────────────────────────────────────────
+#   python train_distributed.py --workers 4
+#   python train_distributed.py --scaling 1 2 4     # speedup / memory table
+#
+# The training split is sharded row-wise across N local worker processes that
+# join one XGBoost collective (RabitTracker on localhost, no external services).
+# Each worker builds a QuantileDMatrix from its own shard only, binned with
+# shared cut points; gradient histograms are allreduced every round, so the
+# resulting booster is the model a single process fits on the whole split
+# (up to float summation order).
+TRAIN_PARAMS = {"objective": "reg:squarederror", "tree_method": "hist", "max_bin": 256,
+                "seed": 42, "verbosity": 0}
+SKETCH_ROWS = 200_000                                   # rows sampled for the shared bin cuts
+POLL_SECONDS = 1.0                                      # how often the parent checks for dead workers
+
+
+def split_indices(n_rows, random_state=42):
+    """Same train/test rows as train.py's ``dataset.split``."""
+    return dataset.split(np.arange(n_rows), random_state=random_state)
+
+
+def reference_bins(X, y, train_idx, nthread=None):
+    """Histogram cut points from a fixed, bounded sample of the training rows.
+
+    Every worker (and the single-process reference) bins its rows with these
+    same cuts. Letting each worker sketch its own shard and merging the
+    sketches would give slightly different bins than one process sees, and
+    the boosters would drift apart round by round.
+    """
+    train_idx = np.sort(train_idx)
+    sample = train_idx[::max(1, len(train_idx) // SKETCH_ROWS)]
+    return xgb.QuantileDMatrix(X[sample], y[sample], nthread=nthread,
+                               max_bin=TRAIN_PARAMS["max_bin"],
+                               feature_names=model_store.FEATURE_NAMES)
+
+
+def _worker(rank, n_workers, tracker_args, source, data_path, n_estimators, nthread, results):
+    try:
+        results.put(_train_shard(rank, n_workers, tracker_args, source, data_path, n_estimators,
+                                 nthread))
+    except BaseException as exc:                        # the parent waits for one record per rank
+        results.put({"rank": rank, "error": f"{type(exc).__name__}: {exc}"})
+        raise
+
+
+def _train_shard(rank, n_workers, tracker_args, source, data_path, n_estimators, nthread):
+    start = time.perf_counter()
+    X, y = dataset.load_housing(source, data_path)
+    train_idx, _ = split_indices(len(y))
+    dref = reference_bins(X, y, train_idx, nthread)          # built before joining the collective
+    with collective.CommunicatorContext(**tracker_args):
+        shard = np.sort(train_idx[rank::n_workers])
+        dtrain = xgb.QuantileDMatrix(X[shard], y[shard], nthread=nthread, ref=dref,
+                                     feature_names=model_store.FEATURE_NAMES)
+        booster = xgb.train({**TRAIN_PARAMS, "nthread": nthread}, dtrain,
+                            num_boost_round=n_estimators)
+        raw = bytes(booster.save_raw("ubj")) if collective.get_rank() == 0 else None
+    return {"rank": rank, "rows": int(len(shard)), "seconds": time.perf_counter() - start,
+            "peak_rss_mb": peak_rss_mb(), "booster": raw}
+
+
+def _collect(procs, results):
+    """One record per rank, or the errors as soon as any worker fails or dies."""
+    records, errors = {}, []
+    while len(records) < len(procs) and not errors:
+        try:
+            record = results.get(timeout=POLL_SECONDS)
+        except queue.Empty:
+            # exit code 0 means the record is already on its way through the queue
+            errors += [f"rank {rank} exited with code {p.exitcode}"
+                       for rank, p in enumerate(procs) if rank not in records and p.exitcode]
+            continue
+        if "error" in record:
+            errors.append(f"rank {record['rank']}: {record['error']}")
+        records[record["rank"]] = record
+    return list(records.values()), errors
+
+
+def train_distributed(n_workers=2, n_estimators=100, source=dataset.DATA_SOURCE,
+                      data_path=dataset.DATA_DIR, nthread=None):
+    nthread = nthread or max(1, (os.cpu_count() or 1) // n_workers)
+    tracker = RabitTracker(n_workers=n_workers, host_ip="127.0.0.1")
+    tracker.start()
+    tracker_args = tracker.worker_args()
+
+    ctx = mp.get_context("spawn")
+    results = ctx.Queue()
+    start = time.perf_counter()
+    procs = [ctx.Process(target=_worker,
+                         args=(rank, n_workers, tracker_args, source, str(data_path),
+                               n_estimators, nthread, results))
+             for rank in range(n_workers)]
+    for p in procs:
+        p.start()
+    workers, errors = _collect(procs, results)
+    if errors:
+        # the surviving ranks would block in the collective forever
+        for p in procs:
+            if p.is_alive():
+                p.terminate()
+        for p in procs:
+            p.join()
+        with contextlib.suppress(xgb.core.XGBoostError):   # its accept loop errors out on free
+            tracker.free()
+        raise RuntimeError("training worker(s) failed: " + "; ".join(errors))
+    for p in procs:
+        p.join()
+    tracker.wait_for()
+    wall = time.perf_counter() - start
+
+    booster = xgb.Booster(model_file=bytearray(next(w["booster"] for w in workers if w["booster"])))
+    workers = sorted(({k: v for k, v in w.items() if k != "booster"} for w in workers),
+                     key=lambda w: w["rank"])
+    return booster, {"workers": n_workers, "nthread": nthread, "wall_seconds": wall,
+                     "per_worker": workers}
+
+
+def train_single(n_estimators=100, source=dataset.DATA_SOURCE, data_path=dataset.DATA_DIR,
+                 nthread=None):
+    X, y = dataset.load_housing(source, data_path)
+    train_idx, _ = split_indices(len(y))
+    dref = reference_bins(X, y, train_idx, nthread)
+    train_idx = np.sort(train_idx)
+    dtrain = xgb.QuantileDMatrix(X[train_idx], y[train_idx], nthread=nthread, ref=dref,
+                                 feature_names=model_store.FEATURE_NAMES)
+    params = {**TRAIN_PARAMS, **({"nthread": nthread} if nthread else {})}
+    return xgb.train(params, dtrain, num_boost_round=n_estimators)
+
+
+def score(booster, source=dataset.DATA_SOURCE, data_path=dataset.DATA_DIR):
+    X, y = dataset.load_housing(source, data_path)
+    train_idx, test_idx = split_indices(len(y))
+    scores = evaluate.evaluate({
+        "train": (y[train_idx], booster.inplace_predict(X[train_idx])),
+        "test":  (y[test_idx],  booster.inplace_predict(X[test_idx])),
+    })
+    scores["n_samples"] = int(len(y))
+    scores["n_test"]    = int(len(test_idx))
+    return scores, (X[train_idx], y[train_idx]), X[test_idx]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Train across N local worker processes.")
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--n-estimators", type=int, default=100)
+    parser.add_argument("--nthread", type=int, default=None,
+                        help="threads per worker (default: cores // workers)")
+    parser.add_argument("--data-source", choices=dataset.SOURCES, default=dataset.DATA_SOURCE)
+    parser.add_argument("--data-path", default=str(dataset.DATA_DIR))
+    parser.add_argument("--scaling", type=int, nargs="+", default=None,
+                        help="only report wall time / speedup / memory for these worker counts")
+    parser.add_argument("--out", default=str(model_store.ARTIFACT_ROOT))
+    args = parser.parse_args(argv)
+
+    if args.scaling:
+        # speedup is relative to the first worker count listed
+        print(f"{'workers':>8}{'wall s':>10}{'speedup':>10}{'rows/worker':>14}{'RSS/worker MB':>16}")
+        base = None
+        for n in args.scaling:
+            _, info = train_distributed(n, args.n_estimators, args.data_source, args.data_path,
+                                        args.nthread)
+            base = base or info["wall_seconds"]
+            rows = np.mean([w["rows"] for w in info["per_worker"]])
+            rss  = max(w["peak_rss_mb"] for w in info["per_worker"])
+            print(f"{n:>8}{info['wall_seconds']:>10.2f}{base / info['wall_seconds']:>10.2f}"
+                  f"{rows:>14,.0f}{rss:>16,.0f}")
+        return
+
+    try:
+        booster, info = train_distributed(args.workers, args.n_estimators, args.data_source,
+                                          args.data_path, args.nthread)
+    except RuntimeError as exc:
+        print(exc, file=sys.stderr)
+        sys.exit(1)
+    scores, (x_train, y_train), x_test = score(booster, args.data_source, args.data_path)
+    reference = train_single(args.n_estimators, args.data_source, args.data_path, args.nthread)
+    max_diff = float(np.max(np.abs(booster.inplace_predict(x_test)
+                                   - reference.inplace_predict(x_test))))
+    scores["timings"] = {"wall": round(info["wall_seconds"], 3)}
+    params = {"n_estimators": args.n_estimators, "workers": args.workers,
+              "nthread": info["nthread"], "max_abs_diff_vs_single": max_diff}
+    path = model_store.save_model(booster, scores, args.out, params=params, promote=False)
+    model_store.publish(path, [spatial.ComparablesIndex.build(x_train, y_train),
+                               drift.build_reference(booster, x_train)], args.out)
+    for w in info["per_worker"]:
+        print(f"  rank {w['rank']}: {w['rows']:,} rows  {w['seconds']:.2f}s  "
+              f"peak RSS {w['peak_rss_mb']:,.0f} MB")
+    print(f"saved {path.name}  test_r2={scores['test_r2']:.4f}  "
+          f"max |Δ| vs single-process booster on test = {max_diff:.2e}")
+    return path
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+import argparse
+import glob
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import xgboost as xgb
+
+import drift
+import model_store
+import spatial
+from batch_score import peak_rss_mb, read_chunks
+from dataset import TARGET
+
+# ── Out-of-core Training ──────────────────────────────────────────────────────
+#   python train_external.py "shards/*.parquet" --mode external --chunk-size 500000
+#
+# Shards (Parquet or CSV with the 8 feature columns + Target) are streamed
+# through an xgboost.DataIter one chunk at a time, so the full table is never
+# in RAM:
+#   quantile  – QuantileDMatrix: chunks are sketched and kept as compressed
+#               histogram bins in memory (≈ 1 byte per feature per row)
+#   external  – ExtMemQuantileDMatrix: the binned pages are cached on disk
+#
+# The train/test split is a hash of each row's feature bits (or of --key-column),
+# so every pass over the shards puts each row on the same side without an index.
+# The side files (comparables index, drift reference) are built from an evenly strided sample of
+# at most SIDE_FILE_ROWS training rows, taken during the scoring pass.
+HASH_BUCKETS = 10_000
+SIDE_FILE_ROWS = 200_000
+
+
+def hash_split_mask(X, test_fraction=0.2, seed=42, key=None):
+    """True for rows that belong to the test split. Deterministic per row."""
+    if key is not None:
+        words = np.ascontiguousarray(np.asarray(key)).view(np.uint64).reshape(len(key), -1)
+    else:
+        words = np.ascontiguousarray(X, dtype=np.float64).view(np.uint64)
+    h = np.full(len(words), np.uint64(seed) ^ np.uint64(0x9E3779B97F4A7C15), dtype=np.uint64)
+    with np.errstate(over="ignore"):
+        for column in words.T:                       # FNV-style combine, then splitmix64 finish
+            h = (h ^ column) * np.uint64(0x100000001B3)
+        h ^= h >> np.uint64(30)
+        h *= np.uint64(0xBF58476D1CE4E5B9)
+        h ^= h >> np.uint64(27)
+        h *= np.uint64(0x94D049BB133111EB)
+        h ^= h >> np.uint64(31)
+    return (h % np.uint64(HASH_BUCKETS)) < np.uint64(int(test_fraction * HASH_BUCKETS))
+
+
+def iter_split(shards, split, chunk_size, test_fraction, seed, key_column=None):
+    """Yield ``(X, y)`` chunks of one split across all shards."""
+    for shard in shards:
+        for frame in read_chunks(shard, chunk_size):
+            X = frame[model_store.FEATURE_NAMES].to_numpy(dtype=np.float32)
+            y = frame[TARGET].to_numpy(dtype=np.float32)
+            key = frame[key_column].to_numpy() if key_column else None
+            test = hash_split_mask(X.astype(np.float64), test_fraction, seed, key)
+            keep = test if split == "test" else ~test
+            if keep.any():
+                yield X[keep], y[keep]
+
+
+class ShardIter(xgb.DataIter):
+    def __init__(self, shards, split, chunk_size, test_fraction=0.2, seed=42,
+                 key_column=None, cache_prefix=None):
+        self._args = (shards, split, chunk_size, test_fraction, seed, key_column)
+        self._it = None
+        self.rows = 0
+        super().__init__(cache_prefix=cache_prefix)
+
+    def next(self, input_data):
+        if self._it is None:
+            self._it = iter_split(*self._args)
+            self.rows = 0
+        try:
+            X, y = next(self._it)
+        except StopIteration:
+            return False
+        self.rows += len(y)
+        input_data(data=X, label=y, feature_names=model_store.FEATURE_NAMES)
+        return True
+
+    def reset(self):
+        self._it = None
+
+
+class StreamingScores:
+    """R², MSE, RMSE and MAE accumulated chunk by chunk."""
+
+    def __init__(self):
+        self.n = 0
+        self.sum_y = self.sum_y2 = self.sse = self.sae = 0.0
+
+    def update(self, y_true, y_pred):
+        y_true = y_true.astype(np.float64)
+        err = y_true - y_pred
+        self.n      += len(y_true)
+        self.sum_y  += y_true.sum()
+        self.sum_y2 += np.square(y_true).sum()
+        self.sse    += np.square(err).sum()
+        self.sae    += np.abs(err).sum()
+
+    def result(self, prefix):
+        ss_tot = self.sum_y2 - self.sum_y ** 2 / self.n
+        mse = self.sse / self.n
+        return {f"{prefix}_r2": 1.0 - self.sse / ss_tot, f"{prefix}_mse": mse,
+                f"{prefix}_rmse": float(np.sqrt(mse)), f"{prefix}_mae": self.sae / self.n}
+
+
+def train_external(shards, mode="quantile", chunk_size=500_000, n_estimators=100,
+                   test_fraction=0.2, seed=42, key_column=None, nthread=None,
+                   cache_dir=None, log=print):
+    start = time.perf_counter()
+    shards = sorted(shards)
+    if not shards:
+        raise FileNotFoundError("no input shards matched")
+
+    with tempfile.TemporaryDirectory(dir=cache_dir) as tmp:
+        prefix = str(Path(tmp) / "cache") if mode == "external" else None
+        train_it = ShardIter(shards, "train", chunk_size, test_fraction, seed, key_column, prefix)
+        if mode == "external":
+            dtrain = xgb.ExtMemQuantileDMatrix(train_it, nthread=nthread)
+        else:
+            dtrain = xgb.QuantileDMatrix(train_it, nthread=nthread)
+        log(f"  built {mode} training matrix: {train_it.rows:,} rows  "
+            f"peak RSS {peak_rss_mb():,.0f} MB")
+
+        params = {"objective": "reg:squarederror", "tree_method": "hist", "seed": seed,
+                  "verbosity": 0}
+        if nthread:
+            params["nthread"] = nthread
+        booster = xgb.train(params, dtrain, num_boost_round=n_estimators)
+        fit_seconds = time.perf_counter() - start
+        log(f"  trained {n_estimators} rounds in {fit_seconds:.1f}s  "
+            f"peak RSS {peak_rss_mb():,.0f} MB")
+        del dtrain
+
+    scores, sample = {}, []
+    stride = max(1, -(-train_it.rows // SIDE_FILE_ROWS))
+    for split in ("train", "test"):
+        acc = StreamingScores()
+        for X, y in iter_split(shards, split, chunk_size, test_fraction, seed, key_column):
+            acc.update(y, booster.inplace_predict(X))
+            if split == "train":
+                sample.append((X[::stride], y[::stride]))
+        scores.update(acc.result(split))
+        scores[f"n_{split}"] = acc.n
+    scores["n_samples"] = scores["n_train"] + scores["n_test"]
+    scores["timings"]   = {"fit": round(fit_seconds, 3),
+                           "total": round(time.perf_counter() - start, 3)}
+    scores["peak_rss_mb"] = round(peak_rss_mb(), 1)
+    x_sample = np.concatenate([X for X, _ in sample])
+    y_sample = np.concatenate([y for _, y in sample])
+    return booster, scores, (x_sample, y_sample)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Train on Parquet/CSV shards larger than memory and save an artifact.")
+    parser.add_argument("shards", nargs="+", help="shard files or glob patterns")
+    parser.add_argument("--mode", choices=("quantile", "external"), default="quantile")
+    parser.add_argument("--chunk-size", type=int, default=500_000)
+    parser.add_argument("--n-estimators", type=int, default=100)
+    parser.add_argument("--test-fraction", type=float, default=0.2)
+    parser.add_argument("--seed", type=int, default=42, help="split hash seed")
+    parser.add_argument("--key-column", default=None,
+                        help="hash this column (e.g. a block id) instead of the features")
+    parser.add_argument("--nthread", type=int, default=None)
+    parser.add_argument("--cache-dir", default=None, help="where external-memory pages go")
+    parser.add_argument("--out", default=str(model_store.ARTIFACT_ROOT))
+    args = parser.parse_args(argv)
+
+    shards = [p for pattern in args.shards for p in (glob.glob(pattern) or [pattern])]
+    booster, scores, (x_sample, y_sample) = train_external(shards, args.mode, args.chunk_size, args.n_estimators,
+                                     args.test_fraction, args.seed, args.key_column,
+                                     args.nthread, args.cache_dir)
+    params = {"n_estimators": args.n_estimators, "mode": args.mode, "shards": len(shards),
+              "test_fraction": args.test_fraction, "split_seed": args.seed}
+    path = model_store.save_model(booster, scores, args.out, params=params, promote=False)
+    model_store.publish(path, [spatial.ComparablesIndex.build(x_sample, y_sample),
+                               drift.build_reference(booster, x_sample)], args.out)
+    print(f"saved {path.name}  test_r2={scores['test_r2']:.4f}  "
+          f"test_rmse={scores['test_rmse']:.4f}  rows={scores['n_samples']:,}  "
+          f"peak RSS {scores['peak_rss_mb']:,.0f} MB")
+    return path
+
+
+if __name__ == "__main__":
+    main()
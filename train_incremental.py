@@ -0,0 +1,162 @@
+import argparse
+from pathlib import Path
+
+import numpy as np
+import xgboost as xgb
+
+import dataset
+import drift
+import evaluate
+import model_store
+import spatial
+import transforms
+from train_external import hash_split_mask
+from tune import SEARCH_SPACE
+
+# ── Incremental Updates ───────────────────────────────────────────────────────
+#   python train_incremental.py new_sales.parquet                  # 20 more trees
+#   python train_incremental.py new_sales.csv --mode refresh       # re-fit leaf values
+#   python train_incremental.py new_sales.csv --parent 20240101T120000-3fa4c2d1e0b9
+#
+# Starts from an existing artifact and trains on the new batch only, so a daily
+# refresh costs O(new rows) instead of a full retrain:
+#   boost    – continue boosting: xgb_model=<parent>, --rounds new trees appended
+#   refresh  – process_type=update with the refresh updater: same trees, leaf
+#              values and stats recomputed on the new batch
+#
+# A hash-split slice of the new batch (plus --holdout, if given) is held out and
+# scored with both parent and child. The child is saved with its lineage either
+# way, but only becomes LATEST if its holdout RMSE is no worse than the parent's
+# by more than --tolerance.
+MODES = ("boost", "refresh")
+
+
+def booster_params(parent_meta, nthread=None):
+    """Training params of the parent, so appended trees use the same shape and eta."""
+    params = {"objective": "reg:squarederror", "tree_method": "hist", "verbosity": 0,
+              "seed": parent_meta["params"].get("random_state", 42)}
+    params.update({k: v for k, v in parent_meta["params"].items() if k in SEARCH_SPACE})
+    if nthread:
+        params["nthread"] = nthread
+    return params
+
+
+def split_batch(X, y, holdout_fraction=0.2, seed=42, holdout_path=None):
+    """``(x_new, y_new, x_hold, y_hold)``: train rows and the rows both models are scored on."""
+    test = hash_split_mask(X, holdout_fraction, seed)
+    x_hold, y_hold = X[test], y[test]
+    if holdout_path:
+        x_extra, y_extra = dataset.read_table(holdout_path)
+        x_hold = np.concatenate([x_hold, x_extra])
+        y_hold = np.concatenate([y_hold, y_extra])
+    return X[~test], y[~test], x_hold, y_hold
+
+
+def update_model(parent, x_new, y_new, mode="boost", rounds=20, params=None):
+    """Return a new booster trained from ``parent`` on the new rows only."""
+    if mode not in MODES:
+        raise ValueError(f"unknown update mode {mode!r}; expected one of {MODES}")
+    names = transforms.input_names(parent)             # the parent's derived features too
+    dtrain = xgb.DMatrix(transforms.model_inputs(parent, x_new), y_new, feature_names=names)
+    params = dict(params or {})
+    if mode == "refresh":
+        params.update(process_type="update", updater="refresh", refresh_leaf=True)
+        rounds = parent.num_boosted_rounds()       # one round refreshes one tree
+    booster = xgb.train(params, dtrain, num_boost_round=rounds, xgb_model=parent)
+    booster.feature_names = names
+    return booster
+
+
+def compare_holdout(parent, child, x_hold, y_hold, tolerance=0.0):
+    """Score both boosters on the same rows; the child passes if RMSE ≤ parent × (1 + tol)."""
+    scores = {}
+    for name, booster in (("parent", parent), ("child", child)):
+        predicted = booster.inplace_predict(transforms.model_inputs(booster, x_hold))
+        scores.update(evaluate.evaluate({name: (y_hold, predicted)}))
+    passed = scores["child_rmse"] <= scores["parent_rmse"] * (1 + tolerance)
+    return scores, bool(passed)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Update the saved model with a new data batch and gate its promotion.")
+    parser.add_argument("batch", help="CSV/Parquet file or dataset cache dir with Target")
+    parser.add_argument("--mode", choices=MODES, default="boost")
+    parser.add_argument("--rounds", type=int, default=20, help="trees to append (boost mode)")
+    parser.add_argument("--parent", default=None, help="artifact version (default: LATEST)")
+    parser.add_argument("--holdout-fraction", type=float, default=0.2)
+    parser.add_argument("--holdout", default=None,
+                        help="extra CSV/Parquet rows to score parent and child on")
+    parser.add_argument("--seed", type=int, default=42, help="holdout hash seed")
+    parser.add_argument("--tolerance", type=float, default=0.0,
+                        help="allowed relative RMSE increase over the parent (default: 0)")
+    parser.add_argument("--force", action="store_true", help="promote even if the gate fails")
+    parser.add_argument("--no-promote", action="store_true", help="never move LATEST")
+    parser.add_argument("--nthread", type=int, default=None)
+    parser.add_argument("--out", default=str(model_store.ARTIFACT_ROOT))
+    args = parser.parse_args(argv)
+
+    timer = evaluate.PhaseTimer()
+    with timer.phase("load_parent"):
+        model, parent_meta = model_store.load_model(args.parent, args.out)
+        parent = model.get_booster()
+    with timer.phase("load_data"):
+        X, y = dataset.load_housing("cache", args.batch)
+        x_new, y_new, x_hold, y_hold = split_batch(X, y, args.holdout_fraction, args.seed,
+                                                   args.holdout)
+    with timer.phase("fit"):
+        child = update_model(parent, x_new, y_new, args.mode, args.rounds,
+                             booster_params(parent_meta, args.nthread))
+    with timer.phase("compare"):
+        holdout, passed = compare_holdout(parent, child, x_hold, y_hold, args.tolerance)
+
+    train_pred = child.inplace_predict(transforms.model_inputs(child, x_new))
+    scores = evaluate.evaluate({"train": (y_new, train_pred)})
+    scores.update({f"test_{k[len('child_'):]}": v for k, v in holdout.items()
+                   if k.startswith("child_")})
+    # n_samples counts every row the model has seen: the parent's, then this batch
+    n_seen = parent_meta["metrics"].get("n_samples", 0) + int(len(y))
+    scores.update(n_samples=n_seen, n_test=int(len(y_hold)),
+                  parent_holdout={k[len("parent_"):]: v for k, v in holdout.items()
+                                  if k.startswith("parent_")},
+                  timings=timer.timings)
+    parent_lineage = parent_meta.get("lineage") or {}
+    lineage = {
+        "parent":         parent_meta["version"],
+        "parent_sha256":  parent_meta["sha256"],
+        "root":           parent_lineage.get("root", parent_meta["version"]),
+        "generation":     parent_lineage.get("generation", 0) + 1,
+        "mode":           args.mode,
+        "trees_added":    child.num_boosted_rounds() - parent.num_boosted_rounds(),
+        "n_trees":        child.num_boosted_rounds(),
+        "batch":          str(args.batch),
+        "batch_rows":     int(len(y_new)),
+        "gate":           {"passed": passed, "tolerance": args.tolerance},
+    }
+    params = {**parent_meta["params"], "update_mode": args.mode, "update_rounds": args.rounds}
+    promote = (passed or args.force) and not args.no_promote
+    path = model_store.save_model(child, scores, args.out, params=params, lineage=lineage,
+                                  promote=False)
+    parent_dir = Path(args.out) / parent_meta["version"]
+    parent_index = spatial.ComparablesIndex.load(parent_dir)
+    parent_reference = drift.Reference.load(parent_dir)
+    model_store.publish(path, [
+        parent_index.extend(x_new, y_new) if parent_index is not None else None,
+        (parent_reference.extend(x_new, train_pred) if parent_reference is not None
+         else drift.build_reference(child, x_new)),
+    ], args.out, promote=promote)
+
+    parent_fit = parent_meta["metrics"].get("timings", {}).get("fit")
+    print(f"parent {parent_meta['version']}  holdout rmse={holdout['parent_rmse']:.4f}  "
+          f"r2={holdout['parent_r2']:.4f}")
+    print(f"child  {path.name}  holdout rmse={holdout['child_rmse']:.4f}  "
+          f"r2={holdout['child_r2']:.4f}  ({len(y_hold):,} rows)")
+    print(f"  {args.mode} on {len(y_new):,} new rows: fit {timer.timings['fit']:.3f}s"
+          + (f" (parent fit {parent_fit:.3f}s)" if parent_fit else ""))
+    print(f"  gate {'passed' if passed else 'FAILED'} → "
+          f"{'promoted to LATEST' if promote else 'saved, LATEST unchanged'}")
+    return path
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+import json
+
+import numpy as np
+
+import schema
+
+# ── Feature Transforms ────────────────────────────────────────────────────────
+#   transform = FeatureTransform.fit(x_train)     # once, at training time
+#   transform.attach(booster)                      # saved inside the model file
+#   for_model(model).transform(X)                  # raw 8 columns → model inputs
+#
+# Derived columns appended to the 8 raw features, computed column by column
+# into one float32 buffer:
+#   BedroomsPerRoom  AveBedrms / AveRooms        (the ratio the app's tip is about)
+#   RoomsPerPerson   AveRooms / AveOccup
+#   Households       Population / AveOccup
+#   Rot<θ>           (lat, lon) about the training centre, rotated by θ degrees,
+#                    so axis-aligned splits can follow the diagonal coastline
+# No log columns: tree splits don't change under monotone rescaling, so
+# log1p(Population) only duplicated Population (it got zero importance).
+# The fitted parameters are stored as a booster attribute, so whatever loads the
+# model (backends, explainer, watcher, incremental updates) transforms its input
+# exactly the way training did. Models without the attribute take the raw columns.
+ATTR      = "feature_transform"
+ROTATIONS = (30, 60, 120, 150)
+RATIOS    = ("BedroomsPerRoom", "RoomsPerPerson", "Households")
+LABELS    = {
+    "BedroomsPerRoom": "Bedrooms / Room", "RoomsPerPerson": "Rooms / Person",
+    "Households":      "Households",
+    **{f"Rot{angle}": f"Location · {angle}° axis" for angle in ROTATIONS},
+}
+_COL = {name: i for i, name in enumerate(schema.FEATURE_NAMES)}
+
+
+class FeatureTransform:
+    def __init__(self, center, angles=ROTATIONS):
+        self.center = tuple(float(c) for c in center)
+        self.angles = tuple(int(a) for a in angles)
+        self.output_names = (schema.FEATURE_NAMES + list(RATIOS)
+                             + [f"Rot{angle}" for angle in self.angles])
+        theta = np.radians(self.angles)
+        self._cos = np.cos(theta).astype(schema.DTYPE)
+        self._sin = np.sin(theta).astype(schema.DTYPE)
+
+    @classmethod
+    def fit(cls, X, angles=ROTATIONS):
+        X = np.asarray(X)
+        return cls((X[:, _COL["Latitude"]].mean(), X[:, _COL["Longitude"]].mean()), angles)
+
+    def transform(self, X):
+        """``(n, len(output_names))`` C-contiguous float32 model inputs for raw rows."""
+        X = schema.coerce(X)
+        n_raw = len(schema.FEATURES)
+        out = np.empty((len(X), len(self.output_names)), dtype=schema.DTYPE)
+        out[:, :n_raw] = X
+        rooms, beds = X[:, _COL["AveRooms"]], X[:, _COL["AveBedrms"]]
+        pop, occup  = X[:, _COL["Population"]], X[:, _COL["AveOccup"]]
+        np.divide(beds, rooms, out=out[:, n_raw])
+        np.divide(rooms, occup, out=out[:, n_raw + 1])
+        np.divide(pop, occup, out=out[:, n_raw + 2])
+        dlat = X[:, _COL["Latitude"]] - schema.DTYPE(self.center[0])
+        dlon = X[:, _COL["Longitude"]] - schema.DTYPE(self.center[1])
+        for k in range(len(self.angles)):
+            col = out[:, n_raw + len(RATIOS) + k]
+            np.multiply(dlat, self._cos[k], out=col)
+            col += dlon * self._sin[k]
+        return out
+
+    def to_dict(self):
+        return {"center": list(self.center), "angles": list(self.angles),
+                "output_names": self.output_names}
+
+    @classmethod
+    def from_dict(cls, params):
+        transform = cls(params["center"], params["angles"])
+        if transform.output_names != params["output_names"]:
+            raise ValueError(f"saved transform outputs {params['output_names']} do not match "
+                             f"this code's {transform.output_names}")
+        return transform
+
+    def attach(self, booster):
+        """Store the parameters in ``booster`` and name its features after the outputs."""
+        booster.set_attr(**{ATTR: json.dumps(self.to_dict())})
+        booster.feature_names = self.output_names
+
+
+def for_model(model):
+    """The FeatureTransform saved with a model/booster, or None for raw-feature models."""
+    booster = model.get_booster() if hasattr(model, "get_booster") else model
+    params = booster.attr(ATTR)
+    return FeatureTransform.from_dict(json.loads(params)) if params else None
+
+
+def model_inputs(model, X):
+    """``X`` as the model expects it: transformed if it has a transform, else as is."""
+    transform = for_model(model)
+    return transform.transform(X) if transform is not None else X
+
+
+def input_names(model):
+    transform = for_model(model)
+    return transform.output_names if transform is not None else schema.FEATURE_NAMES
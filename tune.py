@@ -0,0 +1,196 @@
+import argparse
+import json
+import os
+import sqlite3
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+import numpy as np
+from xgboost import XGBRegressor, __version__ as xgb_version
+
+import dataset
+import drift
+import evaluate
+import model_store
+import spatial
+
+# ── Hyperparameter Search ─────────────────────────────────────────────────────
+#   python tune.py --trials 40 --workers 4 --promote
+#
+# Random search over depth / eta / subsample / colsample with early stopping on
+# a validation split carved out of the training set (the test split stays
+# untouched until the winner is scored). Trials run in a process pool with
+# nthread × workers ≤ cores. Every trial is appended to a JSONL or SQLite log;
+# --promote refits the best config and saves it as the artifact the app loads.
+SEARCH_SPACE = {
+    "max_depth":        ("int",    3, 10),
+    "learning_rate":    ("log",    0.01, 0.3),
+    "subsample":        ("float",  0.5, 1.0),
+    "colsample_bytree": ("float",  0.5, 1.0),
+    "min_child_weight": ("log",    0.5, 20.0),
+}
+LOG_PATH = Path(__file__).resolve().parent / "tuning" / "trials.jsonl"
+
+
+def sample_params(rng):
+    params = {}
+    for name, (kind, low, high) in SEARCH_SPACE.items():
+        if kind == "int":
+            params[name] = int(rng.integers(low, high + 1))
+        elif kind == "log":
+            params[name] = float(np.exp(rng.uniform(np.log(low), np.log(high))))
+        else:
+            params[name] = float(rng.uniform(low, high))
+    return params
+
+
+# ── Worker ────────────────────────────────────────────────────────────────────
+# Each worker loads the (memory-mapped) dataset once in its initializer, so the
+# feature matrix is never pickled per trial.
+_DATA = {}
+
+
+def _init_worker(source, data_path, random_state):
+    X, Y = dataset.load_housing(source, data_path)
+    x_train, _, y_train, _ = dataset.split(X, Y, random_state=random_state)
+    x_fit, x_val, y_fit, y_val = dataset.split(x_train, y_train, random_state=random_state)
+    _DATA.update(x_fit=x_fit, y_fit=y_fit, x_val=x_val, y_val=y_val)
+
+
+def run_trial(trial_id, params, max_estimators, early_stopping, nthread, random_state):
+    start = time.perf_counter()
+    model = XGBRegressor(n_estimators=max_estimators, early_stopping_rounds=early_stopping,
+                         n_jobs=nthread, random_state=random_state, verbosity=0, **params)
+    model.fit(_DATA["x_fit"], _DATA["y_fit"],
+              eval_set=[(_DATA["x_val"], _DATA["y_val"])], verbose=False)
+    val_pred = model.predict(_DATA["x_val"], iteration_range=(0, model.best_iteration + 1))
+    scores = evaluate.evaluate({"val": (_DATA["y_val"], val_pred)}, ("rmse", "mae", "r2"))
+    return {
+        "trial":         trial_id,
+        "params":        params,
+        "n_estimators":  int(model.best_iteration + 1),
+        "metrics":       scores,
+        "wall_seconds":  round(time.perf_counter() - start, 4),
+        "booster_bytes": len(model.get_booster().save_raw("ubj")),
+        "nthread":       nthread,
+    }
+
+
+# ── Experiment Log ────────────────────────────────────────────────────────────
+class TrialLog:
+    """Append-only trial log; ``.sqlite``/``.db`` paths use SQLite, anything else JSONL."""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = None
+        if self.path.suffix in (".sqlite", ".db"):
+            self._db = sqlite3.connect(self.path)
+            self._db.execute("CREATE TABLE IF NOT EXISTS trials ("
+                             "experiment TEXT, trial INTEGER, record TEXT)")
+
+    def append(self, record):
+        line = json.dumps(record, sort_keys=True)
+        if self._db is not None:
+            self._db.execute("INSERT INTO trials VALUES (?, ?, ?)",
+                             (record["experiment"], record["trial"], line))
+            self._db.commit()
+        else:
+            with open(self.path, "a") as fh:
+                fh.write(line + "\n")
+
+    def close(self):
+        if self._db is not None:
+            self._db.close()
+
+
+def thread_budget(workers, cores=None):
+    cores = cores or os.cpu_count() or 1
+    workers = max(1, min(workers, cores))
+    return workers, max(1, cores // workers)
+
+
+def tune(trials=20, workers=2, max_estimators=1000, early_stopping=50, seed=0,
+         source=dataset.DATA_SOURCE, data_path=dataset.DATA_DIR, random_state=42,
+         log_path=LOG_PATH, log=print):
+    workers, nthread = thread_budget(workers)
+    rng = np.random.default_rng(seed)
+    experiment = uuid.uuid4().hex[:12]
+    trial_log = TrialLog(log_path)
+    header = {"experiment": experiment, "seed": seed, "data_source": source,
+              "max_estimators": max_estimators, "early_stopping": early_stopping,
+              "xgboost": xgb_version}
+    log(f"experiment {experiment}: {trials} trials on {workers} workers × {nthread} threads")
+
+    results = []
+    try:
+        with ProcessPoolExecutor(workers, initializer=_init_worker,
+                                 initargs=(source, str(data_path), random_state)) as pool:
+            futures = [pool.submit(run_trial, i, sample_params(rng), max_estimators,
+                                   early_stopping, nthread, random_state)
+                       for i in range(trials)]
+            for fut in as_completed(futures):
+                record = {**header, **fut.result()}
+                trial_log.append(record)
+                results.append(record)
+                log(f"  trial {record['trial']:>3}  val_rmse={record['metrics']['val_rmse']:.4f}  "
+                    f"trees={record['n_estimators']:>4}  {record['wall_seconds']:.1f}s")
+    finally:
+        trial_log.close()
+    return sorted(results, key=lambda r: r["metrics"]["val_rmse"])
+
+
+def promote(best, source=dataset.DATA_SOURCE, data_path=dataset.DATA_DIR, random_state=42,
+            root=model_store.ARTIFACT_ROOT):
+    """Refit the winning config on the full training split, then save and publish it."""
+    X, Y = dataset.load_housing(source, data_path)
+    x_train, x_test, y_train, y_test = dataset.split(X, Y, random_state=random_state)
+    params = {**best["params"], "n_estimators": best["n_estimators"]}
+    model = XGBRegressor(random_state=random_state, verbosity=0, **params)
+    model.fit(x_train, y_train)
+    model.get_booster().feature_names = model_store.FEATURE_NAMES
+    scores = evaluate.evaluate({"train": (y_train, model.predict(x_train)),
+                                "test":  (y_test,  model.predict(x_test))})
+    scores["n_samples"] = int(len(X))
+    scores["n_test"]    = int(len(x_test))
+    params.update(random_state=random_state, data_source=source,
+                  tuning_experiment=best["experiment"], tuning_trial=best["trial"])
+    path = model_store.save_model(model, scores, root, params=params, promote=False)
+    model_store.publish(path, [spatial.ComparablesIndex.build(x_train, y_train),
+                               drift.build_reference(model, x_train)], root)
+    return path, scores
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Tune XGBoost hyperparameters.")
+    parser.add_argument("--trials", type=int, default=20)
+    parser.add_argument("--workers", type=int, default=2,
+                        help="worker processes; threads per trial = cores // workers")
+    parser.add_argument("--max-estimators", type=int, default=1000)
+    parser.add_argument("--early-stopping", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=0, help="search sampler seed")
+    parser.add_argument("--log", default=str(LOG_PATH),
+                        help="trial log, .jsonl or .sqlite (default: %(default)s)")
+    parser.add_argument("--data-source", choices=dataset.SOURCES, default=dataset.DATA_SOURCE)
+    parser.add_argument("--data-path", default=str(dataset.DATA_DIR))
+    parser.add_argument("--promote", action="store_true",
+                        help="refit the best config and save it as the LATEST artifact")
+    parser.add_argument("--out", default=str(model_store.ARTIFACT_ROOT))
+    args = parser.parse_args(argv)
+
+    ranked = tune(args.trials, args.workers, args.max_estimators, args.early_stopping,
+                  args.seed, args.data_source, args.data_path, log_path=args.log)
+    best = ranked[0]
+    print(f"best trial {best['trial']}  val_rmse={best['metrics']['val_rmse']:.4f}  "
+          f"n_estimators={best['n_estimators']}  {json.dumps(best['params'])}")
+    if args.promote:
+        path, scores = promote(best, args.data_source, args.data_path, root=args.out)
+        print(f"promoted {path.name}  test_r2={scores['test_r2']:.4f}  "
+              f"test_rmse={scores['test_rmse']:.4f}")
+    return ranked
+
+
+if __name__ == "__main__":
+    main()